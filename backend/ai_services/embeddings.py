@@ -1,9 +1,16 @@
 from sentence_transformers import SentenceTransformer
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import asyncio
+import time
 import numpy as np
+from backend.config import settings
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
 try:
     print("🧠 Loading AI Embedding Model (all-MiniLM-L6-v2)...")
-    embedding_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
     print("✅ AI Embedding Model loaded successfully.")
 except Exception as e:
     print(f"⚠️ Warning: Could not load embedding model from Hugging Face: {e}")
@@ -21,3 +28,207 @@ def get_embedding(text: str) -> np.ndarray:
         return [0.0] * 384
         
     return embedding_model.encode(text, normalize_embeddings=True).tolist()
+
+
+def embed_batch(texts: list[str], batch_size: int = 64) -> np.ndarray:
+    """
+    Encodes many texts in batched forward passes.
+    Returns a float32 matrix of shape (len(texts), 384).
+    """
+    if embedding_model is None:
+        return np.zeros((len(texts), 384), dtype="float32")
+
+    return embedding_model.encode(
+        texts,
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+    ).astype("float32")
+
+
+
+# --- Async Inference ---
+# Encoding is CPU-bound and would otherwise stall every request on the worker's
+# event loop. Torch releases the GIL while it runs, so a small dedicated thread
+# pool keeps a single copy of the model per process and frees the loop.
+
+class EmbeddingQueueFull(RuntimeError):
+    """Raised when too many embedding jobs are already waiting for the model."""
+
+
+class InferenceEngine:
+    """Runs embedding calls on a dedicated executor with a bounded queue."""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embedding")
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._waits = deque(maxlen=1024)
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_queue:
+            self.rejected += 1
+            raise EmbeddingQueueFull(f"Embedding queue is full ({self.pending} pending)")
+
+        submitted = time.perf_counter()
+
+        def job():
+            # Time spent waiting for a free executor thread
+            wait = time.perf_counter() - submitted
+            return wait, fn(*args)
+
+        self.pending += 1
+        try:
+            wait, result = await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        self._waits.append(wait)
+        return result
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg_ms": round(1000 * sum(waits) / len(waits), 3) if waits else 0.0,
+            "queue_wait_p95_ms": round(1000 * waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0,
+            "queue_wait_max_ms": round(1000 * waits[-1], 3) if waits else 0.0,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into batched encodes.
+
+    The first queued text opens a batch that is flushed once it holds
+    max_batch items or max_wait_ms has passed. Each caller awaits a future
+    that resolves to its own row of the batch result.
+    """
+
+    def __init__(self, engine: InferenceEngine, max_batch: int, max_wait_ms: float):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.items = 0
+        self._loop = None
+        self._queue = None
+        self._wakeup = None
+        self._slots = None
+        self._worker = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._wakeup = asyncio.Event()
+            # One in-flight batch per executor thread
+            self._slots = asyncio.Semaphore(self.engine.max_workers)
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, text: str) -> list:
+        self._ensure_worker()
+        if self._queue.qsize() >= self.engine.max_queue:
+            self.engine.rejected += 1
+            raise EmbeddingQueueFull(f"Embedding queue is full ({self._queue.qsize()} pending)")
+
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future))
+        self._wakeup.set()
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            batch = await self._collect()
+            # Skip callers that gave up while waiting
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                self._slots.release()
+                continue
+            self._loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: list):
+        try:
+            vectors = await self.engine.run(embed_batch, [text for text, _ in batch], self.max_batch)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), row in zip(batch, vectors):
+            if not future.done():
+                future.set_result(row.tolist())
+
+    def stats(self) -> dict:
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+inference_engine = InferenceEngine(
+    max_workers=settings.EMBEDDING_WORKERS,
+    max_queue=settings.EMBEDDING_MAX_QUEUE,
+)
+
+
+micro_batcher = MicroBatcher(
+    inference_engine,
+    max_batch=settings.EMBEDDING_MICROBATCH_SIZE,
+    max_wait_ms=settings.EMBEDDING_MICROBATCH_WAIT_MS,
+)
+
+
+async def aget_embedding(text: str) -> list:
+    """
+    Async version of get_embedding that runs off the event loop.
+    Concurrent calls are micro-batched unless EMBEDDING_MICROBATCH_SIZE <= 1.
+    """
+    if embedding_model is not None and micro_batcher.max_batch > 1:
+        return await micro_batcher.submit(text)
+    return await inference_engine.run(get_embedding, text)
+
+
+async def aembed_batch(texts: list[str], batch_size: int = 64) -> np.ndarray:
+    """Async version of embed_batch that runs off the event loop."""
+    return await inference_engine.run(embed_batch, texts, batch_size)
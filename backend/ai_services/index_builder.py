@@ -0,0 +1,58 @@
+"""
+Shared FAISS index builder.
+
+Run one builder next to any number of serving workers started with
+FAISS_SERVING_MODE=reader:
+
+    FAISS_SERVING_MODE=builder python -m backend.ai_services.index_builder
+
+A uvicorn process started with FAISS_SERVING_MODE=builder runs the same loop
+in the background.
+"""
+import asyncio
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.config import settings
+from backend.models.db import DBTool, DBToolEmbedding
+from backend.ai_services.search_engine import reindex_all_tools, publish_shared_index
+
+
+async def catalog_fingerprint(session: AsyncSession) -> tuple:
+    """
+    Cheap change detector: tool count/max id plus stored-embedding count and
+    last update. Readers persist embeddings for new or rediscovered tools, so
+    any indexing-relevant change moves one of these values.
+    """
+    tools = (await session.execute(select(func.count(DBTool.id), func.max(DBTool.id)))).one()
+    embeddings = (await session.execute(
+        select(func.count(DBToolEmbedding.tool_id), func.max(DBToolEmbedding.updated_at))
+    )).one()
+    return (*tools, *embeddings)
+
+
+async def run_builder(session_factory, interval: float | None = None):
+    """Re-indexes and publishes a new shared version whenever the catalog changes."""
+    interval = interval or settings.FAISS_BUILDER_INTERVAL_SECONDS
+    last_fingerprint = None
+    while True:
+        try:
+            async with session_factory() as session:
+                fingerprint = await catalog_fingerprint(session)
+                if fingerprint != last_fingerprint:
+                    await reindex_all_tools(session)
+                    await publish_shared_index()
+                    # Re-read: the re-index itself may have stored new embeddings
+                    last_fingerprint = await catalog_fingerprint(session)
+        except Exception as e:
+            print(f"❌ Shared index build failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def main():
+    from backend.db import init_db, async_session_factory
+    await init_db()
+    await run_builder(async_session_factory)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
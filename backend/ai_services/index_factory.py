@@ -0,0 +1,180 @@
+import math
+import numpy as np
+import faiss
+from backend.config import settings
+
+# Index kinds selectable through settings.FAISS_INDEX_TYPE
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+
+# FAISS warns below ~39 training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+def needs_training(kind: str | None = None) -> bool:
+    """Whether the index kind must be trained on sample vectors before adding."""
+    return (kind or settings.FAISS_INDEX_TYPE).lower() == "ivfpq"
+
+
+def default_nlist(n_vectors: int) -> int:
+    """Rule of thumb: about 4 * sqrt(N) inverted lists."""
+    return max(1, int(4 * math.sqrt(max(n_vectors, 1))))
+
+
+def create_index(
+    dimension: int,
+    kind: str | None = None,
+    training_vectors: np.ndarray | None = None,
+    hnsw_m: int | None = None,
+    ivf_nlist: int | None = None,
+    pq_m: int | None = None,
+) -> faiss.Index:
+    """
+    Builds an empty ID-mapped index of the configured kind.
+
+    - flat:  exact brute-force L2 search.
+    - hnsw:  graph-based ANN, no training, tuned with efSearch.
+    - ivfpq: inverted lists + product quantization, trained on
+             `training_vectors` and tuned with nprobe. Falls back to flat
+             when there are too few vectors to train on.
+    """
+    kind = (kind or settings.FAISS_INDEX_TYPE).lower()
+    if kind not in INDEX_TYPES:
+        print(f"⚠️ Unknown FAISS_INDEX_TYPE '{kind}', using flat.")
+        kind = "flat"
+
+    if kind == "hnsw":
+        base = faiss.IndexHNSWFlat(dimension, hnsw_m or settings.FAISS_HNSW_M)
+        base.hnsw.efConstruction = settings.FAISS_HNSW_EF_CONSTRUCTION
+    elif kind == "ivfpq":
+        n_train = 0 if training_vectors is None else len(training_vectors)
+        nlist = ivf_nlist or settings.FAISS_IVF_NLIST or default_nlist(n_train)
+        if n_train < nlist * MIN_POINTS_PER_CENTROID:
+            print(f"ℹ️ Only {n_train} vectors to train IVF-PQ with {nlist} lists. Using flat index.")
+            base = faiss.IndexFlatL2(dimension)
+        else:
+            quantizer = faiss.IndexFlatL2(dimension)
+            base = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m or settings.FAISS_PQ_M, 8)
+            base.train(np.ascontiguousarray(training_vectors, dtype='float32'))
+            print(f"✅ Trained IVF-PQ index ({nlist} lists) on {n_train} vectors.")
+    else:
+        base = faiss.IndexFlatL2(dimension)
+
+    index = faiss.IndexIDMap2(base)
+    configure_search(index)
+    return index
+
+
+def configure_search(index: faiss.Index, ef_search: int | None = None, nprobe: int | None = None):
+    """Applies query-time knobs (HNSW efSearch, IVF nprobe) to an index."""
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = ef_search or settings.FAISS_HNSW_EF_SEARCH
+    ivf = faiss.try_extract_index_ivf(base)
+    if ivf is not None:
+        ivf.nprobe = nprobe or settings.FAISS_IVF_NPROBE
+
+
+def filtered_search(
+    index: faiss.Index,
+    queries: np.ndarray,
+    k: int,
+    allowed_ids: np.ndarray | None,
+    dead_positions: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Searches only the vectors whose tool ID is in `allowed_ids` (all tools
+    when None), so k filtered hits come back from a single pass instead of
+    post-filtering. `dead_positions` are tombstoned HNSW vectors (see
+    tombstone_positions) that must never be returned.
+
+    The selector is applied inside FAISS with the search parameters type the
+    underlying index expects (efSearch / nprobe are carried over). When the
+    allowed set is a small fraction of an HNSW index, graph traversal would
+    mostly visit excluded nodes and miss results, so the flat vector storage
+    is scanned exactly instead.
+    """
+    base = faiss.downcast_index(index.index)
+    has_dead = dead_positions is not None and len(dead_positions) > 0
+    if allowed_ids is None and not has_dead:
+        return index.search(queries, k)
+
+    if isinstance(base, faiss.IndexHNSW):
+        # Tombstones are storage positions, not tool IDs (an upserted tool has a
+        # live and a dead vector under the same ID), so search the graph directly
+        # with position selectors and map the hits back to tool IDs.
+        # (Each selector is kept in its own local: wrapping selectors only hold raw pointers)
+        in_filter = alive = None
+        if allowed_ids is not None:
+            allowed = faiss.IDSelectorBatch(np.ascontiguousarray(allowed_ids, dtype='int64'))
+            in_filter = faiss.IDSelectorTranslated(index.id_map, allowed)
+        if has_dead:
+            dead = faiss.IDSelectorBatch(np.ascontiguousarray(dead_positions, dtype='int64'))
+            alive = faiss.IDSelectorNot(dead)
+        if in_filter is not None and alive is not None:
+            selector = faiss.IDSelectorAnd(in_filter, alive)
+        else:
+            selector = in_filter if in_filter is not None else alive
+
+        if allowed_ids is not None and len(allowed_ids) <= settings.FAISS_FILTER_EXACT_FRACTION * index.ntotal:
+            storage = faiss.downcast_index(base.storage)
+            distances, positions = storage.search(queries, k, params=faiss.SearchParameters(sel=selector))
+        else:
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+            distances, positions = base.search(queries, k, params=params)
+        labels = np.array(
+            [[index.id_map.at(int(p)) if p >= 0 else -1 for p in row] for row in positions],
+            dtype='int64',
+        )
+        return distances, labels
+
+    if allowed_ids is None:
+        return index.search(queries, k)  # other kinds remove vectors in place, so have no tombstones
+    selector = faiss.IDSelectorBatch(np.ascontiguousarray(allowed_ids, dtype='int64'))
+    ivf = faiss.try_extract_index_ivf(base)
+    if ivf is not None:
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    return index.search(queries, k, params=params)
+
+
+def tombstone_positions(index: faiss.Index, drop_ids: np.ndarray, dead_positions: set[int]) -> int:
+    """
+    Marks the vectors of `drop_ids` as dead instead of removing them, for index
+    kinds (like HNSW) that can't remove vectors in place. Searches skip them
+    via filtered_search; compact() drops them later. Returns how many vectors
+    were newly marked.
+    """
+    existing = faiss.vector_to_array(index.id_map)
+    positions = np.flatnonzero(np.isin(existing, drop_ids)).tolist()
+    new = [p for p in positions if p not in dead_positions]
+    dead_positions.update(new)
+    return len(new)
+
+
+def compact(index: faiss.Index, dead_positions: np.ndarray, dimension: int) -> faiss.Index:
+    """
+    Returns a copy of an ID-mapped index without the vectors at
+    `dead_positions`. Vectors are reconstructed from the index itself, so
+    nothing is re-embedded. Rebuilding an HNSW graph is O(N): run it off the
+    event loop.
+    """
+    existing = faiss.vector_to_array(index.id_map)
+    keep = np.ones(len(existing), dtype=bool)
+    keep[np.asarray(dead_positions, dtype='int64')] = False
+
+    base = faiss.downcast_index(index.index)
+    vectors = base.reconstruct_n(0, index.ntotal)
+    # HNSW needs no training, so an empty index of the same shape can be refilled directly
+    rebuilt = faiss.IndexIDMap2(_empty_like(base, dimension))
+    configure_search(rebuilt)
+    rebuilt.add_with_ids(vectors[keep], existing[keep])
+    return rebuilt
+
+
+def _empty_like(base: faiss.Index, dimension: int) -> faiss.Index:
+    if isinstance(base, faiss.IndexHNSW):
+        empty = faiss.IndexHNSWFlat(dimension, base.hnsw.nb_neighbors(1))
+        empty.hnsw.efConstruction = base.hnsw.efConstruction
+        return empty
+    return faiss.IndexFlatL2(dimension)
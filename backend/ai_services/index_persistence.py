@@ -0,0 +1,182 @@
+import os
+import json
+import struct
+import hashlib
+import threading
+import tempfile
+from typing import Callable, Tuple
+import faiss
+
+# File layout: fixed header followed by the serialized FAISS index.
+#   magic (8s) | format version (I) | index version (Q) | payload length (Q) | sha256 (32s)
+MAGIC = b"EMCPFAIS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIQQ32s")
+
+
+def write_snapshot(path: str, payload: bytes, index_version: int):
+    """Atomically writes a snapshot: temp file in the same directory, fsync, rename."""
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, index_version, len(payload), hashlib.sha256(payload).digest())
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".faiss_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_snapshot(path: str) -> Tuple[int, bytes]:
+    """Returns (index_version, payload). Raises ValueError if the file is corrupt."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise ValueError("Snapshot header is truncated")
+        magic, fmt, index_version, length, checksum = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError("Not an eMCP FAISS snapshot")
+        if fmt != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {fmt}")
+        payload = f.read(length)
+    if len(payload) != length or hashlib.sha256(payload).digest() != checksum:
+        raise ValueError("Snapshot checksum mismatch")
+    return index_version, payload
+
+
+class SnapshotWriter:
+    """
+    Coalesces index changes into at most one background write per interval.
+
+    `snapshot_fn` is called on the writer thread and must return a consistent
+    (index_version, payload) pair, e.g. by serializing under a threading lock.
+    """
+
+    def __init__(self, path: str, snapshot_fn: Callable[[], Tuple[int, bytes]], interval: float):
+        self.path = path
+        self.interval = interval
+        self._snapshot_fn = snapshot_fn
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._stopping = False
+        self._thread = None
+        self.writes = 0
+
+    def mark_dirty(self):
+        with self._cond:
+            self._dirty = True
+            self._cond.notify_all()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="faiss-snapshot", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Writes immediately if there are unsaved changes."""
+        with self._write_lock:
+            with self._cond:
+                if not self._dirty:
+                    return
+                self._dirty = False
+            try:
+                version, payload = self._snapshot_fn()
+                write_snapshot(self.path, payload, version)
+                self.writes += 1
+            except Exception as e:
+                with self._cond:
+                    self._dirty = True
+                print(f"Error saving FAISS index: {e}")
+
+    def stop(self, flush: bool = True):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        if flush:
+            self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty or self._stopping)
+                if self._stopping:
+                    return
+                # Let a burst of changes accumulate before writing once
+                self._cond.wait_for(lambda: self._stopping, timeout=self.interval)
+                if self._stopping:
+                    return
+            self.flush()
+
+
+# --- Shared (multi-worker) index ---
+# A builder process publishes immutable, versioned index files in native FAISS
+# format (so readers can mmap them) plus a small manifest that is swapped in
+# atomically. Serving workers poll the manifest and hot-swap to new versions.
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _atomic_write_json(path: str, data: dict):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".manifest_", suffix=".tmp", dir=directory)
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_manifest(shared_dir: str) -> dict | None:
+    """Returns the current manifest, or None if nothing has been published yet."""
+    path = os.path.join(shared_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def publish_index(shared_dir: str, index: faiss.Index, keep_versions: int = 3) -> dict:
+    """
+    Writes `index` as the next version and points the manifest at it.
+    Older versions beyond `keep_versions` are deleted (readers that still have
+    them mapped keep working; the kernel frees them once unmapped).
+    """
+    os.makedirs(shared_dir, exist_ok=True)
+    current = read_manifest(shared_dir)
+    version = (current["version"] + 1) if current else 1
+    file_name = f"index.v{version:012d}.faiss"
+    path = os.path.join(shared_dir, file_name)
+
+    tmp_path = path + ".tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+    manifest = {
+        "version": version,
+        "file": file_name,
+        "size": os.path.getsize(path),
+        "ntotal": int(index.ntotal),
+    }
+    _atomic_write_json(os.path.join(shared_dir, MANIFEST_NAME), manifest)
+
+    published = sorted(f for f in os.listdir(shared_dir) if f.startswith("index.v") and f.endswith(".faiss"))
+    for old in published[:-keep_versions]:
+        os.remove(os.path.join(shared_dir, old))
+    return manifest
+
+
+def open_shared_index(shared_dir: str, manifest: dict) -> faiss.Index:
+    """Opens a published index read-only and memory-mapped."""
+    path = os.path.join(shared_dir, manifest["file"])
+    if os.path.getsize(path) != manifest["size"]:
+        raise ValueError(f"Shared index {manifest['file']} does not match its manifest")
+    # IO_FLAG_MMAP maps IVF inverted lists; IO_FLAG_MMAP_IFC (faiss >= 1.10)
+    # maps flat/HNSW vector storage. Without it those are read into RAM.
+    flags = faiss.IO_FLAG_READ_ONLY | faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    return faiss.read_index(path, flags)
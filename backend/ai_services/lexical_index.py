@@ -0,0 +1,223 @@
+import re
+import math
+import heapq
+import bisect
+import threading
+import numpy as np
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "with", "no", "desc",
+}
+
+# Term-frequency weight per field (a light BM25F): matches in the name count most
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "description": 1.0,
+    "tool_definitions": 1.0,
+    "readme": 0.5,
+}
+
+# Query terms with no exact match are expanded to at most this many vocabulary prefixes
+MAX_PREFIX_EXPANSIONS = 20
+
+# Above this many postings per query, scoring switches to vectorised numpy
+DENSE_SCORING_THRESHOLD = 5000
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def definitions_text(tool_definitions) -> str:
+    """Flattens discovered MCP tool definitions into searchable text."""
+    if not tool_definitions:
+        return ""
+    return " ".join(
+        f"{d.get('name', '')} {d.get('description') or ''}"
+        for d in tool_definitions if isinstance(d, dict)
+    )
+
+
+class BM25Index:
+    """
+    In-process inverted index with BM25 ranking, updated one document at a time.
+
+    Documents are tools keyed by id; each is a dict of field name -> text,
+    weighted by FIELD_WEIGHTS. Queries touching few postings are scored in
+    plain Python; queries with common terms switch to a vectorised numpy path
+    over per-term posting arrays, which are cached until the term changes.
+    Searches run on worker threads, so reads and updates share a lock.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self.postings: Dict[str, Dict[int, float]] = {}  # term -> {doc_id: weighted tf}
+        self.doc_terms: Dict[int, Dict[str, float]] = {}
+        self.doc_len: Dict[int, float] = {}
+        self.total_len = 0.0
+        self._vocabulary: List[str] = []  # sorted, for prefix expansion
+
+        # Dense slot layout used by the numpy scoring path
+        self._slot_of: Dict[int, int] = {}
+        self._slot_doc = np.full(1024, -1, dtype=np.int64)
+        self._slot_len = np.zeros(1024, dtype=np.float64)
+        self._free_slots: List[int] = []
+        self._n_slots = 0
+        self._term_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def _allocate_slot(self, doc_id: int, length: float) -> int:
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = self._n_slots
+            self._n_slots += 1
+            if slot >= len(self._slot_doc):
+                grow = len(self._slot_doc)
+                self._slot_doc = np.concatenate([self._slot_doc, np.full(grow, -1, dtype=np.int64)])
+                self._slot_len = np.concatenate([self._slot_len, np.zeros(grow, dtype=np.float64)])
+        self._slot_of[doc_id] = slot
+        self._slot_doc[slot] = doc_id
+        self._slot_len[slot] = length
+        return slot
+
+    def add(self, doc_id: int, fields: Dict[str, str]):
+        """Indexes a document, replacing any previous version of it."""
+        with self._lock:
+            self.remove(doc_id)
+
+            terms: Dict[str, float] = defaultdict(float)
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS.get(field, 1.0)
+                for token in tokenize(text):
+                    terms[token] += weight
+            if not terms:
+                return
+
+            length = sum(terms.values())
+            for term, tf in terms.items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = self.postings[term] = {}
+                    bisect.insort(self._vocabulary, term)
+                posting[doc_id] = tf
+                self._term_arrays.pop(term, None)
+            self.doc_terms[doc_id] = dict(terms)
+            self.doc_len[doc_id] = length
+            self.total_len += length
+            self._allocate_slot(doc_id, length)
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            terms = self.doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            for term in terms:
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(doc_id, None)
+                    self._term_arrays.pop(term, None)
+                    if not posting:
+                        del self.postings[term]
+                        pos = bisect.bisect_left(self._vocabulary, term)
+                        if pos < len(self._vocabulary) and self._vocabulary[pos] == term:
+                            self._vocabulary.pop(pos)
+            self.total_len -= self.doc_len.pop(doc_id)
+
+            slot = self._slot_of.pop(doc_id)
+            self._slot_doc[slot] = -1
+            self._slot_len[slot] = 0.0
+            self._free_slots.append(slot)
+
+    def _expand(self, term: str) -> List[str]:
+        if term in self.postings:
+            return [term]
+        # Prefix match keeps partial queries ("git" -> "github") working like ILIKE did
+        start = bisect.bisect_left(self._vocabulary, term)
+        expanded = []
+        for candidate in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not candidate.startswith(term):
+                break
+            expanded.append(candidate)
+        return expanded
+
+    def _arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._term_arrays.get(term)
+        if cached is None:
+            posting = self.postings[term]
+            slots = np.fromiter((self._slot_of[d] for d in posting), dtype=np.int64, count=len(posting))
+            tfs = np.fromiter(posting.values(), dtype=np.float64, count=len(posting))
+            cached = self._term_arrays[term] = (slots, tfs)
+        return cached
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        allow: Callable[[int], bool] | None = None,
+    ) -> List[Tuple[int, float]]:
+        """Returns up to k (doc_id, score) pairs, best first."""
+        with self._lock:
+            n_docs = len(self.doc_len)
+            if n_docs == 0 or k <= 0:
+                return []
+            avg_len = self.total_len / n_docs
+
+            terms = {term for token in set(tokenize(query)) for term in self._expand(token)}
+            if not terms:
+                return []
+            idf = {}
+            for term in terms:
+                df = len(self.postings[term])
+                idf[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+            if sum(len(self.postings[t]) for t in terms) <= DENSE_SCORING_THRESHOLD:
+                return self._search_sparse(terms, idf, avg_len, k, allow)
+            return self._search_dense(terms, idf, avg_len, k, allow)
+
+    def _search_sparse(self, terms, idf, avg_len, k, allow):
+        scores: Dict[int, float] = defaultdict(float)
+        for term in terms:
+            for doc_id, tf in self.postings[term].items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / avg_len)
+                scores[doc_id] += idf[term] * tf * (self.k1 + 1) / (tf + norm)
+
+        candidates = scores.items()
+        if allow is not None:
+            candidates = [(doc_id, score) for doc_id, score in candidates if allow(doc_id)]
+        return heapq.nlargest(k, candidates, key=lambda item: item[1])
+
+    def _search_dense(self, terms, idf, avg_len, k, allow):
+        scores = np.zeros(self._n_slots, dtype=np.float64)
+        for term in terms:
+            slots, tfs = self._arrays(term)
+            norm = self.k1 * (1 - self.b + self.b * self._slot_len[slots] / avg_len)
+            scores[slots] += idf[term] * tfs * (self.k1 + 1) / (tfs + norm)
+
+        # Pull a few extra candidates so a selective `allow` rarely needs a second pass
+        want = k if allow is None else k * 4
+        while True:
+            want = min(want, self._n_slots)
+            top = np.argpartition(-scores, want - 1)[:want] if want < self._n_slots else np.arange(self._n_slots)
+            top = top[np.argsort(-scores[top])]
+            results = []
+            for slot in top:
+                score = float(scores[slot])
+                if score <= 0:
+                    break
+                doc_id = int(self._slot_doc[slot])
+                if allow is None or allow(doc_id):
+                    results.append((doc_id, score))
+                    if len(results) == k:
+                        return results
+            if want >= self._n_slots or score <= 0:
+                return results
+            want *= 4
@@ -1,69 +1,266 @@
 from typing import List, Dict, Any
+from collections import deque
 import os
 import json
+import hashlib
+import time
 import asyncio
+import threading
+from datetime import datetime, timezone
 import numpy as np
 import faiss
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from backend.models.db import DBTool, DBRating, DBUser
-from backend.ai_services.embeddings import get_embedding
+from sqlalchemy import select, insert, update
+from backend.models.db import DBTool, DBToolEmbedding
+from backend import crud
+from backend.ai_services.embeddings import aget_embedding, aembed_batch, embedding_model, EMBEDDING_MODEL_NAME
+from backend.config import settings
+from backend.services.cache import TTLCache
+from backend.services.tool_registry import tool_registry, tool_meta, ToolMeta, SearchFilter
+from backend.ai_services.lexical_index import BM25Index, definitions_text
+from backend.ai_services.index_factory import (
+    create_index, configure_search, needs_training, filtered_search, tombstone_positions, compact,
+)
+from backend.ai_services.index_persistence import (
+    SnapshotWriter, read_snapshot, read_manifest, publish_index, open_shared_index,
+)
 
 # --- Configuration ---
 DIMENSION = 384
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FAISS_INDEX_PATH = os.path.join(BASE_DIR, "faiss_index.bin")
-MAP_PATH = os.path.join(BASE_DIR, "index_to_tool_id.json")
+SHARED_INDEX_DIR = settings.FAISS_SHARED_DIR or os.path.join(BASE_DIR, "faiss_shared")
 
 # --- Global State ---
-index = faiss.IndexFlatL2(DIMENSION)
-index_to_tool_id = {}
+# Vectors are keyed directly by DBTool.id, so search hits need no side map
+# and a single tool can be removed or replaced without rebuilding the index.
+# The underlying index kind (flat / hnsw / ivfpq) comes from FAISS_INDEX_TYPE.
+def _new_index(training_vectors: np.ndarray | None = None) -> faiss.Index:
+    return create_index(DIMENSION, training_vectors=training_vectors)
+
+index = _new_index()
 faiss_lock = asyncio.Lock()
+# BM25 over name/description/readme/tool_definitions: ranked keyword fallback
+lexical_index = BM25Index()
+# Guards index mutations against the background snapshot thread
+index_guard = threading.Lock()
+# HNSW can't remove vectors in place: deleted and replaced vectors are
+# tombstoned by storage position, skipped at search time and dropped by a
+# background compaction that rebuilds the graph off the event loop.
+tombstones: set[int] = set()
+_compaction: asyncio.Task | None = None
+
+# Bumped on every index mutation so cached search results never outlive it
+index_version = 0
+# Manifest version of the mmap'd shared index currently served (reader mode)
+shared_index_version = 0
+
+def is_reader() -> bool:
+    """Reader workers serve a shared index published by a builder and never mutate it."""
+    return settings.FAISS_SERVING_MODE == "reader"
+
+# --- Search Caches ---
+# query text -> embedding vector
+embedding_cache = TTLCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    max_bytes=settings.SEARCH_EMBEDDING_CACHE_MAX_BYTES,
+    ttl=settings.SEARCH_CACHE_TTL_SECONDS,
+    sizeof=lambda vector: 8 * len(vector),
+)
+# (query, k, filter, index_version) -> formatted result list
+result_cache = TTLCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    max_bytes=settings.SEARCH_RESULT_CACHE_MAX_BYTES,
+    ttl=settings.SEARCH_CACHE_TTL_SECONDS,
+    sizeof=lambda results: len(json.dumps(results, default=str)),
+)
 
 # --- Helpers ---
+def _dead_positions() -> np.ndarray:
+    return np.fromiter(tombstones, dtype='int64', count=len(tombstones))
+
+def _snapshot() -> tuple[int, bytes]:
+    with index_guard:
+        version, payload, dead = index_version, faiss.serialize_index(index), _dead_positions()
+    if len(dead):
+        # Tombstoned vectors must not come back on restart; compact a copy on this thread
+        payload = faiss.serialize_index(compact(faiss.deserialize_index(payload), dead, DIMENSION))
+    return version, payload.tobytes()
+
+# Writes happen on a background thread, at most once per interval, via temp-file rename
+snapshot_writer = SnapshotWriter(FAISS_INDEX_PATH, _snapshot, settings.FAISS_SNAPSHOT_INTERVAL_SECONDS)
+
 def save_faiss_index():
-    try:
-        faiss.write_index(index, FAISS_INDEX_PATH)
-        with open(MAP_PATH, "w") as f:
-            json.dump(index_to_tool_id, f)
-    except Exception as e:
-        print(f"Error saving FAISS index: {e}")
+    """Schedules a background snapshot of the index."""
+    snapshot_writer.mark_dirty()
+
+def flush_faiss_index():
+    """Stops the snapshot thread and writes any pending changes (call on shutdown)."""
+    snapshot_writer.stop(flush=True)
 
 def load_faiss_index():
-    global index, index_to_tool_id
-    if os.path.exists(FAISS_INDEX_PATH) and os.path.exists(MAP_PATH):
+    global index, index_version
+    if os.path.exists(FAISS_INDEX_PATH):
         try:
-            index = faiss.read_index(FAISS_INDEX_PATH)
-            with open(MAP_PATH, "r") as f:
-                data = json.load(f)
-                index_to_tool_id = {int(k): v for k, v in data.items()}
-            print(f"✅ FAISS index loaded with {index.ntotal} vectors.")
+            version, payload = read_snapshot(FAISS_INDEX_PATH)
+            loaded = faiss.deserialize_index(np.frombuffer(payload, dtype='uint8'))
+            if not isinstance(loaded, faiss.IndexIDMap2):
+                print("ℹ️ FAISS snapshot is not keyed by tool ID. Starting fresh.")
+                return
+            index = loaded
+            index_version = version
+            tombstones.clear()
+            configure_search(index)
+            print(f"✅ FAISS index loaded with {index.ntotal} vectors (version {version}).")
         except Exception as e:
+            # Corrupt or legacy file: the startup re-index rebuilds it.
             print(f"⚠️ Failed to load FAISS index: {e}")
-            index = faiss.IndexFlatL2(DIMENSION)
-            index_to_tool_id = {}
+            index = _new_index()
     else:
         print("ℹ️ No existing FAISS index found. Starting fresh.")
 
 
-load_faiss_index()
+def _id_array(tool_id: int) -> np.ndarray:
+    return np.array([tool_id], dtype='int64')
+
+def _remove_ids(ids: np.ndarray) -> int:
+    """Removes vectors by tool ID. Must be called while holding faiss_lock and index_guard."""
+    try:
+        return index.remove_ids(ids)
+    except RuntimeError:
+        # HNSW graphs can't drop vectors in place: tombstone them, compact later
+        removed = tombstone_positions(index, ids, tombstones)
+        if removed:
+            _schedule_compaction()
+        return removed
+
+def _schedule_compaction():
+    global _compaction
+    if _compaction is None or _compaction.done():
+        _compaction = asyncio.get_running_loop().create_task(compact_tombstones())
+
+async def compact_tombstones(delay: float | None = None):
+    """
+    Rebuilds the HNSW graph without its tombstoned vectors on a worker
+    thread. Searches keep using the current index meanwhile; other index
+    mutations wait on faiss_lock.
+    """
+    global index
+    # Let a burst of deletes and upserts accumulate into one rebuild
+    await asyncio.sleep(settings.FAISS_COMPACT_DELAY_SECONDS if delay is None else delay)
+    try:
+        async with faiss_lock:
+            dead = _dead_positions()
+            if not len(dead):
+                return
+            started = time.perf_counter()
+            compacted = await asyncio.to_thread(compact, index, dead, DIMENSION)
+            with index_guard:
+                index = compacted
+                tombstones.clear()
+                _bump_index_version()
+            save_faiss_index()
+        print(f"🧹 Compacted FAISS index: dropped {len(dead)} vector(s) in {time.perf_counter() - started:.1f}s.")
+    except Exception as e:
+        print(f"❌ FAISS compaction failed: {e}")
+
+def _bump_index_version():
+    """Invalidate cached search results after the index changes."""
+    global index_version
+    index_version += 1
+    result_cache.clear()
+
+def invalidate_search_results():
+    """Drops cached search results whose tool data changed outside the index (e.g. a new rating)."""
+    _bump_index_version()
+
+def build_rich_text(name: str, description: str, readme: str = "") -> str:
+    """Combine all metadata for a rich search context."""
+    return f"Name: {name}. Description: {description}. Details: {readme or ''}"
+
+def lexical_fields(name: str, description: str, readme: str = "", tool_definitions=None) -> dict:
+    return {
+        "name": name or "",
+        "description": description or "",
+        "readme": readme or "",
+        "tool_definitions": definitions_text(tool_definitions),
+    }
+
+def content_hash(rich_text: str) -> str:
+    """Fingerprint of the embedded text (and model), used to skip unchanged tools."""
+    return hashlib.sha256(f"{EMBEDDING_MODEL_NAME}\n{rich_text}".encode("utf-8")).hexdigest()
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+async def _store_embedding(session: AsyncSession, tool_id: int, digest: str, vector: np.ndarray):
+    """Insert or update the persisted embedding for one tool."""
+    if embedding_model is None:
+        # Zero-vector placeholders must not be mistaken for real embeddings later
+        return
+    stored = await session.get(DBToolEmbedding, tool_id)
+    if stored:
+        stored.content_hash = digest
+        stored.embedding = vector.astype('float32').tobytes()
+        stored.updated_at = _utcnow()
+    else:
+        session.add(DBToolEmbedding(tool_id=tool_id, content_hash=digest, embedding=vector.astype('float32').tobytes()))
+    await session.commit()
+
+
+if not is_reader():
+    load_faiss_index()
 
 # --- Core Functions ---
 
-async def add_tool_to_faiss(tool_id: int, name: str, description: str, readme: str = ""):
+def register_tool_meta(tool_id: int, meta: ToolMeta):
+    """Records a tool's filterable columns (cost, status, owner, created_at)."""
+    tool_registry.upsert(tool_id, meta)
+    _bump_index_version()
+
+def update_tool_meta(tool_id: int, **fields):
+    """Updates filterable columns, e.g. status after a deployment check."""
+    tool_registry.update(tool_id, **fields)
+    _bump_index_version()
+
+def add_tool_to_lexical_index(tool_id: int, name: str, description: str, readme: str = "", tool_definitions: list | None = None):
+    """Makes a tool keyword-searchable right away, before it has been embedded."""
+    lexical_index.add(tool_id, lexical_fields(name, description, readme, tool_definitions))
+    _bump_index_version()
+
+async def add_tool_to_faiss(
+    tool_id: int,
+    name: str,
+    description: str,
+    readme: str = "",
+    session: AsyncSession | None = None,
+    tool_definitions: list | None = None,
+):
     """
-    Adds a tool to the FAISS index. Combines name, description, and readme for better semantic matching.
+    Adds or replaces a tool in the FAISS and lexical indexes. Combines name, description, and readme for better semantic matching.
+    When a session is given, the embedding is also persisted so the next startup can reuse it.
     """
     try:
-        # Combine all metadata for a rich search context
-        rich_text = f"Name: {name}. Description: {description}. Details: {readme or ''}"
-        embedding = get_embedding(rich_text)
+        lexical_index.add(tool_id, lexical_fields(name, description, readme, tool_definitions))
+        rich_text = build_rich_text(name, description, readme)
+        embedding = await aget_embedding(rich_text)
         embedding_np = np.array([embedding]).astype('float32')
+        if session is not None:
+            await _store_embedding(session, tool_id, content_hash(rich_text), embedding_np[0])
+
+        if is_reader():
+            # The builder picks the stored embedding up on its next sync
+            _bump_index_version()
+            print(f"ℹ️ Tool {tool_id} queued for the shared index builder.")
+            return
 
         async with faiss_lock:
-            index.add(embedding_np)
-            new_position = index.ntotal - 1
-            index_to_tool_id[new_position] = tool_id
+            # Upsert: drop any previous vector for this tool before adding the new one
+            ids = _id_array(tool_id)
+            with index_guard:
+                _remove_ids(ids)
+                index.add_with_ids(embedding_np, ids)
+                _bump_index_version()
             save_faiss_index()
             print(f"✅ Tool {tool_id} indexed in Semantic Search (Context length: {len(rich_text)} chars).")
     except Exception as e:
@@ -71,96 +268,371 @@ async def add_tool_to_faiss(tool_id: int, name: str, description: str, readme: s
 
 async def remove_tool_from_faiss(tool_id: int):
     """
-    Removes a tool from the FAISS index by triggering a full re-index.
-    
-    Note: FAISS IndexFlatL2 doesn't support individual vector removal,
-    so deletion is handled by calling reindex_all_tools() from the delete endpoint.
-    This function is kept as a placeholder for future vector DB migrations
-    (e.g., Pinecone) where single-vector deletion is supported.
+    Removes a single tool from the FAISS and lexical indexes.
     """
-    print(f"🗑️ Tool {tool_id} removal requested — use reindex_all_tools() to sync the index.")
+    lexical_index.remove(tool_id)
+    tool_registry.remove(tool_id)
+    if is_reader():
+        # Shared indexes are read-only; the builder drops the tool on its next sync
+        _bump_index_version()
+        return
+    try:
+        async with faiss_lock:
+            with index_guard:
+                removed = _remove_ids(_id_array(tool_id))
+                if removed:
+                    _bump_index_version()
+            if removed:
+                save_faiss_index()
+        print(f"🗑️ Tool {tool_id} removed from Semantic Search ({removed} vector(s)).")
+    except Exception as e:
+        print(f"❌ Error removing tool from FAISS: {e}")
 
-async def reindex_all_tools(session: AsyncSession):
+async def reindex_all_tools(
+    session: AsyncSession,
+    page_size: int | None = None,
+    batch_size: int | None = None,
+):
     """
-    Clears the FAISS index and rebuilds it from the database.
+    Rebuilds the FAISS index from the database.
+
+    Tools are streamed in keyset pages (ordered by id) together with their
+    persisted embeddings. Only tools whose content hash changed (or that have
+    no stored vector yet) are re-embedded, in batches; everything else is
+    loaded straight from the tool_embeddings table. The live index is only
+    swapped and persisted once, after the whole catalog has been processed.
     """
+    page_size = page_size or settings.REINDEX_PAGE_SIZE
+    batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
     print("🔄 Re-indexing all tools from database...")
     try:
-        global index, index_to_tool_id
-        
-        # 1. Reset index
+        global index, lexical_index
+        new_index = None if needs_training() else _new_index()
+        new_lexical = BM25Index()
+        new_metas = []
+        pending_vectors, pending_ids = [], []  # buffered until the index is trained
+        last_id = 0
+        reused = 0
+        embedded = 0
+
+        def flush_pending():
+            nonlocal new_index
+            training = np.concatenate(pending_vectors) if pending_vectors else None
+            new_index = _new_index(training_vectors=training)
+            if pending_vectors:
+                new_index.add_with_ids(training, np.concatenate(pending_ids))
+            pending_vectors.clear()
+            pending_ids.clear()
+
+        while True:
+            # 1. Fetch the next page of tools with their stored embeddings
+            stmt = (
+                select(
+                    DBTool.id, DBTool.name, DBTool.description, DBTool.readme, DBTool.tool_definitions,
+                    DBTool.cost, DBTool.status, DBTool.owner_id, DBTool.created_at,
+                    DBToolEmbedding.content_hash, DBToolEmbedding.embedding,
+                )
+                .outerjoin(DBToolEmbedding, DBToolEmbedding.tool_id == DBTool.id)
+                .where(DBTool.id > last_id)
+                .order_by(DBTool.id)
+                .limit(page_size)
+            )
+            rows = (await session.execute(stmt)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            # 2. Split into unchanged (reuse stored vector) and stale rows
+            vectors = np.zeros((len(rows), DIMENSION), dtype='float32')
+            stale = []  # (position, row, rich_text, digest)
+            for pos, r in enumerate(rows):
+                new_lexical.add(r.id, lexical_fields(r.name, r.description, r.readme, r.tool_definitions))
+                new_metas.append((r.id, tool_meta(r)))
+                rich_text = build_rich_text(r.name, r.description, r.readme)
+                digest = content_hash(rich_text)
+                if r.content_hash == digest and r.embedding:
+                    vectors[pos] = np.frombuffer(r.embedding, dtype='float32')
+                else:
+                    stale.append((pos, r, rich_text, digest))
+
+            # 3. Encode only the stale rows, in batches, and persist them
+            if stale:
+                embeddings = await aembed_batch([item[2] for item in stale], batch_size=batch_size)
+                new_rows, changed_rows = [], []
+                for (pos, r, _, digest), vector in zip(stale, embeddings):
+                    vectors[pos] = vector
+                    values = {"tool_id": r.id, "content_hash": digest, "embedding": vector.tobytes(), "updated_at": _utcnow()}
+                    (changed_rows if r.content_hash is not None else new_rows).append(values)
+
+                if embedding_model is not None:
+                    if new_rows:
+                        await session.execute(insert(DBToolEmbedding), new_rows)
+                    if changed_rows:
+                        await session.execute(update(DBToolEmbedding), changed_rows)
+                    await session.commit()
+
+            reused += len(rows) - len(stale)
+            embedded += len(stale)
+            ids = np.array([r.id for r in rows], dtype='int64')
+            if new_index is None:
+                pending_vectors.append(vectors)
+                pending_ids.append(ids)
+                if sum(len(v) for v in pending_vectors) >= settings.FAISS_TRAIN_SAMPLE_SIZE:
+                    flush_pending()
+            else:
+                new_index.add_with_ids(vectors, ids)
+
+            if len(rows) < page_size:
+                break
+
+        if new_index is None:
+            flush_pending()
+
+        # 4. Swap in the rebuilt index and persist once
         async with faiss_lock:
-            index = faiss.IndexFlatL2(DIMENSION)
-            index_to_tool_id = {}
-        
-        # 2. Fetch all tools
-        stmt = select(DBTool)
-        result = await session.execute(stmt)
-        tools = result.scalars().all()
-        
-        # 3. Add each tool
-        for t in tools:
-            await add_tool_to_faiss(t.id, t.name, t.description, getattr(t, 'readme', ''))
-            
-        print(f"✅ Re-indexing complete. {index.ntotal} tools indexed.")
+            with index_guard:
+                index = new_index
+                tombstones.clear()
+                lexical_index = new_lexical
+                tool_registry.replace(new_metas)
+                _bump_index_version()
+            save_faiss_index()
+
+        print(f"✅ Re-indexing complete. {index.ntotal} tools indexed ({reused} reused, {embedded} embedded).")
     except Exception as e:
         print(f"❌ Re-indexing failed: {e}")
 
 
-SIMILARITY_THRESHOLD = 1.0 
+async def rebuild_lexical_index(session: AsyncSession, page_size: int | None = None):
+    """
+    Rebuilds only the BM25 index and tool registry from the database (no embedding work).
+    Used by reader workers, which don't run reindex_all_tools.
+    """
+    global lexical_index
+    page_size = page_size or settings.REINDEX_PAGE_SIZE
+    new_lexical = BM25Index()
+    new_metas = []
+    last_id = 0
+    while True:
+        stmt = (
+            select(
+                DBTool.id, DBTool.name, DBTool.description, DBTool.readme, DBTool.tool_definitions,
+                DBTool.cost, DBTool.status, DBTool.owner_id, DBTool.created_at,
+            )
+            .where(DBTool.id > last_id)
+            .order_by(DBTool.id)
+            .limit(page_size)
+        )
+        rows = (await session.execute(stmt)).all()
+        for r in rows:
+            new_lexical.add(r.id, lexical_fields(r.name, r.description, r.readme, r.tool_definitions))
+            new_metas.append((r.id, tool_meta(r)))
+        if len(rows) < page_size:
+            break
+        last_id = rows[-1].id
+
+    lexical_index = new_lexical
+    tool_registry.replace(new_metas)
+    _bump_index_version()
+    print(f"✅ Lexical index rebuilt with {len(lexical_index)} tools.")
+
+
+# --- Shared Index (multi-worker serving) ---
+
+async def publish_shared_index():
+    """Builder: publishes the current index as a new mmap-able version."""
+    def publish():
+        with index_guard:
+            dead = _dead_positions()
+            if not len(dead):
+                return publish_index(SHARED_INDEX_DIR, index, settings.FAISS_SHARED_KEEP_VERSIONS)
+            copy = faiss.deserialize_index(faiss.serialize_index(index))
+        # Readers must never see tombstoned vectors
+        return publish_index(SHARED_INDEX_DIR, compact(copy, dead, DIMENSION), settings.FAISS_SHARED_KEEP_VERSIONS)
 
-async def search_tools(session: AsyncSession, query: str, k: int = 5) -> List[Dict[str, Any]]:
+    manifest = await asyncio.to_thread(publish)
+    print(f"📦 Published shared FAISS index v{manifest['version']} ({manifest['ntotal']} vectors).")
+
+async def refresh_shared_index() -> bool:
+    """Reader: hot-swaps to the newest published index, if there is one."""
+    global index, shared_index_version
+    manifest = await asyncio.to_thread(read_manifest, SHARED_INDEX_DIR)
+    if not manifest or manifest["version"] <= shared_index_version:
+        return False
+
+    loaded = await asyncio.to_thread(open_shared_index, SHARED_INDEX_DIR, manifest)
+    configure_search(loaded)
+    async with faiss_lock:
+        with index_guard:
+            index = loaded
+            tombstones.clear()
+            shared_index_version = manifest["version"]
+            _bump_index_version()
+    print(f"✅ Serving shared FAISS index v{manifest['version']} ({loaded.ntotal} vectors, mmap).")
+    return True
+
+async def watch_shared_index(interval: float, session_factory=None):
     """
-    Hybrid Search: FAISS -> SQL Fallback
+    Reader: polls the manifest for new versions until cancelled. Each new
+    version also refreshes the lexical index, so tools created on other
+    workers become keyword-searchable here too.
     """
-    tools = []
-    found_ids = []
-    
-    # 1. Try Semantic Search (FAISS)
-    if index.ntotal > 0:
+    while True:
+        await asyncio.sleep(interval)
         try:
-            query_embedding = get_embedding(query)
-            query_np = np.array([query_embedding]).astype('float32')
-            
-            # Search FAISS
-            distances, indices = index.search(query_np, k)
-            
-            # Filter results by distance threshold
-            for i, idx in enumerate(indices[0]):
-                dist = distances[0][i]
-                if idx != -1 and idx in index_to_tool_id:
-                    if dist < SIMILARITY_THRESHOLD:
-                        tool_id = index_to_tool_id[idx]
-                        found_ids.append(tool_id)
-            
-            if found_ids:
-                from sqlalchemy.orm import selectinload
-                stmt = select(DBTool).options(
-                    selectinload(DBTool.owner).selectinload(DBUser.tools),
-                    selectinload(DBTool.ratings).selectinload(DBRating.user)
-                ).where(DBTool.id.in_(found_ids))
-                result = await session.execute(stmt)
-                fetched_tools = result.scalars().all()
-                
-                tools_map = {t.id: t for t in fetched_tools}
-                tools = [tools_map[tid] for tid in found_ids if tid in tools_map]
-                
+            if await refresh_shared_index() and session_factory is not None:
+                async with session_factory() as session:
+                    await rebuild_lexical_index(session)
         except Exception as e:
-            print(f"⚠️ FAISS Error: {e}")
-
-    # 2. Fallback SQL Search
-    if not tools:
-        print("ℹ️ Using SQL Fallback Search")
-        from sqlalchemy.orm import selectinload
-        stmt = select(DBTool).options(
-            selectinload(DBTool.owner).selectinload(DBUser.tools),
-            selectinload(DBTool.ratings).selectinload(DBRating.user)
-        ).where(
-            (DBTool.name.ilike(f"%{query}%")) | 
-            (DBTool.description.ilike(f"%{query}%"))
-        ).limit(k)
-        result = await session.execute(stmt)
-        tools = result.scalars().all()
+            print(f"⚠️ Shared FAISS index refresh failed: {e}")
+
+
+SIMILARITY_THRESHOLD = 1.0 
+
+# Wall-clock latency of recent search_tools calls (seconds)
+search_latencies = deque(maxlen=1024)
+
+def _percentile(sorted_values: list, q: float) -> float:
+    return sorted_values[int(q * (len(sorted_values) - 1))] if sorted_values else 0.0
+
+def get_search_stats() -> dict:
+    """p50/p99 latency over the most recent searches."""
+    values = sorted(search_latencies)
+    return {
+        "samples": len(values),
+        "p50_ms": round(1000 * _percentile(values, 0.50), 3),
+        "p99_ms": round(1000 * _percentile(values, 0.99), 3),
+        "index_version": index_version,
+        "embedding_cache": embedding_cache.stats(),
+        "result_cache": result_cache.stats(),
+    }
+
+def _cache_key(query: str) -> str:
+    # MiniLM is uncased, so case and surrounding whitespace don't change the vector
+    return query.strip().lower()
+
+async def search_tools(
+    session: AsyncSession,
+    query: str,
+    k: int = 5,
+    search_filter: SearchFilter | None = None,
+    include_reviews: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Hybrid Search: FAISS + BM25, fused per SEARCH_FUSION (reciprocal rank fusion by default).
+    An optional filter restricts both retrievers to matching tools before ranking.
+    Results carry rating summaries; the newest reviews only with include_reviews.
+    """
+    started = time.perf_counter()
+    if search_filter is not None and search_filter.is_empty():
+        search_filter = None
+    try:
+        version = index_version
+        key = (_cache_key(query), k, search_filter.cache_key() if search_filter else None, include_reviews, version)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached
+
+        results = await _search_tools(session, query, k, search_filter, include_reviews)
+        # Only cache if no index mutation raced with this search
+        if version == index_version:
+            result_cache.set(key, results)
+        return results
+    finally:
+        search_latencies.append(time.perf_counter() - started)
+
+async def _load_tools(session: AsyncSession, tool_ids: List[int], include_reviews: bool = False) -> List[DBTool]:
+    """Fetches tools by id with author/rating summaries, preserving the ranking order of tool_ids."""
+    result = await session.execute(select(DBTool).where(DBTool.id.in_(tool_ids)))
+    tools_map = {t.id: t for t in result.scalars().all()}
+    tools = [tools_map[tid] for tid in tool_ids if tid in tools_map]
+    await crud.attach_tool_summaries(session, tools, include_reviews=include_reviews)
+    return tools
+
+async def _dense_candidates(query: str, n: int, allowed_ids: np.ndarray | None = None) -> List[tuple]:
+    """
+    FAISS hits under SIMILARITY_THRESHOLD as (tool_id, cosine similarity), best first.
+    With `allowed_ids`, only those tools are searched.
+    """
+    if index.ntotal == 0:
+        return []
+    try:
+        query_embedding = embedding_cache.get(_cache_key(query))
+        if query_embedding is None:
+            query_embedding = await aget_embedding(query)
+            embedding_cache.set(_cache_key(query), query_embedding)
+        query_np = np.array([query_embedding]).astype('float32')
+
+        distances, indices = filtered_search(index, query_np, n, allowed_ids, _dead_positions())
+
+        # Labels are tool IDs; vectors are normalized, so cos = 1 - L2^2 / 2
+        return [
+            (int(tool_id), 1.0 - float(dist) / 2.0)
+            for tool_id, dist in zip(indices[0], distances[0])
+            if tool_id != -1 and dist < SIMILARITY_THRESHOLD
+        ]
+    except Exception as e:
+        print(f"⚠️ FAISS Error: {e}")
+        return []
+
+def fuse_rankings(dense: List[tuple], lexical: List[tuple], k: int) -> List[tuple]:
+    """
+    Merges dense and lexical hit lists into the top k (tool_id, score) pairs.
+
+    - rrf:      reciprocal rank fusion, sum of weight / (SEARCH_RRF_K + rank)
+    - weighted: weighted sum of cosine similarity and max-normalised BM25
+    """
+    scores: Dict[int, float] = {}
+    if settings.SEARCH_FUSION == "weighted":
+        top_lexical = lexical[0][1] if lexical else 1.0
+        for tool_id, similarity in dense:
+            scores[tool_id] = scores.get(tool_id, 0.0) + settings.SEARCH_DENSE_WEIGHT * similarity
+        for tool_id, bm25 in lexical:
+            scores[tool_id] = scores.get(tool_id, 0.0) + settings.SEARCH_LEXICAL_WEIGHT * bm25 / top_lexical
+    else:
+        for weight, hits in ((settings.SEARCH_DENSE_WEIGHT, dense), (settings.SEARCH_LEXICAL_WEIGHT, lexical)):
+            for rank, (tool_id, _) in enumerate(hits, start=1):
+                scores[tool_id] = scores.get(tool_id, 0.0) + weight / (settings.SEARCH_RRF_K + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+def _allow(allowed_ids: np.ndarray):
+    """Membership test over a sorted ID array, for the lexical index."""
+    def allow(doc_id: int) -> bool:
+        pos = np.searchsorted(allowed_ids, doc_id)
+        return pos < len(allowed_ids) and allowed_ids[pos] == doc_id
+    return allow
+
+async def _search_tools(
+    session: AsyncSession,
+    query: str,
+    k: int,
+    search_filter: SearchFilter | None = None,
+    include_reviews: bool = False,
+) -> List[Dict[str, Any]]:
+    n_candidates = k * settings.SEARCH_CANDIDATE_MULTIPLIER
+
+    # 0. Resolve filters to the set of eligible tool IDs (from the in-memory registry)
+    allowed_ids = None
+    if search_filter is not None:
+        allowed_ids = tool_registry.matching_ids(search_filter)
+        if len(allowed_ids) == 0:
+            return []
+
+    # 1. Dense and lexical retrieval run concurrently: BM25 scoring runs on a
+    #    worker thread while the query embedding is computed on the inference executor.
+    dense_hits, lexical_hits = await asyncio.gather(
+        _dense_candidates(query, n_candidates, allowed_ids),
+        asyncio.to_thread(
+            lexical_index.search, query, n_candidates, None if allowed_ids is None else _allow(allowed_ids)
+        ),
+    )
+
+    # 2. Fuse both rankings
+    ranked = fuse_rankings(dense_hits, lexical_hits, k)
+    if not ranked:
+        return []
+    scores = dict(ranked)
+    tools = await _load_tools(session, [tool_id for tool_id, _ in ranked], include_reviews)
 
     # Format for JSON response
     return [
@@ -173,7 +645,10 @@ async def search_tools(session: AsyncSession, query: str, k: int = 5) -> List[Di
             "owner_id": t.owner_id,
             "author": t.author,
             "author_tools_count": t.author_tools_count,
-            "reviews": t.reviews
+            "rating_count": t.rating_count,
+            "average_rating": t.average_rating,
+            "reviews": t.reviews,
+            "score": round(scores[t.id], 6)
         } 
         for t in tools
-    ]
\ No newline at end of file
+    ]
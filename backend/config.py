@@ -50,6 +50,9 @@ class Settings(BaseSettings):
     
     # Base Sepolia RPC URL (Get one from Alchemy or Infura, or use a public one)
     WEB3_RPC_URL: str = "https://sepolia.base.org"
+    WEB3_RPC_TIMEOUT_SECONDS: float = 10.0
+    WEB3_VERIFIED_CACHE_MAX_ENTRIES: int = 100000  # verified tx hashes kept in memory
+    PAYMENT_LEDGER_HOT_SET_SIZE: int = 100000  # used-up payment proofs rejected without a DB lookup
     
     # --- JWT Settings ---
     SECRET_KEY: str = "your-super-secret-key-that-is-long-and-random"
@@ -58,6 +61,100 @@ class Settings(BaseSettings):
 
     GROQ_API_KEY: str | None = None
 
+    # --- Semantic Search Indexing ---
+    EMBEDDING_BATCH_SIZE: int = 64    # texts per SentenceTransformer.encode call
+    REINDEX_PAGE_SIZE: int = 500      # tools fetched per DB page during re-index
+    EMBEDDING_WORKERS: int = 1        # threads running the embedding model
+    EMBEDDING_MAX_QUEUE: int = 256    # embedding jobs allowed to wait before rejecting
+    EMBEDDING_MICROBATCH_SIZE: int = 32       # max concurrent queries per encode (1 disables batching)
+    EMBEDDING_MICROBATCH_WAIT_MS: float = 5.0  # how long a batch waits to fill up
+
+    # --- Vector Index ---
+    FAISS_INDEX_TYPE: str = "flat"          # flat | hnsw | ivfpq
+    FAISS_HNSW_M: int = 32                  # graph neighbours per node
+    FAISS_HNSW_EF_CONSTRUCTION: int = 80
+    FAISS_HNSW_EF_SEARCH: int = 64          # higher = better recall, slower queries
+    FAISS_IVF_NLIST: int = 0                # inverted lists (0 = 4 * sqrt(N))
+    FAISS_IVF_NPROBE: int = 16              # lists scanned per query
+    FAISS_PQ_M: int = 48                    # PQ sub-quantizers (must divide 384)
+    FAISS_TRAIN_SAMPLE_SIZE: int = 100000   # vectors used to train IVF-PQ
+    FAISS_FILTER_EXACT_FRACTION: float = 0.05  # HNSW: scan exactly when a filter keeps fewer vectors than this
+    FAISS_SNAPSHOT_INTERVAL_SECONDS: float = 5.0  # min gap between index writes to disk
+    FAISS_COMPACT_DELAY_SECONDS: float = 1.0  # HNSW: deletes batched before the graph is rebuilt in the background
+
+    # --- Shared Index Across Workers ---
+    # standalone: each process builds and serves its own index (default)
+    # builder:    builds the index and publishes versions to FAISS_SHARED_DIR
+    # reader:     mmaps the latest published version and never re-embeds
+    FAISS_SERVING_MODE: str = "standalone"
+    FAISS_SHARED_DIR: str | None = None     # defaults to backend/ai_services/faiss_shared
+    FAISS_SHARED_KEEP_VERSIONS: int = 3
+    FAISS_BUILDER_INTERVAL_SECONDS: float = 30.0
+    FAISS_READER_POLL_SECONDS: float = 5.0
+
+    # --- Hybrid Retrieval ---
+    SEARCH_FUSION: str = "rrf"              # rrf | weighted
+    SEARCH_RRF_K: int = 60
+    SEARCH_DENSE_WEIGHT: float = 1.0
+    SEARCH_LEXICAL_WEIGHT: float = 1.0
+    SEARCH_CANDIDATE_MULTIPLIER: int = 4    # each retriever returns k * this before fusion
+
+    # --- Search Caches ---
+    SEARCH_CACHE_TTL_SECONDS: float = 300.0
+    SEARCH_CACHE_MAX_ENTRIES: int = 10000
+    SEARCH_EMBEDDING_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    SEARCH_RESULT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # --- Tool Catalog Snapshot (GET /api/tools) ---
+    CATALOG_CACHE_TTL_SECONDS: float = 60.0  # bounds staleness across workers
+    CATALOG_CACHE_MAX_ENTRIES: int = 256
+    CATALOG_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # --- MCP Proxy HTTP Client ---
+    PROXY_HTTP2: bool = False               # needs the 'h2' package (pip install httpx[http2])
+    PROXY_MAX_CONNECTIONS: int = 200
+    PROXY_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    PROXY_MAX_CONNECTIONS_PER_HOST: int = 20  # concurrent calls to one tool backend
+    PROXY_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    PROXY_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    PROXY_READ_TIMEOUT_SECONDS: float = 60.0
+    PROXY_WRITE_TIMEOUT_SECONDS: float = 10.0
+    PROXY_POOL_TIMEOUT_SECONDS: float = 5.0   # wait for a free pooled connection
+    PROXY_PEEK_MAX_BYTES: int = 64 * 1024     # request bytes read to find the JSON-RPC method
+    PROXY_BATCH_MAX_ITEMS: int = 20           # calls in one JSON-RPC batch
+    PROXY_BATCH_MAX_BYTES: int = 1024 * 1024  # batches are parsed whole to bill each call
+
+    # --- MCP Proxy Circuit Breaker (per tool) ---
+    CIRCUIT_FAILURE_THRESHOLD: int = 5        # consecutive failures that open the circuit
+    CIRCUIT_OPEN_SECONDS: float = 15.0        # fail fast this long before a half-open probe
+    CIRCUIT_MAX_OPEN_SECONDS: float = 300.0   # open period doubles per failed probe up to this
+    CIRCUIT_SLOW_CALL_SECONDS: float = 30.0   # slower responses count as failures
+
+    # --- MCP Proxy Rate Limiting ---
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CALLER_RATE: float = 5.0       # calls/second per API key (or client IP without one)
+    RATE_LIMIT_CALLER_BURST: float = 20.0
+    RATE_LIMIT_TOOL_RATE: float = 50.0        # calls/second per tool, across all callers
+    RATE_LIMIT_TOOL_BURST: float = 100.0
+    RATE_LIMIT_TOOL_MAX_IN_FLIGHT: int = 10   # concurrent calls per tool, per worker
+    RATE_LIMIT_MAX_TRACKED_KEYS: int = 100000
+    RATE_LIMIT_REDIS_URL: str | None = None   # shares buckets across workers (needs the 'redis' package)
+
+    # --- MCP Proxy Routing Table (tool_id -> url, cost, status, owner) ---
+    ROUTING_TABLE_TTL_SECONDS: float = 30.0   # safety net for changes made by other workers
+    ROUTING_TABLE_MAX_ENTRIES: int = 100000
+
+    # --- MCP Proxy Response Cache (initialize, tools/list, ...) ---
+    MCP_CACHE_TTL_SECONDS: float = 300.0      # bounds staleness across workers; deploys invalidate locally
+    MCP_CACHE_MAX_ENTRIES: int = 4096
+    MCP_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # --- MCP Proxy SSE Gateway (/proxy/{tool_id}/sse) ---
+    SSE_MAX_CONNECTIONS: int = 1000           # open SSE streams per worker (each holds 2 sockets)
+    SSE_MAX_CONNECTIONS_PER_TOOL: int = 100
+    SSE_HEARTBEAT_SECONDS: float = 15.0       # comment line sent while the tool is quiet
+    SSE_IDLE_TIMEOUT_SECONDS: float = 300.0   # streams without tool events this long are closed
+
     # --- Other Keys ---
     STRIPE_KEY: str | None = None
     COINBASE_KEY: str | None = None
@@ -2,7 +2,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from backend.models.db import DBUser, DBTool, DBTransaction, DBRating
 from backend.models.pydantic import ToolCreate, UserCreate, TransactionCreate
-from sqlalchemy import func
+from sqlalchemy import func, union_all, tuple_
 
 
 async def get_user(db: AsyncSession, user_id: int):
@@ -50,19 +50,124 @@ async def update_user_password(db: AsyncSession, user_id: int, new_password: str
 # CRUD for Tools
 # ==================================
 
-async def get_tools(db: AsyncSession, skip: int = 0, limit: int = 100):
-    """Fetch multiple tools with pagination including owner, tools count and ratings info."""
-    from sqlalchemy.orm import selectinload
-    result = await db.execute(
-        select(DBTool)
-        .options(
-            selectinload(DBTool.owner).selectinload(DBUser.tools),
-            selectinload(DBTool.ratings).selectinload(DBRating.user)
+async def get_tools(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    include_reviews: bool = False,
+    after: tuple | None = None,
+):
+    """
+    Fetch a page of tools in stable (created_at, id) order, plus author and rating summaries.
+    `after` is a (created_at, id) keyset position and replaces `skip` when given,
+    so deep pages cost an index seek instead of scanning the skipped rows.
+    """
+    stmt = select(DBTool).order_by(DBTool.created_at, DBTool.id).limit(limit)
+    if after is not None:
+        stmt = stmt.where(tuple_(DBTool.created_at, DBTool.id) > tuple_(*after))
+    elif skip:
+        stmt = stmt.offset(skip)
+    result = await db.execute(stmt)
+    tools = result.scalars().all()
+    await attach_tool_summaries(db, tools, include_reviews=include_reviews)
+    return tools
+
+async def attach_tool_summaries(db: AsyncSession, tools, include_reviews: bool = False, reviews_per_tool: int = 5):
+    """
+    Fills DBTool.summary for a page of tools: author name and tool count plus
+    rating count and average, all from one grouped query. Only one row per
+    tool reaches Python, however many tools an author has or ratings a tool
+    has. With include_reviews, the newest `reviews_per_tool` reviews of each
+    tool are attached too (one more query).
+    """
+    if not tools:
+        return tools
+    tool_ids = [t.id for t in tools]
+    owner_ids = {t.owner_id for t in tools}
+
+    author_counts = (
+        select(DBTool.owner_id, func.count(DBTool.id).label("tools_count"))
+        .where(DBTool.owner_id.in_(owner_ids))
+        .group_by(DBTool.owner_id)
+        .subquery()
+    )
+    rating_stats = (
+        select(
+            DBRating.tool_id,
+            func.count(DBRating.id).label("rating_count"),
+            func.avg(DBRating.rating).label("average_rating"),
+        )
+        .where(DBRating.tool_id.in_(tool_ids))
+        .group_by(DBRating.tool_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            DBTool.id,
+            DBUser.username,
+            author_counts.c.tools_count,
+            rating_stats.c.rating_count,
+            rating_stats.c.average_rating,
+        )
+        .outerjoin(DBUser, DBUser.id == DBTool.owner_id)
+        .outerjoin(author_counts, author_counts.c.owner_id == DBTool.owner_id)
+        .outerjoin(rating_stats, rating_stats.c.tool_id == DBTool.id)
+        .where(DBTool.id.in_(tool_ids))
+    )
+    summaries = {
+        row.id: {
+            "author": row.username or "Unknown",
+            "author_tools_count": row.tools_count or 0,
+            "rating_count": row.rating_count or 0,
+            "average_rating": round(float(row.average_rating), 2) if row.average_rating is not None else None,
+            "reviews": [],
+        }
+        for row in (await db.execute(stmt)).all()
+    }
+
+    if include_reviews:
+        # One small index range scan per tool (ix_ratings_tool_id_timestamp), unioned
+        newest = [
+            select(DBRating.id)
+            .where(DBRating.tool_id == tool_id)
+            .order_by(DBRating.timestamp.desc(), DBRating.id.desc())
+            .limit(reviews_per_tool)
+            .subquery()
+            for tool_id in tool_ids
+        ]
+        review_ids = union_all(*(select(sq.c.id) for sq in newest))
+        rows = await db.execute(
+            select(DBRating.tool_id, DBRating.rating, DBRating.comment, DBRating.timestamp, DBUser.username)
+            .outerjoin(DBUser, DBUser.id == DBRating.user_id)
+            .where(DBRating.id.in_(review_ids))
+            .order_by(DBRating.tool_id, DBRating.timestamp.desc(), DBRating.id.desc())
         )
+        for row in rows.all():
+            summaries[row.tool_id]["reviews"].append(_review(row))
+
+    for tool in tools:
+        tool.summary = summaries.get(tool.id)
+    return tools
+
+async def get_tool_reviews(db: AsyncSession, tool_id: int, skip: int = 0, limit: int = 20):
+    """One page of a tool's reviews, newest first."""
+    result = await db.execute(
+        select(DBRating.rating, DBRating.comment, DBRating.timestamp, DBUser.username)
+        .outerjoin(DBUser, DBUser.id == DBRating.user_id)
+        .where(DBRating.tool_id == tool_id)
+        .order_by(DBRating.timestamp.desc(), DBRating.id.desc())
         .offset(skip)
         .limit(limit)
     )
-    return result.scalars().all()
+    return [_review(row) for row in result.all()]
+
+def _review(row) -> dict:
+    return {
+        "user": row.username or "Anonymous",
+        "rating": row.rating,
+        "comment": row.comment,
+        "timestamp": row.timestamp,
+    }
 
 async def create_user_tool(db: AsyncSession, tool: ToolCreate, user_id: int):
     """Create a new tool associated with a user."""
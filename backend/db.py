@@ -72,6 +72,15 @@ async def init_db():
                         try:
                             await conn.execute(text("ALTER TABLE tools ADD COLUMN created_at TIMESTAMP;"))
                         except Exception: pass
+
+                    # Indexes for the grouped author/rating summaries (both dialects)
+                    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_ratings_tool_id_timestamp ON ratings (tool_id, timestamp);"))
+                    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tools_owner_id ON tools (owner_id);"))
+
+                    # Keyset pagination orders by (created_at, id); rows from before
+                    # created_at existed get a timestamp so they stay reachable
+                    await conn.execute(text("UPDATE tools SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;"))
+                    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tools_created_at_id ON tools (created_at, id);"))
                 except Exception as me:
                     print(f"Migration info: {me}")
             
@@ -1,7 +1,9 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
+import asyncio
 from backend.routers import tools, payments, search, monitoring, reputation, monetization, auth, seller_dashboard, chat, stripe_payments, web3_payments
-from backend.db import init_db
+from backend.db import init_db, async_session_factory
+from backend.config import settings
 from backend.ai_services.search_engine import load_faiss_index
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
@@ -38,21 +40,57 @@ async def lifespan(app: FastAPI):
         print(f"❌ CRITICAL: Database initialization error: {e}")
         print("The application will attempt to continue, but DB-dependent features will fail.")
     
+    # Shared, pooled HTTP clients for the MCP proxy
+    from backend.services.http_client import start_http_clients, close_http_clients
+    await start_http_clients()
+    from backend.services.rate_limit import start_rate_limiter, close_rate_limiter
+    await start_rate_limiter()
+
+    # tool_id -> (url, cost, status, owner) for the MCP proxy
+    try:
+        from backend.services.routing_table import load_routes
+        async with async_session_factory() as session:
+            await load_routes(session)
+    except Exception as e:
+        print(f"⚠️ Routing table not preloaded ({e}); routes will load on first use.")
+
     # Load FAISS index and Re-index to ensure sync
+    background_tasks = []
     try:
-        from backend.ai_services.search_engine import reindex_all_tools
+        from backend.ai_services import search_engine
         from backend.db import async_session_factory
         
-        # We re-index on every startup to ensure the vectors match the current DB state
-        # especially if columns like 'readme' were just added.
-        async with async_session_factory() as session:
-            await reindex_all_tools(session)
+        mode = settings.FAISS_SERVING_MODE
+        if mode == "reader":
+            # Serve the builder's mmap'd index; no embedding work in this worker
+            await search_engine.refresh_shared_index()
+            async with async_session_factory() as session:
+                await search_engine.rebuild_lexical_index(session)
+            background_tasks.append(asyncio.create_task(
+                search_engine.watch_shared_index(settings.FAISS_READER_POLL_SECONDS, async_session_factory)
+            ))
+        elif mode == "builder":
+            from backend.ai_services.index_builder import run_builder
+            background_tasks.append(asyncio.create_task(run_builder(async_session_factory)))
+        else:
+            # We re-index on every startup to ensure the vectors match the current DB state.
+            # Stored embeddings are reused, so only tools whose text changed are re-embedded.
+            async with async_session_factory() as session:
+                await search_engine.reindex_all_tools(session)
     except Exception as e:
         print(f"FAISS re-indexing error: {e}")
     
     yield
     
     print("Application shutdown...")
+    for task in background_tasks:
+        task.cancel()
+    from backend.ai_services.embeddings import inference_engine
+    from backend.ai_services.search_engine import flush_faiss_index
+    inference_engine.shutdown()
+    flush_faiss_index()
+    await close_http_clients()
+    await close_rate_limiter()
 
 from fastapi import Request
 from fastapi.responses import JSONResponse
@@ -95,6 +133,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.add_middleware(SessionMiddleware, secret_key=os.getenv("SECRET_KEY") or "oauth-session-secret-key")
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, LargeBinary, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column, declarative_base
 from sqlalchemy import JSON
 from typing import List,Optional
@@ -22,6 +22,10 @@ class DBUser(Base):
 
 class DBTool(Base):
     __tablename__ = "tools"
+    __table_args__ = (
+        # Keyset pagination of the catalog
+        Index('ix_tools_created_at_id', 'created_at', 'id'),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String, index=True)
     description: Mapped[str] = mapped_column(String)
@@ -31,7 +35,7 @@ class DBTool(Base):
     build_command: Mapped[str] = mapped_column(String, default="npm install && npm run build")
     start_command: Mapped[str] = mapped_column(String, default="npm start")
     root_dir: Mapped[str] = mapped_column(String, default="", nullable=True)
-    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id")) # Corrected to Integer
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True) # Corrected to Integer
     url: Mapped[str] = mapped_column(String)
     tool_definitions: Mapped[dict] = mapped_column(JSON, nullable=True)
     deploy_id: Mapped[str] = mapped_column(String, nullable=True)
@@ -41,16 +45,38 @@ class DBTool(Base):
     owner: Mapped["DBUser"] = relationship("DBUser", back_populates="tools")
     transactions: Mapped[list["DBTransaction"]] = relationship("DBTransaction", back_populates="tool")
     ratings: Mapped[list["DBRating"]] = relationship("DBRating", back_populates="tool")
+    # Set by crud.attach_tool_summaries: aggregated author/rating data, so
+    # responses don't need the owner.tools and ratings.user relationships loaded
+    summary = None
+
     @property
     def author_tools_count(self) -> int:
+        if self.summary is not None:
+            return self.summary["author_tools_count"]
         return len(self.owner.tools) if self.owner else 0
 
     @property
     def author(self) -> str:
+        if self.summary is not None:
+            return self.summary["author"]
         return self.owner.username if self.owner else "Unknown"
 
+    @property
+    def rating_count(self) -> int:
+        if self.summary is not None:
+            return self.summary["rating_count"]
+        return len(self.ratings)
+
+    @property
+    def average_rating(self) -> Optional[float]:
+        if self.summary is not None:
+            return self.summary["average_rating"]
+        return sum(r.rating for r in self.ratings) / len(self.ratings) if self.ratings else None
+
     @property
     def reviews(self) -> list:
+        if self.summary is not None:
+            return self.summary.get("reviews", [])
         return [
             {
                 "user": r.user.username if r.user else "Anonymous",
@@ -63,6 +89,26 @@ class DBTool(Base):
     status: Mapped[str] = mapped_column(String, default="deploying")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
 
+class DBToolEmbedding(Base):
+    """Cached search embedding for a tool, keyed by a hash of the embedded text."""
+    __tablename__ = "tool_embeddings"
+    tool_id: Mapped[int] = mapped_column(Integer, ForeignKey("tools.id"), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64))
+    embedding: Mapped[bytes] = mapped_column(LargeBinary)  # float32 vector bytes
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+
+class DBPaymentLedger(Base):
+    """One row per on-chain payment proof, debited once per paid tool call."""
+    __tablename__ = "payment_ledger"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tx_hash: Mapped[str] = mapped_column(String(66), unique=True, index=True)  # lowercase 0x-hex
+    # No foreign key: spent proofs must outlive a deleted tool
+    tool_id: Mapped[int] = mapped_column(Integer, index=True)
+    amount_wei: Mapped[str] = mapped_column(String)  # exact on-chain value (exceeds BIGINT range)
+    calls_allowed: Mapped[int] = mapped_column(Integer)
+    calls_used: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+
 class DBTransaction(Base):
     __tablename__ = "transactions"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
@@ -82,6 +128,8 @@ class DBRating(Base):
     __table_args__ = (
         CheckConstraint('rating >= 0 AND rating <= 5', name='rating_range'),
         UniqueConstraint('tool_id', 'user_id', name='unique_tool_user_rating'),
+        # Per-tool rating summaries and newest-first review pages
+        Index('ix_ratings_tool_id_timestamp', 'tool_id', 'timestamp'),
     )
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     rating: Mapped[int] = mapped_column(Integer)
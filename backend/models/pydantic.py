@@ -32,6 +32,8 @@ class Tool(ToolBase):
     tool_definitions: Optional[List[Any]] = None
     author: Optional[str] = None
     author_tools_count: int = 0
+    rating_count: int = 0
+    average_rating: Optional[float] = None
     status: str = "live"
     readme: Optional[str] = None
     reviews: List[Review] = []
@@ -2,6 +2,12 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.ai_services.monitoring import log_tool_usage as _log_tool_usage, get_tool_usage as _get_tool_usage
 from backend.db import get_async_session
+from backend.ai_services.embeddings import inference_engine, micro_batcher
+from backend.ai_services.search_engine import get_search_stats
+from backend.services.circuit_breaker import circuit_stats
+from backend.services.rate_limit import rate_limiter
+from backend.services import mcp_cache
+from backend.services.sse_gateway import sse_gateway
 
 router = APIRouter()
 
@@ -40,3 +46,59 @@ async def get_usage(
             for log in history
         ]
     }
+
+
+@router.get("/embeddings")
+async def get_embedding_stats() -> dict:
+    """
+    Embedding executor health: queue depth, rejections, queue-wait time
+    and micro-batching efficiency.
+    """
+    return {
+        "executor": inference_engine.stats(),
+        "micro_batching": micro_batcher.stats(),
+    }
+
+
+@router.get("/search")
+async def get_search_latency() -> dict:
+    """
+    p50/p99 latency of recent semantic searches and search cache hit/miss counters.
+    """
+    return get_search_stats()
+
+
+@router.get("/circuits")
+async def get_circuits() -> dict:
+    """
+    Per-tool circuit breaker state of the MCP proxy: open/half-open circuits,
+    consecutive failures, latency and when a tool will be retried.
+    """
+    return circuit_stats()
+
+
+@router.get("/rate-limits")
+async def get_rate_limits() -> dict:
+    """
+    Proxy admission control: admitted calls, 429s by scope (API key, tool,
+    tool concurrency) and calls currently in flight per tool.
+    """
+    return rate_limiter.stats()
+
+
+@router.get("/proxy-cache")
+async def get_proxy_cache() -> dict:
+    """
+    Cache of idempotent MCP answers (initialize, tools/list, ...): hit rate,
+    size and upstream fetches currently being shared.
+    """
+    return mcp_cache.stats()
+
+
+@router.get("/sse")
+async def get_sse_connections() -> dict:
+    """
+    Open proxy SSE streams, per tool and in total against the cap, and how
+    streams ended (client gone, idle timeout, tool closed the stream).
+    """
+    return sse_gateway.stats()
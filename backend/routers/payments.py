@@ -10,6 +10,8 @@ from backend.ai_services.reputation import calculate_reputation
 from backend.db import get_async_session
 from backend.models.db import DBTransaction, DBRating, DBUser
 from backend.security import get_current_user
+from backend.services.catalog import invalidate_catalog
+from backend.ai_services.search_engine import invalidate_search_results
 import random 
 import time
 from backend.ai_services.monitoring import get_tool_usage
@@ -82,6 +84,9 @@ async def rate_tool(
         session.add(db_rating)
         await session.commit()
         await session.refresh(db_rating)
+        # Rating summaries are part of the catalog and of search results
+        invalidate_catalog()
+        invalidate_search_results()
         log_event(f"User {user.id} rated tool {tool_id} with {rating_req.rating}")
         return {"status": "success", "tool_id": tool_id, "rating": rating_req.rating}
     except Exception as e:
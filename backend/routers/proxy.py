@@ -1,20 +1,30 @@
+import asyncio
+import json
+import time
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from backend.db import get_async_session
-from backend.models.db import DBTool, DBUser, DBSubscription
-from backend.services.crypto import verify_payment
+from backend.services.payment_ledger import debit_payment
 from backend.config import settings
+from backend.services import mcp_cache
+from backend.services.http_client import get_request_client, get_stream_client, acquire_host_slot, host_slot
+from backend.services.circuit_breaker import get_breaker, is_gateway_failure
+from backend.services.routing_table import ToolRoute, resolve_route
+from backend.services.rate_limit import rate_limiter, caller_identity
+from backend.services.jsonrpc_batch import (
+    INTERNAL_ERROR, INVALID_REQUEST, PAYMENT_ERROR, error_response, expects_response, is_valid_request, merge_responses,
+)
+from backend.services.jsonrpc_stream import InvalidMethod, forwardable_headers, peek_method, read_rest, replay
+from backend.services.sse_gateway import SSEStreamingResponse, sse_gateway
 from starlette.background import BackgroundTask
 
 router = APIRouter()
 
 async def get_target_tool_url(tool_id: int, session: AsyncSession) -> str:
-    """Helper: Get the real URL (Render) from the DB."""
-    result = await session.execute(select(DBTool).where(DBTool.id == tool_id))
-    tool = result.scalar_one_or_none()
+    """Helper: Get the real URL (Render) from the routing table."""
+    tool = await resolve_route(session, tool_id)
     if not tool or not tool.url:
         raise HTTPException(status_code=404, detail="Tool not found or inactive")
     return tool.url.rstrip("/")
@@ -32,16 +42,41 @@ async def proxy_sse_handshake(
     target_base = await get_target_tool_url(tool_id, session)
     target_url = f"{target_base}/sse"
 
-    client = httpx.AsyncClient()
+    # Fail fast while the tool is known to be down
+    breaker = get_breaker(tool_id)
+    probe = breaker.before_call()
+
+    # Each stream holds an upstream socket until it ends, so streams are capped per tool
+    try:
+        connection = sse_gateway.open(tool_id)
+    except HTTPException:
+        if probe:
+            breaker.cancel_probe()
+        raise
+
+    client = get_stream_client()
     # Forward the connection request to the real tool
-    req = client.build_request("GET", target_url, headers=request.headers, timeout=None)
-    r = await client.send(req, stream=True)
+    req = client.build_request("GET", target_url, headers=forwardable_headers(request.headers, drop=("host",)))
+    started = time.monotonic()
+    try:
+        r = await client.send(req, stream=True)
+    except BaseException as e:
+        sse_gateway.close(connection, "upstream")
+        if isinstance(e, httpx.HTTPError):
+            breaker.record_failure(e.__class__.__name__)
+            raise HTTPException(status_code=502, detail=f"Tool backend unreachable: {e.__class__.__name__}")
+        if probe:
+            breaker.cancel_probe()
+        raise
+    _record_outcome(breaker, r.status_code, time.monotonic() - started)
     
-    return StreamingResponse(
-        r.aiter_raw(),
+    # Heartbeats while the tool is quiet; the upstream socket is closed on idle
+    # timeout, when the tool ends the stream, or as soon as the client goes away
+    return SSEStreamingResponse(
+        sse_gateway.relay(connection, r),
+        cleanup=lambda: sse_gateway.finish(connection, r),
         status_code=r.status_code,
-        headers=dict(r.headers),
-        background=BackgroundTask(client.aclose)
+        headers=forwardable_headers(r.headers),
     )
 
 @router.post("/{tool_id}/messages")
@@ -54,20 +89,98 @@ async def proxy_messages(
     2. Message Interception (YOUR TASK)
     This is where we charge per request.
     """
-    # Get tool details
-    result = await session.execute(select(DBTool).where(DBTool.id == tool_id))
-    tool = result.scalar_one_or_none()
-    if not tool or not tool.url:
-        raise HTTPException(status_code=404, detail="Tool not found")
-
+    # Admission control (per caller and per tool) first: a rejected call costs no DB query
+    caller = await caller_identity(request, session)
+    release_admission = await rate_limiter.admit(caller, tool_id)
+    breaker = get_breaker(tool_id)
+    probe = False
+    slot = None
     try:
-        body = await request.json()
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid JSON")
+        # Get tool details (from the in-memory routing table; no query in the steady state)
+        tool = await resolve_route(session, tool_id)
+        if not tool or not tool.url:
+            raise HTTPException(status_code=404, detail="Tool not found")
+
+        body_stream = request.stream()
+        peeked, consumed = await _peek(body_stream)
+
+        # A batch is billed and validated per call, then forwarded in one request
+        if peeked.is_batch:
+            response = await _proxy_batch(request, session, tool, caller, breaker, consumed, body_stream)
+            release_admission()
+            return response
+
+        # initialize, tools/list, ...: answered from the per-tool cache, one upstream fetch at a time
+        if peeked.method in mcp_cache.CACHEABLE_METHODS:
+            cached = await _serve_cacheable(request, tool, breaker, peeked.method, consumed, body_stream, peeked)
+            if cached is not None:
+                release_admission()
+                return cached
+
+        # Fail fast (before any billing) while the tool is known to be down
+        probe = breaker.before_call()
+        target_url = f"{tool.url.rstrip('/')}/messages"
+        # The host slot is taken before billing (a saturated backend costs the caller nothing)
+        # and held until the response has been streamed back.
+        slot = await acquire_host_slot(target_url)
+        await _bill(request, session, tool, peeked.method)
+
+        # === FORWARDING ===
+        # If payment is valid (or tool is free), forward to the real tool.
+        # Pooled keep-alive client: no TCP/TLS setup per call once the pool is warm.
+        client = get_request_client()
+        started = time.monotonic()
+        proxy_req = client.build_request(
+            "POST", 
+            target_url, 
+            content=replay(consumed, body_stream, peeked),
+            headers=forwardable_headers(request.headers, drop=("host",)),
+        )
+        response = await client.send(proxy_req, stream=True)
+    except BaseException as e:
+        if slot is not None:
+            slot.release()
+        release_admission()
+        if isinstance(e, httpx.HTTPError):
+            breaker.record_failure(e.__class__.__name__)
+            raise HTTPException(status_code=502, detail=f"Tool backend unreachable: {e.__class__.__name__}")
+        if probe:
+            breaker.cancel_probe()
+        if isinstance(e, InvalidMethod):
+            raise HTTPException(status_code=400, detail=str(e))
+        raise
+    _record_outcome(breaker, response.status_code, time.monotonic() - started)
+
+    release = _once(response.aclose, slot.release, release_admission)
+    return StreamingResponse(
+        _relay(response, release),
+        status_code=response.status_code,
+        headers=forwardable_headers(response.headers),
+        background=BackgroundTask(release),
+    )
+
+
+async def _peek(body_stream):
+    """Reads just far enough into the body to learn the JSON-RPC method."""
+    # Anything past the peek window is streamed through without being buffered;
+    # replay() keeps scanning it so a second "method" aborts the forward.
+    peeked, consumed = await peek_method(body_stream, settings.PROXY_PEEK_MAX_BYTES)
+    if peeked.invalid:
+        raise HTTPException(status_code=400, detail=peeked.error or "Invalid JSON")
+    if not peeked.done:
+        if sum(map(len, consumed)) < settings.PROXY_PEEK_MAX_BYTES:
+            raise HTTPException(status_code=400, detail="Invalid JSON")
+        if peeked.method is None:
+            detail = f"JSON-RPC method must appear within the first {settings.PROXY_PEEK_MAX_BYTES} bytes"
+            raise HTTPException(status_code=400, detail=detail)
+    return peeked, consumed
+
 
+async def _bill(request: Request, session: AsyncSession, tool: ToolRoute, method: str | None):
+    """Charges tools/call on paid tools."""
     # === PAYMENT LOGIC ===
     # We only charge when they actually 'call' a tool, not when they just list them.
-    if body.get("method") == "tools/call" and tool.cost > 0:
+    if method == "tools/call" and tool.cost > 0:
         
         
 
@@ -90,27 +203,239 @@ async def proxy_messages(
                 }
             )
         
-        # 2. Verify the Payment
-        is_valid = verify_payment(tx_hash, tool.cost, settings.RECEIVER_WALLET_ADDRESS)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail="Invalid Crypto Transaction")
+        # 2. Verify the Payment (on chain the first time) and debit one call from it
+        await debit_payment(session, tx_hash, tool.id, tool.cost)
+
+
+async def _serve_cacheable(request: Request, tool: ToolRoute, breaker, method: str, consumed: list, body_stream, peeker=None):
+    """
+    Answers an idempotent method from the cache. On a miss the first caller
+    fetches upstream while identical concurrent requests wait for its result.
+    Returns None when the request has to be forwarded normally instead.
+    """
+    # The peeker sees every chunk read here: replay() only scans what is still in the stream
+    if not await read_rest(consumed, body_stream, settings.PROXY_PEEK_MAX_BYTES, peeker):
+        return None
+    body = b"".join(consumed)
+    try:
+        message = json.loads(body)
+    except ValueError:
+        return None
+    # The cache key, and whether the call was billed, come from the peeked method
+    if not isinstance(message, dict) or message.get("method") != method:
+        raise HTTPException(status_code=400, detail='JSON-RPC "method" does not match the request')
+    if "id" not in message:
+        return None  # a notification gets no answer
+
+    key = mcp_cache.cache_key(tool.id, method, message.get("params"))
+    result = mcp_cache.lookup(key)
+    if result is None:
+        flight = mcp_cache.pending(key)
+        if flight is None:
+            return await _fetch_and_cache(request, tool, breaker, key, body)
+        result = await asyncio.shield(flight)
+        if result is None:
+            return None
+    return Response(
+        content=mcp_cache.render(message["id"], result),
+        media_type="application/json",
+        headers={"X-MCP-Cache": "hit"},
+    )
+
+
+async def _fetch_and_cache(request: Request, tool: ToolRoute, breaker, key: tuple, body: bytes) -> Response:
+    """The single upstream fetch for a cache key; its result is shared with everyone waiting on it."""
+    flight = mcp_cache.begin(key)
+    result = None
+    try:
+        probe = breaker.before_call()
+        target_url = f"{tool.url.rstrip('/')}/messages"
+        client = get_request_client()
+        try:
+            async with host_slot(target_url):
+                started = time.monotonic()
+                response = await client.post(
+                    target_url,
+                    content=body,
+                    headers=forwardable_headers(request.headers, drop=("host",)),
+                )
+        except httpx.HTTPError as e:
+            breaker.record_failure(e.__class__.__name__)
+            raise HTTPException(status_code=502, detail=f"Tool backend unreachable: {e.__class__.__name__}")
+        except BaseException:
+            if probe:
+                breaker.cancel_probe()
+            raise
+        _record_outcome(breaker, response.status_code, time.monotonic() - started)
+        result = mcp_cache.cacheable_result(response)
+    finally:
+        mcp_cache.finish(key, flight, result)
+
+    # Body was decoded by httpx, so encoding and length headers no longer apply
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        headers={
+            **forwardable_headers(response.headers, drop=("content-encoding", "content-length")),
+            "X-MCP-Cache": "miss",
+        },
+    )
+
+
+async def _proxy_batch(request: Request, session: AsyncSession, tool: ToolRoute, caller: str, breaker, consumed: list, body_stream) -> Response:
+    """
+    JSON-RPC batch: every call is validated, rate-limited and (for tools/call
+    on a paid tool) billed on its own. The calls that pass are forwarded in
+    one upstream request, and the answer is merged with the per-call errors.
+    """
+    if not await read_rest(consumed, body_stream, settings.PROXY_BATCH_MAX_BYTES):
+        raise HTTPException(status_code=413, detail=f"JSON-RPC batch larger than {settings.PROXY_BATCH_MAX_BYTES} bytes")
+    try:
+        items = json.loads(b"".join(consumed))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not items:
+        return JSONResponse(error_response(None, INVALID_REQUEST, "Invalid Request: empty batch"))
+    if len(items) > settings.PROXY_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"JSON-RPC batch has more than {settings.PROXY_BATCH_MAX_ITEMS} calls")
+
+    # Each call counts against the rate limits; admission already took one token
+    await rate_limiter.charge(caller, tool.id, len(items) - 1)
+    # Fail fast before anything in the batch is billed
+    probe = breaker.before_call()
+
+    local: dict[int, dict] = {}
+    forward: list[int] = []
+    try:
+        for index, item in enumerate(items):
+            if not is_valid_request(item):
+                request_id = item.get("id") if isinstance(item, dict) else None
+                local[index] = error_response(request_id if isinstance(request_id, (str, int)) else None, INVALID_REQUEST, "Invalid Request")
+                continue
+            try:
+                await _bill(request, session, tool, item["method"])
+            except HTTPException as e:
+                if expects_response(item):
+                    message = "Payment required" if e.status_code == 402 else "Payment rejected"
+                    local[index] = error_response(item["id"], PAYMENT_ERROR, message, data=e.detail)
+                continue
+            forward.append(index)
+    except BaseException:
+        if probe:
+            breaker.cancel_probe()
+        raise
+
+    if not forward:
+        if probe:
+            breaker.cancel_probe()
+        return _batch_response(merge_responses(items, local, None))
 
-    # === FORWARDING ===
-    # If payment is valid (or tool is free), forward to the real tool
     target_url = f"{tool.url.rstrip('/')}/messages"
-    
-    async with httpx.AsyncClient() as client:
-        proxy_req = client.build_request(
-            "POST", 
-            target_url, 
-            json=body, 
-            headers=request.headers,
-            timeout=60.0
-        )
-        response = await client.send(proxy_req)
-        
-        return Response(
-            content=response.content,
-            status_code=response.status_code,
-            headers=dict(response.headers)
-        )
\ No newline at end of file
+    # The body is re-serialized, so its length changes
+    headers = forwardable_headers(request.headers, drop=("host", "content-length"))
+    payload = [items[index] for index in forward]
+    client = get_request_client()
+    upstream_answer, upstream_error = None, None
+    try:
+        async with host_slot(target_url):
+            started = time.monotonic()
+            upstream = await client.post(target_url, json=payload, headers=headers)
+    except httpx.HTTPError as e:
+        breaker.record_failure(e.__class__.__name__)
+        upstream_error = f"Tool backend unreachable: {e.__class__.__name__}"
+    except BaseException:
+        if probe:
+            breaker.cancel_probe()
+        raise
+    else:
+        _record_outcome(breaker, upstream.status_code, time.monotonic() - started)
+        if upstream.status_code in (202, 204) and not upstream.content:
+            # SSE transport: the answers travel over the client's event stream
+            return _batch_response([local[index] for index in sorted(local)], status_code=upstream.status_code)
+        try:
+            upstream_answer = upstream.json()
+        except ValueError:
+            upstream_error = f"Tool backend returned HTTP {upstream.status_code}"
+        if isinstance(upstream_answer, dict):
+            # One object for the whole array: the backend does not take batches
+            upstream_answer = await _send_individually(client, breaker, target_url, headers, payload)
+
+    return _batch_response(merge_responses(items, local, upstream_answer, upstream_error))
+
+
+async def _send_individually(client: httpx.AsyncClient, breaker, target_url: str, headers: dict, payload: list) -> list:
+    """
+    Fallback for backends without batch support: the same calls as concurrent
+    single requests. Each one counts for the breaker, and a call that gets no
+    usable answer is answered with the reason instead of a generic error.
+    """
+    async def send(item):
+        try:
+            async with host_slot(target_url):
+                started = time.monotonic()
+                response = await client.post(target_url, json=item, headers=headers)
+        except httpx.HTTPError as e:
+            breaker.record_failure(e.__class__.__name__)
+            return _unanswered(item, f"Tool backend unreachable: {e.__class__.__name__}")
+        except HTTPException as e:
+            return _unanswered(item, e.detail)
+        _record_outcome(breaker, response.status_code, time.monotonic() - started)
+        try:
+            answer = response.json()
+        except ValueError:
+            answer = None
+        if not isinstance(answer, dict):
+            return _unanswered(item, f"Tool backend returned HTTP {response.status_code}")
+        return answer
+
+    answers = await asyncio.gather(*(send(item) for item in payload))
+    return [answer for answer in answers if answer is not None]
+
+
+def _unanswered(item: dict, message: str) -> dict | None:
+    # Notifications get no response, not even an error
+    if not expects_response(item):
+        return None
+    return error_response(item["id"], INTERNAL_ERROR, message)
+
+
+def _batch_response(responses: list, status_code: int = 200) -> Response:
+    # A batch of notifications only gets no body at all
+    if not responses:
+        return Response(status_code=202 if status_code == 200 else status_code)
+    return JSONResponse(responses, status_code=status_code)
+
+
+def _record_outcome(breaker, status_code: int, latency: float):
+    # Time to response headers; a long streamed body is not the backend being slow
+    if is_gateway_failure(status_code):
+        breaker.record_failure(f"HTTP {status_code}", latency)
+    else:
+        breaker.record_success(latency)
+
+
+def _once(close, *releases):
+    """Idempotent cleanup: runs from the relay's finally or the response's background task, whichever comes first."""
+    done = False
+
+    async def cleanup():
+        nonlocal done
+        if done:
+            return
+        done = True
+        try:
+            await close()
+        finally:
+            for release in releases:
+                release()
+
+    return cleanup
+
+
+async def _relay(response: httpx.Response, cleanup):
+    # Raw bytes: Content-Encoding and Content-Length pass through unchanged
+    try:
+        async for chunk in response.aiter_raw():
+            yield chunk
+    finally:
+        await cleanup()
@@ -1,7 +1,9 @@
+from datetime import datetime, timezone
 from fastapi import APIRouter, Query, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.db import get_async_session
 from backend.ai_services.search_engine import search_tools
+from backend.services.tool_registry import SearchFilter
 
 router = APIRouter()
 
@@ -9,13 +11,24 @@ router = APIRouter()
 async def semantic_search(
     query: str = Query(..., description="Search query for AI tools"),
     k: int = Query(5, description="Number of results to return"),
+    max_cost: float | None = Query(None, description="Only tools costing at most this much (0 = free tools)"),
+    status: str | None = Query(None, description="Only tools with this deployment status, e.g. 'live'"),
+    owner_id: int | None = Query(None, description="Only tools from this author"),
+    created_after: datetime | None = Query(None, description="Only tools created after this time (ISO 8601)"),
+    include_reviews: bool = Query(False, description="Attach the newest reviews of each tool"),
     session: AsyncSession = Depends(get_async_session) 
 ) -> dict:
     """
-    Semantic search for tools using embeddings + vector DB (BigQuery or FAISS fallback).
+    Hybrid search for tools: FAISS embeddings + BM25 keywords, fused by rank.
+    Each result carries a relevance `score` (higher is better).
     """
     
-    results = await search_tools(session, query, k=k)
+    if created_after is not None and created_after.tzinfo is not None:
+        # DBTool.created_at is stored as naive UTC
+        created_after = created_after.astimezone(timezone.utc).replace(tzinfo=None)
+    search_filter = SearchFilter(max_cost=max_cost, status=status, owner_id=owner_id, created_after=created_after)
+
+    results = await search_tools(session, query, k=k, search_filter=search_filter, include_reviews=include_reviews)
     
     return {
         "query": query,
@@ -1,27 +1,38 @@
 import asyncio
 from typing import List
+from pydantic import TypeAdapter
 from backend import crud
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Header
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Header, Query, Response
 from ..models.db import DBTool, DBUser, DBSubscription, DBRating
-from ..models.pydantic import ToolCreate, Tool
+from ..models.pydantic import ToolCreate, Tool, Review
 from ..security import get_current_user
 from ..db import get_async_session
 import sqlalchemy
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from backend.ai_services.search_engine import add_tool_to_faiss
+from backend.ai_services.search_engine import (
+    add_tool_to_faiss, remove_tool_from_faiss, add_tool_to_lexical_index, register_tool_meta, update_tool_meta,
+)
+from backend.services.tool_registry import tool_meta
+from backend.services.pagination import encode_cursor, decode_cursor
+from backend.services import catalog, mcp_cache
+from backend.services.circuit_breaker import forget_breaker
+from backend.services.rate_limit import rate_limiter
+from backend.services.routing_table import upsert_route, update_route, forget_route
 from backend.ai_services.monitoring import log_tool_usage
 import random 
 import time
 from backend.middleware.subscription_check import check_subscription_access, get_user_subscriptions
 from backend.config import settings
-from backend.services.crypto import verify_payment
+from backend.services.payment_ledger import debit_payment
 
 from backend.services.deployment import deploy_tool, get_service_status, fetch_repo_readme
 from backend.services.discovery import discover_tools
 
 router = APIRouter()
 
+tool_list_adapter = TypeAdapter(List[Tool])
+
 
 
 async def monitor_deployment_and_discover(service_id: str, db_tool_id: int, db_session_factory):
@@ -49,8 +60,13 @@ async def monitor_deployment_and_discover(service_id: str, db_tool_id: int, db_s
             tool = result.scalar_one_or_none()
             
             if tool:
+                status_changed = tool.status != status
                 tool.status = status
                 await session.commit()
+                update_tool_meta(db_tool_id, status=status)
+                update_route(db_tool_id, status=status)
+                if status_changed:
+                    catalog.invalidate_catalog()
                 # Cache info for the discovery phase
                 tool_url = tool.url
                 tool_name = tool.name
@@ -58,6 +74,9 @@ async def monitor_deployment_and_discover(service_id: str, db_tool_id: int, db_s
                 branch = tool.branch
 
         if status == "live" and tool_url:
+            # A fresh deploy starts with a clean circuit and no cached initialize/tools/list answers
+            forget_breaker(db_tool_id)
+            mcp_cache.invalidate_tool(db_tool_id)
             print(f"🚀 Service is LIVE! Waiting 20s for server warmup at {tool_url}...")
             
             # CRITICAL FIX: Wait for the app inside the container to actually boot
@@ -82,10 +101,16 @@ async def monitor_deployment_and_discover(service_id: str, db_tool_id: int, db_s
                         summaries = [f"{t['name']} ({t.get('description', 'No desc')})" for t in discovered_tools]
                         tool.description = f"{tool.description} | Capabilities: {'; '.join(summaries)}"
                     await session.commit()
+                    catalog.invalidate_catalog()
+                    mcp_cache.invalidate_tool(db_tool_id)
                     final_description = tool.description
 
-            # 5. Update Vector DB (In-memory operation)
-            await add_tool_to_faiss(db_tool_id, tool_name, final_description, readme_text)
+            # 5. Update Vector DB (persists the embedding for the next startup)
+            async with db_session_factory() as session:
+                await add_tool_to_faiss(
+                    db_tool_id, tool_name, final_description, readme_text,
+                    session=session, tool_definitions=discovered_tools,
+                )
             break
         
         await asyncio.sleep(5)
@@ -93,12 +118,59 @@ async def monitor_deployment_and_discover(service_id: str, db_tool_id: int, db_s
 @router.get("/", response_model=List[Tool])
 async def read_tools(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    include_reviews: bool = False,
+    if_none_match: str | None = Header(None),
     session: AsyncSession = Depends(get_async_session)
 ):
-    """Get a list of all available tools from the database."""
-    tools = await crud.get_tools(session, skip=skip, limit=limit)
-    return tools
+    """
+    Get a list of all available tools from the database, ordered by creation time.
+    Pass the X-Next-Cursor header of a response as `cursor` to fetch the next page
+    (skip/limit still work, but deep offsets are slower and can shift under inserts).
+    Reviews are left out unless include_reviews is set (then the newest few per tool);
+    use /{tool_id}/reviews to page through all of them.
+
+    Pages are served from an in-process snapshot of pre-serialized JSON until
+    the catalog changes; a matching If-None-Match gets a bodiless 304.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    generation = catalog.catalog_generation
+    key = (skip, limit, cursor, include_reviews, generation)
+    page = catalog.catalog_cache.get(key)
+    if page is None:
+        tools = await crud.get_tools(session, skip=skip, limit=limit, include_reviews=include_reviews, after=after)
+        body = tool_list_adapter.dump_json(tool_list_adapter.validate_python(tools, from_attributes=True))
+        next_cursor = encode_cursor(tools[-1].created_at, tools[-1].id) if len(tools) == limit else None
+        page = catalog.CatalogPage(body=body, etag=catalog.make_etag(body), next_cursor=next_cursor)
+        # Don't cache a page that raced with a catalog change
+        if generation == catalog.catalog_generation:
+            catalog.catalog_cache.set(key, page)
+
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if catalog.etag_matches(if_none_match, page.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
+
+@router.get("/{tool_id}/reviews", response_model=List[Review])
+async def read_tool_reviews(
+    tool_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Paginated reviews for one tool, newest first."""
+    if await get_tool(tool_id, session) is None:
+        raise HTTPException(status_code=404, detail="Tool not found")
+    return await crud.get_tool_reviews(session, tool_id, skip=skip, limit=limit)
 
 async def get_tool(tool_id: int, session: AsyncSession):
     result = await session.execute(select(DBTool).where(DBTool.id == tool_id))
@@ -144,19 +216,13 @@ async def create_tool(
     session.add(db_tool)
     await session.commit()
     await session.refresh(db_tool)
+    add_tool_to_lexical_index(db_tool.id, db_tool.name, db_tool.description)
+    register_tool_meta(db_tool.id, tool_meta(db_tool))
+    upsert_route(db_tool)
+    catalog.invalidate_catalog()
 
-    # Re-fetch with all relationships loaded to satisfy Pydantic serialization
-    from sqlalchemy.orm import selectinload
-    stmt = (
-        select(DBTool)
-        .options(
-            selectinload(DBTool.owner).selectinload(DBUser.tools),
-            selectinload(DBTool.ratings).selectinload(DBRating.user)
-        )
-        .where(DBTool.id == db_tool.id)
-    )
-    result = await session.execute(stmt)
-    full_tool = result.scalar_one()
+    # Author/rating summary for the response, without loading relationships
+    await crud.attach_tool_summaries(session, [db_tool])
 
     from backend.db import async_session_factory
     background_tasks.add_task(
@@ -166,7 +232,7 @@ async def create_tool(
         async_session_factory
     )
     
-    return full_tool
+    return db_tool
 
 
 @router.delete("/{tool_id}")
@@ -188,17 +254,20 @@ async def delete_tool(
     
     # 2. Delete from DB (Cascade will handle ratings if configured, or we do it manually)
     # Since we didn't specify cascade="all, delete-orphan", let's handle ratings manually
-    from ..models.db import DBRating, DBSubscription
+    from ..models.db import DBRating, DBSubscription, DBToolEmbedding
     await session.execute(sqlalchemy.delete(DBRating).where(DBRating.tool_id == tool_id))
     await session.execute(sqlalchemy.delete(DBSubscription).where(DBSubscription.tool_id == tool_id))
+    await session.execute(sqlalchemy.delete(DBToolEmbedding).where(DBToolEmbedding.tool_id == tool_id))
     
     await session.delete(tool)
     await session.commit()
+    catalog.invalidate_catalog()
+    forget_breaker(tool_id)
+    forget_route(tool_id)
+    mcp_cache.invalidate_tool(tool_id)
     
-    # 3. Sync Search Index
-    from backend.ai_services.search_engine import reindex_all_tools
-    # Re-indexing is the safest way to ensure the tool is removed from the FAISS in-memory index
-    await reindex_all_tools(session)
+    # 3. Sync Search Index (drops only this tool's vector)
+    await remove_tool_from_faiss(tool_id)
     
     return {"message": "Tool deleted successfully"}
 
@@ -318,7 +387,17 @@ async def use_tool(
     tool = await get_tool(tool_id, session)
     if not tool:
         raise HTTPException(status_code=404, detail="Tool not found")
-    
+
+    # Same per-caller and per-tool budgets as the MCP proxy; checked before any billing
+    release_admission = await rate_limiter.admit(f"user:{user.id}", tool.id)
+    try:
+        return await _use_tool(tool, background_tasks, x_transaction_hash, user, session)
+    finally:
+        release_admission()
+
+
+async def _use_tool(tool, background_tasks: BackgroundTasks, x_transaction_hash: str, user: DBUser, session: AsyncSession):
+    tool_id = tool.id
     if tool.cost > 0:
         # A. If no payment proof provided
         if not x_transaction_hash:
@@ -332,15 +411,8 @@ async def use_tool(
                 }
             )
         
-        # B. Verify the provided hash
-        is_valid = verify_payment(
-            tx_hash=x_transaction_hash,
-            required_amount=tool.cost,
-            receiver_address=settings.RECEIVER_WALLET_ADDRESS
-        )
-        
-        if not is_valid:
-            raise HTTPException(status_code=400, detail="Invalid payment transaction")
+        # B. Verify the provided hash and debit one call from it (replays are rejected)
+        await debit_payment(session, x_transaction_hash, tool.id, tool.cost)
 
         
 
@@ -6,8 +6,7 @@ import uuid
 
 from backend.db import get_async_session
 from backend.models.db import DBTool, DBSubscription, DBUser
-from backend.services.crypto import verify_payment
-from backend.config import settings
+from backend.services.payment_ledger import debit_payment
 from backend.security import get_current_user
 
 router = APIRouter()
@@ -47,15 +46,8 @@ async def unlock_tool_with_web3(
             "api_key": current_user.api_key
         }
         
-    # 3. Verify the transaction
-    is_valid = verify_payment(
-        request.tx_hash, 
-        tool.cost, 
-        settings.RECEIVER_WALLET_ADDRESS
-    )
-    
-    if not is_valid:
-        raise HTTPException(status_code=400, detail="Invalid or insufficient Web3 transaction.")
+    # 3. Verify the transaction and claim all of it, so it can't unlock anything else
+    await debit_payment(session, request.tx_hash, tool.id, tool.cost, consume_all=True)
         
     # 4. Create the subscription (Unlock)
     new_sub = DBSubscription(
@@ -0,0 +1,44 @@
+import hashlib
+from dataclasses import dataclass
+from backend.config import settings
+from backend.services.cache import TTLCache
+
+
+@dataclass
+class CatalogPage:
+    """One pre-serialized page of GET /api/tools."""
+    body: bytes
+    etag: str
+    next_cursor: str | None = None
+
+
+# (skip, limit, cursor, include_reviews, generation) -> CatalogPage
+catalog_cache = TTLCache(
+    max_entries=settings.CATALOG_CACHE_MAX_ENTRIES,
+    max_bytes=settings.CATALOG_CACHE_MAX_BYTES,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+    sizeof=lambda page: len(page.body),
+)
+
+# Bumped whenever tools, ratings or owners change. The cache is per process,
+# so with several workers the TTL bounds how stale another worker's copy can get.
+catalog_generation = 0
+
+
+def invalidate_catalog():
+    global catalog_generation
+    catalog_generation += 1
+    catalog_cache.clear()
+
+
+def make_etag(body: bytes) -> str:
+    """Strong validator: identical bytes, identical ETag."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
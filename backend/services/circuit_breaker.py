@@ -0,0 +1,198 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from fastapi import HTTPException
+from sqlalchemy import update
+from backend.config import settings
+from backend.db import async_session_factory
+from backend.models.db import DBTool
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# DBTool.status while a live tool's circuit is open; restored to "live" once it recovers.
+# Deploy states (deploying, build_failed, ...) are never overwritten.
+UNREACHABLE_STATUS = "unreachable"
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    Reachability of one tool backend, learned from proxied calls.
+
+    CIRCUIT_FAILURE_THRESHOLD consecutive failures (connect errors, timeouts,
+    gateway 5xx or calls slower than CIRCUIT_SLOW_CALL_SECONDS) open the
+    circuit. While open, calls fail fast. After the open period one call is
+    let through as a half-open probe: success closes the circuit, failure
+    opens it again for twice as long (up to CIRCUIT_MAX_OPEN_SECONDS).
+    """
+    tool_id: int
+    state: str = CLOSED
+    consecutive_failures: int = 0
+    open_seconds: float = 0.0
+    open_until: float = 0.0
+    probe_in_flight: bool = False
+    latency_ewma: float | None = None
+    total_calls: int = 0
+    total_failures: int = 0
+    rejected: int = 0
+    last_error: str | None = None
+    changed_at: float = field(default_factory=time.time)
+
+    def retry_after(self) -> float:
+        return max(0.0, self.open_until - time.monotonic())
+
+    def before_call(self) -> bool:
+        """Admits a call or raises 503. Returns True if the call is the half-open probe."""
+        if self.state == CLOSED:
+            return False
+        if self.state == OPEN and time.monotonic() >= self.open_until:
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+
+        self.rejected += 1
+        retry_after = max(1, math.ceil(self.retry_after()))
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "Tool unavailable",
+                "tool_id": self.tool_id,
+                "circuit": self.state,
+                "retry_after": retry_after,
+                "message": "The tool backend is not responding. Try again later.",
+            },
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def cancel_probe(self):
+        """The admitted call never reached the backend (e.g. payment was refused)."""
+        self.probe_in_flight = False
+
+    def record_success(self, latency: float):
+        self.total_calls += 1
+        self._observe(latency)
+        if latency > settings.CIRCUIT_SLOW_CALL_SECONDS:
+            self._failed(f"slow response ({latency:.1f}s)")
+            return
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        if self.state != CLOSED:
+            self.open_seconds = 0.0
+            self._transition(CLOSED)
+
+    def record_failure(self, error: str, latency: float | None = None):
+        self.total_calls += 1
+        if latency is not None:
+            self._observe(latency)
+        self._failed(error)
+
+    def _failed(self, error: str):
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        self.probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= settings.CIRCUIT_FAILURE_THRESHOLD:
+            self._open()
+
+    def _open(self):
+        if self.state == HALF_OPEN:
+            self.open_seconds = min(self.open_seconds * 2, settings.CIRCUIT_MAX_OPEN_SECONDS)
+        else:
+            self.open_seconds = settings.CIRCUIT_OPEN_SECONDS
+        self.open_until = time.monotonic() + self.open_seconds
+        self._transition(OPEN)
+
+    def _observe(self, latency: float):
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += 0.2 * (latency - self.latency_ewma)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        self.changed_at = time.time()
+        print(f"⚡ Circuit for tool {self.tool_id}: {previous} -> {state}")
+        if state == OPEN and previous == CLOSED:
+            _schedule_status_sync(self.tool_id, reachable=False)
+        elif state == CLOSED:
+            _schedule_status_sync(self.tool_id, reachable=True)
+
+    def snapshot(self) -> dict:
+        return {
+            "tool_id": self.tool_id,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(self.retry_after(), 1) if self.state == OPEN else 0,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "total_calls": self.total_calls,
+            "total_failures": self.total_failures,
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+            "changed_at": self.changed_at,
+        }
+
+
+# tool_id -> CircuitBreaker, per process
+circuit_breakers: dict[int, CircuitBreaker] = {}
+_status_tasks: set[asyncio.Task] = set()
+
+
+def get_breaker(tool_id: int) -> CircuitBreaker:
+    breaker = circuit_breakers.get(tool_id)
+    if breaker is None:
+        breaker = circuit_breakers[tool_id] = CircuitBreaker(tool_id)
+    return breaker
+
+
+def forget_breaker(tool_id: int):
+    circuit_breakers.pop(tool_id, None)
+
+
+def circuit_stats() -> dict:
+    states = [b.state for b in circuit_breakers.values()]
+    return {
+        "open": states.count(OPEN),
+        "half_open": states.count(HALF_OPEN),
+        "closed": states.count(CLOSED),
+        "circuits": [b.snapshot() for b in circuit_breakers.values() if b.state != CLOSED or b.total_failures],
+    }
+
+
+def is_gateway_failure(status_code: int) -> bool:
+    """Statuses Render (or a crashed app) returns when the backend itself is unavailable."""
+    return status_code in (502, 503, 504)
+
+
+def _schedule_status_sync(tool_id: int, reachable: bool):
+    try:
+        task = asyncio.get_running_loop().create_task(_sync_tool_status(tool_id, reachable))
+    except RuntimeError:
+        return
+    _status_tasks.add(task)
+    task.add_done_callback(_status_tasks.discard)
+
+
+async def _sync_tool_status(tool_id: int, reachable: bool):
+    """Mirrors the circuit into DBTool.status, the search registry and the catalog."""
+    from backend.ai_services.search_engine import update_tool_meta
+    from backend.services import catalog
+    from backend.services.routing_table import update_route
+
+    old, new = (UNREACHABLE_STATUS, "live") if reachable else ("live", UNREACHABLE_STATUS)
+    try:
+        async with async_session_factory() as session:
+            result = await session.execute(
+                update(DBTool).where(DBTool.id == tool_id, DBTool.status == old).values(status=new)
+            )
+            await session.commit()
+    except Exception as e:
+        print(f"⚠️ Could not update status of tool {tool_id}: {e}")
+        return
+    if result.rowcount:
+        update_tool_meta(tool_id, status=new)
+        update_route(tool_id, status=new)
+        catalog.invalidate_catalog()
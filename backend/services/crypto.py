@@ -1,12 +1,35 @@
-from web3 import Web3
+import asyncio
+from dataclasses import dataclass
+import aiohttp
+from web3 import Web3, AsyncWeb3
 from fastapi import HTTPException
 from backend.config import settings 
+from backend.services.cache import TTLCache
 import logging
 
 
 w3 = Web3(Web3.HTTPProvider(settings.WEB3_RPC_URL))
+async_w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(
+    settings.WEB3_RPC_URL,
+    request_kwargs={"timeout": aiohttp.ClientTimeout(total=settings.WEB3_RPC_TIMEOUT_SECONDS)},
+))
+
+
+@dataclass
+class VerifiedTransaction:
+    """On-chain facts of a successful payment transaction."""
+    value_wei: int
+    receiver: str
+    block_number: int
+
+
+# tx hash -> VerifiedTransaction. Mined, successful transactions don't change,
+# so a repeated proof is checked against these facts without any RPC.
+verified_transactions = TTLCache(max_entries=settings.WEB3_VERIFIED_CACHE_MAX_ENTRIES)
+
 
 def verify_payment(tx_hash: str, required_amount: float, receiver_address: str):
+    """Blocking check for scripts. Request handlers go through payment_ledger.debit_payment."""
     try:
         
         tx = w3.eth.get_transaction(tx_hash)
@@ -33,4 +56,30 @@ def verify_payment(tx_hash: str, required_amount: float, receiver_address: str):
 
     except Exception as e:
         logging.error(f"Payment Verification Failed: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+async def fetch_verified_transaction(tx_hash: str) -> VerifiedTransaction:
+    """
+    Returns the cached facts for tx_hash, or fetches the transaction and its
+    receipt concurrently. Raises if the transaction is unknown or reverted.
+    """
+    key = tx_hash.lower()
+    cached = verified_transactions.get(key)
+    if cached is not None:
+        return cached
+
+    tx, receipt = await asyncio.gather(
+        async_w3.eth.get_transaction(tx_hash),
+        async_w3.eth.get_transaction_receipt(tx_hash),
+    )
+    if receipt['status'] != 1:
+        raise Exception("Transaction failed on-chain")
+
+    verified = VerifiedTransaction(
+        value_wei=int(tx['value']),
+        receiver=(tx['to'] or "").lower(),
+        block_number=receipt['blockNumber'],
+    )
+    verified_transactions.set(key, verified)
+    return verified
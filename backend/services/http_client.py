@@ -0,0 +1,114 @@
+import asyncio
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+import httpx
+from fastapi import HTTPException
+from backend.config import settings
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Application-lifetime clients, created in main.lifespan.
+# - request_client: pooled keep-alive connections for JSON-RPC calls to tools
+# - stream_client:  long-lived SSE streams, kept out of the request pool so
+#                   open streams can never starve tool calls of connections
+request_client: httpx.AsyncClient | None = None
+stream_client: httpx.AsyncClient | None = None
+
+# Caps concurrent requests per upstream host (httpx only limits the whole pool)
+_host_slots: dict[str, asyncio.Semaphore] = {}
+
+
+def _http2_enabled() -> bool:
+    if settings.PROXY_HTTP2 and not HTTP2_AVAILABLE:
+        print("⚠️ PROXY_HTTP2 is set but the 'h2' package is not installed. Using HTTP/1.1.")
+    return settings.PROXY_HTTP2 and HTTP2_AVAILABLE
+
+
+def _build_request_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_http2_enabled(),
+        limits=httpx.Limits(
+            max_connections=settings.PROXY_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.PROXY_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.PROXY_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.PROXY_CONNECT_TIMEOUT_SECONDS,
+            read=settings.PROXY_READ_TIMEOUT_SECONDS,
+            write=settings.PROXY_WRITE_TIMEOUT_SECONDS,
+            pool=settings.PROXY_POOL_TIMEOUT_SECONDS,
+        ),
+    )
+
+
+def _build_stream_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_http2_enabled(),
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=0),
+        # SSE streams stay open indefinitely; only connecting is bounded
+        timeout=httpx.Timeout(connect=settings.PROXY_CONNECT_TIMEOUT_SECONDS, read=None, write=None, pool=None),
+    )
+
+
+async def start_http_clients():
+    global request_client, stream_client
+    request_client = _build_request_client()
+    stream_client = _build_stream_client()
+    print(f"✅ Proxy HTTP clients ready (HTTP/2: {settings.PROXY_HTTP2 and HTTP2_AVAILABLE}).")
+
+
+async def close_http_clients():
+    global request_client, stream_client
+    for client in (request_client, stream_client):
+        if client is not None:
+            await client.aclose()
+    request_client = stream_client = None
+
+
+def get_request_client() -> httpx.AsyncClient:
+    """The pooled client; created on first use when running without the app lifespan (e.g. tests)."""
+    global request_client
+    if request_client is None:
+        request_client = _build_request_client()
+    return request_client
+
+
+def get_stream_client() -> httpx.AsyncClient:
+    global stream_client
+    if stream_client is None:
+        stream_client = _build_stream_client()
+    return stream_client
+
+
+async def acquire_host_slot(url: str) -> asyncio.Semaphore:
+    """
+    Takes one of PROXY_MAX_CONNECTIONS_PER_HOST slots for the URL's host. The caller releases it.
+    Waits at most PROXY_POOL_TIMEOUT_SECONDS, like a pooled connection, then gives up with 503.
+    """
+    host = urlsplit(url).netloc
+    slots = _host_slots.get(host)
+    if slots is None:
+        slots = _host_slots[host] = asyncio.Semaphore(settings.PROXY_MAX_CONNECTIONS_PER_HOST)
+    try:
+        await asyncio.wait_for(slots.acquire(), settings.PROXY_POOL_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Tool backend is at its connection limit, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    return slots
+
+
+@asynccontextmanager
+async def host_slot(url: str):
+    """Holds one of PROXY_MAX_CONNECTIONS_PER_HOST slots for the URL's host while a request runs."""
+    slots = await acquire_host_slot(url)
+    try:
+        yield
+    finally:
+        slots.release()
@@ -0,0 +1,59 @@
+import json
+
+# JSON-RPC 2.0 error codes
+INVALID_REQUEST = -32600
+INTERNAL_ERROR = -32603
+# Implementation-defined server errors (-32000 to -32099)
+PAYMENT_ERROR = -32001
+
+
+def error_response(request_id, code: int, message: str, data=None) -> dict:
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+def is_valid_request(item) -> bool:
+    """A request or notification object as JSON-RPC 2.0 defines it."""
+    return (
+        isinstance(item, dict)
+        and item.get("jsonrpc") == "2.0"
+        and isinstance(item.get("method"), str)
+        and ("id" not in item or isinstance(item["id"], (str, int, type(None))))
+    )
+
+
+def expects_response(item: dict) -> bool:
+    """Notifications (no id) are never answered."""
+    return "id" in item
+
+
+def id_key(request_id) -> str:
+    # 1 and "1" are different ids; JSON text keeps them apart
+    return json.dumps(request_id)
+
+
+def merge_responses(items: list, local: dict[int, dict], upstream, upstream_error: str | None = None) -> list[dict]:
+    """
+    The batch answer, in request order: the proxy's own per-item errors
+    (local, by index: validation, billing) and the backend's answers to the
+    items it was sent. A forwarded request the backend did not answer gets
+    an internal error, so every request with an id gets exactly one response.
+    """
+    answers = {}
+    if isinstance(upstream, list):
+        for response in upstream:
+            if isinstance(response, dict) and "id" in response:
+                answers[id_key(response["id"])] = response
+
+    merged = []
+    for index, item in enumerate(items):
+        if index in local:
+            merged.append(local[index])
+        elif expects_response(item):
+            response = answers.get(id_key(item["id"]))
+            if response is None:
+                response = error_response(item["id"], INTERNAL_ERROR, upstream_error or "No response from tool for this request")
+            merged.append(response)
+    return merged
@@ -0,0 +1,182 @@
+import json
+from typing import AsyncIterator
+
+# Headers that describe one hop of the connection, not the message (RFC 9110 §7.6.1).
+# Host and Content-Length are recomputed by httpx for the upstream request.
+HOP_BY_HOP_HEADERS = frozenset({
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "proxy-connection", "te", "trailer", "transfer-encoding", "upgrade",
+})
+
+
+def forwardable_headers(headers, drop: tuple = ()) -> dict:
+    """Copies end-to-end headers, leaving out hop-by-hop ones and anything in drop."""
+    listed = {h.strip().lower() for h in headers.get("connection", "").split(",")}
+    skip = HOP_BY_HOP_HEADERS | listed | set(drop)
+    return {k: v for k, v in headers.items() if k.lower() not in skip}
+
+
+class InvalidMethod(ValueError):
+    """The body's top-level "method" is repeated or not a string."""
+
+
+class MethodPeeker:
+    """
+    Incremental scanner that finds the top-level "method" of a JSON-RPC
+    request without parsing the rest of the body.
+
+    Feed it chunks until `done`, i.e. until the top-level object closes. It
+    then holds `method` (None when the object has no method), `is_batch` for
+    a top-level array, or `invalid` when the body is not a JSON object or
+    array, or its "method" is repeated or not a string (`error` says which).
+    Keys are matched at depth 1 only, so a "method" inside params never
+    counts. All depth-1 keys are checked, not just the first "method": JSON
+    parsers upstream keep the last duplicate, which must be the one billed.
+    """
+
+    def __init__(self):
+        self.done = False
+        self.method: str | None = None
+        self.is_batch = False
+        self.invalid = False
+        self.error: str | None = None
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._capture: bytearray | None = None  # depth-1 string being read
+        self._at_key = False
+        self._last_key: str | None = None
+        self._method_seen = False
+
+    def feed(self, chunk: bytes):
+        for byte in chunk:
+            if self.done:
+                return
+            self._step(byte)
+
+    def _step(self, byte: int):
+        if self._in_string:
+            if self._capture is not None:
+                self._capture.append(byte)
+            if self._escape:
+                self._escape = False
+            elif byte == 0x5C:  # backslash
+                self._escape = True
+            elif byte == 0x22:  # closing quote
+                self._in_string = False
+                if self._capture is not None:
+                    self._end_string(bytes(self._capture[:-1]))
+                    self._capture = None
+            return
+
+        if byte in b" \t\r\n":
+            return
+        if not self._started:
+            self._started = True
+            if byte == 0x5B:  # [
+                self.is_batch = True
+            elif byte != 0x7B:  # {
+                self.invalid = True
+            self.done = byte != 0x7B
+            self._depth = 1
+            self._at_key = True
+            return
+
+        if byte == 0x22:
+            self._in_string = True
+            if self._depth == 1:
+                self._capture = bytearray()
+        elif byte in b"{[":
+            if self._depth == 1 and self._last_key == "method" and not self._at_key:
+                self._reject('"method" must be a string')
+            self._depth += 1
+        elif byte in b"}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self.done = True
+        elif self._depth == 1:
+            if byte == 0x3A:  # :
+                self._at_key = False
+            elif byte == 0x2C:  # ,
+                self._at_key = True
+                self._last_key = None
+            elif self._last_key == "method":
+                self._reject('"method" must be a string')  # number, bool or null
+
+    def _end_string(self, raw: bytes):
+        try:
+            text = json.loads(b'"' + raw + b'"')
+        except ValueError:
+            self.invalid = self.done = True
+            return
+        if self._at_key:
+            self._last_key = text
+            if text == "method":
+                if self._method_seen:
+                    self._reject('duplicate "method" key')
+                self._method_seen = True
+        elif self._last_key == "method":
+            self.method = text
+            self._last_key = None
+
+    def _reject(self, error: str):
+        self.error = error
+        self.invalid = self.done = True
+
+
+async def peek_method(stream: AsyncIterator[bytes], max_bytes: int) -> tuple[MethodPeeker, list[bytes]]:
+    """
+    Reads chunks from stream until the top-level object has been scanned or
+    max_bytes have been read. Returns the peeker and the chunks consumed,
+    which the caller must send on before the rest of the stream.
+    """
+    peeker = MethodPeeker()
+    consumed: list[bytes] = []
+    size = 0
+    async for chunk in stream:
+        if not chunk:
+            continue
+        consumed.append(chunk)
+        size += len(chunk)
+        peeker.feed(chunk)
+        if peeker.done or size >= max_bytes:
+            break
+    return peeker, consumed
+
+
+async def replay(consumed: list[bytes], stream: AsyncIterator[bytes], peeker: MethodPeeker | None = None) -> AsyncIterator[bytes]:
+    """
+    The peeked chunks followed by the unread remainder of the stream. When
+    the peek stopped at its size limit, the remainder is still fed to the
+    peeker, and InvalidMethod is raised before a chunk with a second
+    "method" is sent: the upstream request is aborted with a partial body.
+    """
+    for chunk in consumed:
+        yield chunk
+    async for chunk in stream:
+        if peeker is not None and not peeker.done:
+            peeker.feed(chunk)
+            if peeker.invalid:
+                raise InvalidMethod(peeker.error or "Invalid JSON")
+        yield chunk
+
+
+async def read_rest(consumed: list[bytes], stream: AsyncIterator[bytes], max_bytes: int, peeker: MethodPeeker | None = None) -> bool:
+    """
+    Appends the rest of stream to consumed. Returns True once the stream is
+    exhausted, or False as soon as more than max_bytes have been read (the
+    remainder is left in the stream). As in replay(), the chunks read are
+    fed to an unfinished peeker, and a second "method" raises InvalidMethod.
+    """
+    size = sum(map(len, consumed))
+    async for chunk in stream:
+        if peeker is not None and not peeker.done:
+            peeker.feed(chunk)
+            if peeker.invalid:
+                raise InvalidMethod(peeker.error or "Invalid JSON")
+        consumed.append(chunk)
+        size += len(chunk)
+        if size > max_bytes:
+            return False
+    return True
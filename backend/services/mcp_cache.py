@@ -0,0 +1,91 @@
+import asyncio
+import json
+import httpx
+from backend.config import settings
+from backend.services.cache import TTLCache
+
+# JSON-RPC methods whose answer only changes when the tool is redeployed
+CACHEABLE_METHODS = frozenset({
+    "initialize",
+    "tools/list",
+    "prompts/list",
+    "resources/list",
+    "resources/templates/list",
+})
+
+# (tool_id, generation, method, params key) -> serialized JSON-RPC "result"
+responses = TTLCache(
+    max_entries=settings.MCP_CACHE_MAX_ENTRIES,
+    max_bytes=settings.MCP_CACHE_MAX_BYTES,
+    ttl=settings.MCP_CACHE_TTL_SECONDS,
+    sizeof=len,
+)
+
+# Bumped per tool on deploy, rediscovery or deletion; old keys are never read again
+_generations: dict[int, int] = {}
+
+# Single-flight: key -> future of the leader's result (None if it was not cacheable)
+_in_flight: dict[tuple, asyncio.Future] = {}
+
+
+def invalidate_tool(tool_id: int):
+    _generations[tool_id] = _generations.get(tool_id, 0) + 1
+
+
+def cache_key(tool_id: int, method: str, params) -> tuple:
+    if method == "initialize":
+        # The answer depends on the negotiated protocol version, not on who the client is
+        params = (params or {}).get("protocolVersion") if isinstance(params, dict) else None
+    return (tool_id, _generations.get(tool_id, 0), method, json.dumps(params, sort_keys=True))
+
+
+def lookup(key: tuple) -> bytes | None:
+    return responses.get(key)
+
+
+def pending(key: tuple) -> asyncio.Future | None:
+    return _in_flight.get(key)
+
+
+def begin(key: tuple) -> asyncio.Future:
+    """Registers the caller as the one upstream fetch for key."""
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    return future
+
+
+def finish(key: tuple, future: asyncio.Future, result: bytes | None):
+    if result is not None:
+        responses.set(key, result)
+    if _in_flight.get(key) is future:
+        del _in_flight[key]
+    if not future.done():
+        future.set_result(result)
+
+
+def cacheable_result(response: httpx.Response) -> bytes | None:
+    """
+    The serialized "result" of a successful JSON answer, or None when the
+    response must not be shared: errors, 202s of SSE-transport servers (the
+    answer travels over the event stream), and responses that open a session.
+    """
+    if response.status_code != 200 or "mcp-session-id" in response.headers:
+        return None
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        return None
+    try:
+        message = response.json()
+    except ValueError:
+        return None
+    if not isinstance(message, dict) or "result" not in message or "error" in message:
+        return None
+    return json.dumps(message["result"], separators=(",", ":")).encode()
+
+
+def render(request_id, result: bytes) -> bytes:
+    """A JSON-RPC response for request_id around a cached result."""
+    return b'{"jsonrpc":"2.0","id":' + json.dumps(request_id).encode() + b',"result":' + result + b'}'
+
+
+def stats() -> dict:
+    return {**responses.stats(), "in_flight": len(_in_flight)}
@@ -0,0 +1,20 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, tool_id: int) -> str:
+    """Opaque keyset cursor pointing just after (created_at, id)."""
+    raw = json.dumps({"c": created_at.isoformat(), "i": tool_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed token."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["c"]), int(data["i"])
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,118 @@
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from web3 import Web3
+from backend.config import settings
+from backend.models.db import DBPaymentLedger
+from backend.services.cache import TTLCache
+from backend.services.crypto import fetch_verified_transaction
+import logging
+
+# Hot set of (tx_hash, tool_id) proofs known to be used up. Replays are
+# rejected here without touching the database or the RPC node. Only a proof
+# with no calls left is added: tx hashes are public, so a rejection that
+# anyone can trigger (wrong tool, partly used proof sent to unlock) must not
+# lock the payer out of the calls they still have.
+exhausted_payments = TTLCache(max_entries=settings.PAYMENT_LEDGER_HOT_SET_SIZE)
+
+
+def cost_in_wei(cost: float) -> int:
+    return int(Web3.to_wei(Decimal(str(cost)), 'ether'))
+
+
+def _payment_used(tx_hash: str, tool_id: int, entry: DBPaymentLedger | None = None) -> HTTPException:
+    if entry is not None and entry.tool_id != tool_id:
+        message = "This transaction paid for another tool. Send a new payment."
+    else:
+        message = "This transaction has no calls left for this tool. Send a new payment."
+        if entry is None or entry.calls_used >= entry.calls_allowed:
+            exhausted_payments.set((tx_hash, tool_id), True)
+    return HTTPException(
+        status_code=402,
+        detail={"error": "Payment already used", "message": message},
+    )
+
+
+async def _try_debit(session: AsyncSession, tx_hash: str, tool_id: int, calls: int) -> bool:
+    """Atomic check-and-debit: succeeds only if enough calls are left."""
+    result = await session.execute(
+        update(DBPaymentLedger)
+        .where(
+            DBPaymentLedger.tx_hash == tx_hash,
+            DBPaymentLedger.tool_id == tool_id,
+            DBPaymentLedger.calls_used + calls <= DBPaymentLedger.calls_allowed,
+        )
+        .values(calls_used=DBPaymentLedger.calls_used + calls)
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+async def _get_entry(session: AsyncSession, tx_hash: str) -> DBPaymentLedger | None:
+    result = await session.execute(select(DBPaymentLedger).where(DBPaymentLedger.tx_hash == tx_hash))
+    return result.scalar_one_or_none()
+
+
+async def debit_payment(
+    session: AsyncSession,
+    tx_hash: str,
+    tool_id: int,
+    cost: float,
+    consume_all: bool = False,
+):
+    """
+    Charges one call (or, with consume_all, the whole payment) to an on-chain proof.
+
+    A proof is verified on chain once, when it is first seen, and recorded
+    with the number of calls its value covers at the tool's current cost.
+    Later calls are a single conditional UPDATE. A proof that is used up, or
+    that paid for another tool, is rejected with 402.
+    """
+    tx_hash = tx_hash.lower()
+    if exhausted_payments.get((tx_hash, tool_id)):
+        raise _payment_used(tx_hash, tool_id)
+
+    # Steady state: one round trip, no RPC
+    if not consume_all and await _try_debit(session, tx_hash, tool_id, 1):
+        return
+
+    entry = await _get_entry(session, tx_hash)
+    if entry is None:
+        # First use: verify on chain and record what the payment covers
+        try:
+            tx = await fetch_verified_transaction(tx_hash)
+        except Exception as e:
+            logging.error(f"Payment Verification Failed: {e}")
+            raise HTTPException(status_code=400, detail="Invalid Crypto Transaction")
+        if tx.receiver != settings.RECEIVER_WALLET_ADDRESS.lower():
+            raise HTTPException(status_code=400, detail="Payment sent to wrong address")
+
+        calls_allowed = tx.value_wei // cost_in_wei(cost)
+        if calls_allowed < 1:
+            raise HTTPException(status_code=400, detail=f"Insufficient amount. Required {cost} ETH")
+
+        session.add(DBPaymentLedger(
+            tx_hash=tx_hash,
+            tool_id=tool_id,
+            amount_wei=str(tx.value_wei),
+            calls_allowed=calls_allowed,
+            calls_used=calls_allowed if consume_all else 1,
+        ))
+        try:
+            await session.commit()
+            return
+        except IntegrityError:
+            # Another request recorded the same proof first; debit against its row
+            await session.rollback()
+            entry = await _get_entry(session, tx_hash)
+
+    calls = 1
+    if consume_all:
+        # Whole-payment claims (unlocks) need an untouched proof
+        calls = entry.calls_allowed if entry.calls_used == 0 else 0
+    if calls and await _try_debit(session, tx_hash, tool_id, calls):
+        return
+    await session.refresh(entry)
+    raise _payment_used(tx_hash, tool_id, entry)
@@ -0,0 +1,253 @@
+import math
+import time
+from dataclasses import dataclass
+from fastapi import HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.config import settings
+from backend.models.db import DBUser
+from backend.services.cache import TTLCache
+
+try:
+    import redis.asyncio as aioredis  # optional: shared buckets across workers (pip install redis)
+except ImportError:
+    aioredis = None
+
+
+@dataclass
+class TokenBucket:
+    """`burst` tokens, refilled at `rate` tokens per second."""
+    rate: float
+    burst: float
+    tokens: float
+    updated_at: float
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def take(self, now: float, tokens: float = 1) -> float:
+        """Takes tokens. Returns 0 on success, else seconds until enough are available."""
+        self.refill(now)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+
+# Atomic two-level take for the shared backend: the tool bucket is only
+# charged when the caller's own bucket admits the call, so a throttled
+# caller cannot drain the tool's budget for everyone else.
+# KEYS: caller bucket, tool bucket. ARGV: caller rate, caller burst, tool rate, tool burst, tokens.
+# Returns {level (0 = admitted, 1 = caller, 2 = tool), retry_after as a string}.
+_TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1e6
+local function refill(key, rate, burst)
+    local data = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(data[1]) or burst
+    local ts = tonumber(data[2]) or now
+    return math.min(burst, tokens + math.max(0, now - ts) * rate)
+end
+local function store(key, tokens, rate, burst)
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+local levels = {{KEYS[1], tonumber(ARGV[1]), tonumber(ARGV[2])}, {KEYS[2], tonumber(ARGV[3]), tonumber(ARGV[4])}}
+local cost = tonumber(ARGV[5])
+local tokens = {}
+for i, level in ipairs(levels) do
+    tokens[i] = refill(level[1], level[2], level[3])
+    if tokens[i] < cost then
+        store(level[1], tokens[i], level[2], level[3])
+        return {i, tostring((cost - tokens[i]) / level[2])}
+    end
+end
+for i, level in ipairs(levels) do
+    store(level[1], tokens[i] - cost, level[2], level[3])
+end
+return {0, '0'}
+"""
+
+SCOPES = {1: "api_key", 2: "tool"}
+
+
+class RateLimiter:
+    """
+    Admission control for proxied tool calls.
+
+    Each call takes a token from the caller's bucket (per API key, or per
+    client IP for anonymous callers) and then from the tool's bucket, and
+    holds one of RATE_LIMIT_TOOL_MAX_IN_FLIGHT slots while it runs.
+    Buckets live in this process unless RATE_LIMIT_REDIS_URL is set, in
+    which case all workers share them. In-flight slots are per process.
+    """
+
+    def __init__(self):
+        self.buckets = TTLCache(max_entries=settings.RATE_LIMIT_MAX_TRACKED_KEYS)
+        self.in_flight: dict[int, int] = {}
+        self.redis = None
+        self._script = None
+        self.admitted = 0
+        self.rejected = {"api_key": 0, "tool": 0, "tool_concurrency": 0}
+
+    def _bucket(self, key: str, rate: float, burst: float, now: float) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None or (bucket.rate, bucket.burst) != (rate, burst):
+            bucket = TokenBucket(rate=rate, burst=burst, tokens=burst, updated_at=now)
+            self.buckets.set(key, bucket)
+        return bucket
+
+    def _take_local(self, caller: str, tool_id: int, tokens: float) -> tuple[int, float]:
+        now = time.monotonic()
+        levels = (
+            self._bucket(f"caller:{caller}", settings.RATE_LIMIT_CALLER_RATE, settings.RATE_LIMIT_CALLER_BURST, now),
+            self._bucket(f"tool:{tool_id}", settings.RATE_LIMIT_TOOL_RATE, settings.RATE_LIMIT_TOOL_BURST, now),
+        )
+        # Check both levels before taking from either
+        for level, bucket in enumerate(levels, start=1):
+            bucket.refill(now)
+            if bucket.tokens < tokens:
+                return level, (tokens - bucket.tokens) / bucket.rate
+        for bucket in levels:
+            bucket.take(now, tokens)
+        return 0, 0.0
+
+    async def _take_shared(self, caller: str, tool_id: int, tokens: float) -> tuple[int, float]:
+        if self._script is None:
+            self._script = self.redis.register_script(_TAKE_SCRIPT)
+        level, retry_after = await self._script(
+            keys=[f"ratelimit:caller:{caller}", f"ratelimit:tool:{tool_id}"],
+            args=[
+                settings.RATE_LIMIT_CALLER_RATE, settings.RATE_LIMIT_CALLER_BURST,
+                settings.RATE_LIMIT_TOOL_RATE, settings.RATE_LIMIT_TOOL_BURST,
+                tokens,
+            ],
+        )
+        return int(level), float(retry_after)
+
+    async def charge(self, caller: str, tool_id: int, tokens: float = 1):
+        """
+        Takes tokens from the caller's and the tool's buckets or raises 429.
+        Requests for more than a bucket's burst are capped at the burst, so
+        they are slowed down rather than refused forever.
+        """
+        if not settings.RATE_LIMIT_ENABLED or tokens <= 0:
+            return
+        tokens = min(tokens, settings.RATE_LIMIT_CALLER_BURST, settings.RATE_LIMIT_TOOL_BURST)
+
+        level, retry_after = 0, 0.0
+        if self.redis is not None:
+            try:
+                level, retry_after = await self._take_shared(caller, tool_id, tokens)
+            except Exception as e:
+                # Never turn a Redis outage into an API outage: fall back to local buckets
+                print(f"⚠️ Shared rate limiter unavailable ({e}); using local buckets.")
+                level, retry_after = self._take_local(caller, tool_id, tokens)
+        else:
+            level, retry_after = self._take_local(caller, tool_id, tokens)
+        if level:
+            raise self._too_many(SCOPES[level], retry_after)
+
+    async def admit(self, caller: str, tool_id: int):
+        """Admits one call or raises 429. Returns a release callback for the in-flight slot."""
+        if not settings.RATE_LIMIT_ENABLED:
+            return _noop
+
+        await self.charge(caller, tool_id)
+
+        if self.in_flight.get(tool_id, 0) >= settings.RATE_LIMIT_TOOL_MAX_IN_FLIGHT:
+            raise self._too_many("tool_concurrency", 1.0)
+        self.in_flight[tool_id] = self.in_flight.get(tool_id, 0) + 1
+        self.admitted += 1
+
+        released = False
+
+        def release():
+            nonlocal released
+            if released:
+                return
+            released = True
+            left = self.in_flight.get(tool_id, 1) - 1
+            if left > 0:
+                self.in_flight[tool_id] = left
+            else:
+                self.in_flight.pop(tool_id, None)
+
+        return release
+
+    def _too_many(self, scope: str, retry_after: float) -> HTTPException:
+        self.rejected[scope] += 1
+        retry_after = max(1, math.ceil(retry_after))
+        messages = {
+            "api_key": "Too many requests for this API key.",
+            "tool": "This tool is receiving too many requests.",
+            "tool_concurrency": "Too many calls to this tool are already running.",
+        }
+        return HTTPException(
+            status_code=429,
+            detail={"error": "Rate limit exceeded", "scope": scope, "retry_after": retry_after, "message": messages[scope]},
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self.redis is not None else "local",
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "in_flight": dict(self.in_flight),
+            "tracked_buckets": len(self.buckets),
+        }
+
+
+def _noop():
+    pass
+
+
+rate_limiter = RateLimiter()
+
+# api key -> user id (None for unknown keys), so identifying a caller is not a DB query per call
+_api_key_owners = TTLCache(max_entries=settings.RATE_LIMIT_MAX_TRACKED_KEYS, ttl=300)
+
+
+async def start_rate_limiter():
+    if not settings.RATE_LIMIT_REDIS_URL:
+        return
+    if aioredis is None:
+        print("⚠️ RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed. Using per-process buckets.")
+        return
+    rate_limiter.redis = aioredis.from_url(settings.RATE_LIMIT_REDIS_URL)
+    print("✅ Rate limiter using shared Redis buckets.")
+
+
+async def close_rate_limiter():
+    if rate_limiter.redis is not None:
+        await rate_limiter.redis.aclose()
+        rate_limiter.redis = None
+        rate_limiter._script = None
+
+
+def _presented_api_key(request: Request) -> str | None:
+    key = request.headers.get("x-api-key") or request.query_params.get("api_key")
+    if not key:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token.startswith("emcp_"):
+            key = token
+    return key
+
+
+async def caller_identity(request: Request, session: AsyncSession) -> str:
+    """
+    "user:<id>" for a known API key, else "ip:<client address>". Unknown keys
+    count against the client's IP, so rotating made-up keys gains nothing.
+    """
+    key = _presented_api_key(request)
+    if key:
+        user_id = _api_key_owners.get(key, False)
+        if user_id is False:
+            result = await session.execute(select(DBUser.id).where(DBUser.api_key == key))
+            user_id = result.scalar_one_or_none()
+            _api_key_owners.set(key, user_id)
+        if user_id is not None:
+            return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
@@ -0,0 +1,90 @@
+import asyncio
+from dataclasses import dataclass
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.config import settings
+from backend.models.db import DBTool
+from backend.services.cache import TTLCache
+
+
+@dataclass
+class ToolRoute:
+    """What the proxy needs to forward and bill a call, without loading the DBTool row."""
+    id: int
+    url: str | None
+    cost: float
+    status: str | None
+    owner_id: int | None
+
+
+_NOT_CACHED = object()
+
+# tool_id -> ToolRoute, or None for ids known not to exist. Kept current in
+# this process by the create/delete/status hooks; the TTL bounds how long
+# another worker's change can go unnoticed.
+routes = TTLCache(max_entries=settings.ROUTING_TABLE_MAX_ENTRIES, ttl=settings.ROUTING_TABLE_TTL_SECONDS)
+
+# tool_id -> in-flight DB lookup, so an expired hot entry is reloaded once
+_loading: dict[int, asyncio.Future] = {}
+
+_COLUMNS = (DBTool.id, DBTool.url, DBTool.cost, DBTool.status, DBTool.owner_id)
+
+
+def _route(row) -> ToolRoute:
+    return ToolRoute(id=row.id, url=row.url, cost=row.cost or 0.0, status=row.status, owner_id=row.owner_id)
+
+
+async def load_routes(session: AsyncSession):
+    """Fills the table with every tool; called at startup."""
+    result = await session.execute(select(*_COLUMNS))
+    rows = result.all()
+    for row in rows:
+        routes.set(row.id, _route(row))
+    print(f"✅ Routing table loaded: {len(rows)} tools.")
+
+
+async def _query_route(session: AsyncSession, tool_id: int) -> ToolRoute | None:
+    result = await session.execute(select(*_COLUMNS).where(DBTool.id == tool_id))
+    row = result.first()
+    route = _route(row) if row is not None else None
+    routes.set(tool_id, route)
+    return route
+
+
+async def resolve_route(session: AsyncSession, tool_id: int) -> ToolRoute | None:
+    """The tool's route from memory; a DB query only on a miss or after the TTL."""
+    route = routes.get(tool_id, _NOT_CACHED)
+    if route is not _NOT_CACHED:
+        return route
+
+    loading = _loading.get(tool_id)
+    if loading is not None:
+        route = await asyncio.shield(loading)
+        # _NOT_CACHED: the loading request failed, so look it up ourselves
+        return route if route is not _NOT_CACHED else await _query_route(session, tool_id)
+
+    loading = _loading[tool_id] = asyncio.get_running_loop().create_future()
+    route = _NOT_CACHED
+    try:
+        route = await _query_route(session, tool_id)
+        return route
+    finally:
+        del _loading[tool_id]
+        loading.set_result(route)
+
+
+def upsert_route(tool: DBTool):
+    routes.set(tool.id, _route(tool))
+
+
+def update_route(tool_id: int, **fields):
+    """Changes individual fields (e.g. status) of a cached route."""
+    route = routes.get(tool_id)
+    if route is None:
+        return
+    for name, value in fields.items():
+        setattr(route, name, value)
+
+
+def forget_route(tool_id: int):
+    routes.pop(tool_id)
@@ -0,0 +1,164 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+import httpx
+from fastapi import HTTPException
+from starlette.responses import StreamingResponse
+from backend.config import settings
+
+# SSE comment line: ignored by clients, but it keeps proxies and load
+# balancers from timing the stream out and surfaces dead clients (the write fails)
+HEARTBEAT = b": ping\n\n"
+
+_EVENT_ENDINGS = (b"\n\n", b"\r\r", b"\r\n\r\n")
+
+
+@dataclass(eq=False)
+class SSEConnection:
+    """One client's SSE stream and the upstream stream it is relayed from."""
+    tool_id: int
+    opened_at: float = field(default_factory=time.monotonic)
+    last_event_at: float = field(default_factory=time.monotonic)
+    bytes_relayed: int = 0
+    heartbeats: int = 0
+
+
+class SSEGateway:
+    """
+    Bookkeeping for the proxy's SSE streams.
+
+    Every open stream holds a client socket and an upstream socket, so the
+    number of streams is capped per tool and per worker; past the cap new
+    streams get 429 with Retry-After. Streams with no tool events for
+    SSE_IDLE_TIMEOUT_SECONDS are closed (MCP clients reconnect), and quiet
+    streams get a heartbeat every SSE_HEARTBEAT_SECONDS, which is also how
+    a client that went away without closing is noticed.
+    """
+
+    def __init__(self):
+        self.connections: dict[int, set[SSEConnection]] = {}
+        self.opened = 0
+        self.rejected = {"worker": 0, "tool": 0}
+        self.closed = {"client": 0, "idle": 0, "upstream": 0}
+
+    @property
+    def total(self) -> int:
+        return sum(len(streams) for streams in self.connections.values())
+
+    def open(self, tool_id: int) -> SSEConnection:
+        """Registers a new stream or raises 429 when the worker or the tool is at its cap."""
+        if self.total >= settings.SSE_MAX_CONNECTIONS:
+            raise self._full("worker", "This server has too many open SSE connections.")
+        streams = self.connections.setdefault(tool_id, set())
+        if len(streams) >= settings.SSE_MAX_CONNECTIONS_PER_TOOL:
+            raise self._full("tool", "This tool has too many open SSE connections.")
+        connection = SSEConnection(tool_id=tool_id)
+        streams.add(connection)
+        self.opened += 1
+        return connection
+
+    def close(self, connection: SSEConnection, reason: str):
+        streams = self.connections.get(connection.tool_id)
+        if streams is None or connection not in streams:
+            return
+        streams.discard(connection)
+        if not streams:
+            del self.connections[connection.tool_id]
+        self.closed[reason] += 1
+
+    async def finish(self, connection: SSEConnection, response: httpx.Response, reason: str = "client"):
+        """Unregisters the stream and closes its upstream socket. Idempotent."""
+        self.close(connection, reason)
+        await response.aclose()
+
+    async def relay(self, connection: SSEConnection, response: httpx.Response):
+        """
+        The upstream stream's raw bytes, with heartbeats while it is quiet.
+        The upstream response is closed however the stream ends.
+        """
+        # Heartbeats are only inserted between events, and never into an encoded body
+        inject = not response.headers.get("content-encoding")
+        chunks = response.aiter_raw()
+        pending = None
+        at_boundary, tail = True, b""
+        reason = "client"
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(chunks.__anext__())
+                idle_left = connection.last_event_at + settings.SSE_IDLE_TIMEOUT_SECONDS - time.monotonic()
+                if idle_left <= 0:
+                    reason = "idle"
+                    return
+                done, _ = await asyncio.wait({pending}, timeout=min(settings.SSE_HEARTBEAT_SECONDS, idle_left))
+                if not done:
+                    if inject and at_boundary:
+                        connection.heartbeats += 1
+                        yield HEARTBEAT
+                    continue
+
+                try:
+                    chunk = pending.result()
+                except (StopAsyncIteration, httpx.HTTPError):
+                    reason = "upstream"
+                    return
+                finally:
+                    pending = None
+                connection.last_event_at = time.monotonic()
+                connection.bytes_relayed += len(chunk)
+                tail = (tail + chunk)[-4:]
+                at_boundary = tail.endswith(_EVENT_ENDINGS)
+                yield chunk
+        finally:
+            if pending is not None:
+                pending.cancel()
+            await self.finish(connection, response, reason)
+
+    def _full(self, scope: str, message: str) -> HTTPException:
+        self.rejected[scope] += 1
+        retry_after = max(1, math.ceil(settings.SSE_HEARTBEAT_SECONDS))
+        return HTTPException(
+            status_code=429,
+            detail={"error": "Too many SSE connections", "scope": scope, "retry_after": retry_after, "message": message},
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def stats(self) -> dict:
+        return {
+            "open": self.total,
+            "max_open": settings.SSE_MAX_CONNECTIONS,
+            "per_tool": {
+                tool_id: {
+                    "open": len(streams),
+                    "oldest_seconds": round(time.monotonic() - min(c.opened_at for c in streams), 1),
+                }
+                for tool_id, streams in self.connections.items()
+            },
+            "opened": self.opened,
+            "rejected": dict(self.rejected),
+            "closed": dict(self.closed),
+        }
+
+
+class SSEStreamingResponse(StreamingResponse):
+    """
+    Runs `cleanup` however the response ends. Starlette skips background
+    tasks when the client disconnects and just stops iterating the body,
+    which would leave the upstream stream open until the generator happens
+    to be garbage collected.
+    """
+
+    def __init__(self, content, cleanup, **kwargs):
+        super().__init__(content, **kwargs)
+        self.cleanup = cleanup
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+            await self.cleanup()
+
+
+sse_gateway = SSEGateway()
@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable
+import numpy as np
+
+
+@dataclass
+class ToolMeta:
+    """The filterable columns of a DBTool, kept in memory next to the search indexes."""
+    cost: float
+    status: str | None
+    owner_id: int | None
+    created_at: datetime | None
+
+
+@dataclass
+class SearchFilter:
+    max_cost: float | None = None
+    status: str | None = None
+    owner_id: int | None = None
+    created_after: datetime | None = None
+
+    def is_empty(self) -> bool:
+        return self.max_cost is None and self.status is None and self.owner_id is None and self.created_after is None
+
+    def cache_key(self) -> tuple:
+        return (self.max_cost, self.status, self.owner_id, self.created_after)
+
+
+class ToolRegistry:
+    """
+    tool_id -> ToolMeta, mirrored from the tools table.
+
+    Filters are evaluated over numpy columns that are rebuilt lazily after a
+    change, so a filtered search costs one vectorised pass over the catalog
+    instead of a database round trip.
+    """
+
+    def __init__(self):
+        self._tools: Dict[int, ToolMeta] = {}
+        self._columns = None
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def get(self, tool_id: int) -> ToolMeta | None:
+        return self._tools.get(tool_id)
+
+    def upsert(self, tool_id: int, meta: ToolMeta):
+        self._tools[tool_id] = meta
+        self._columns = None
+
+    def update(self, tool_id: int, **fields):
+        """Changes individual columns (e.g. status) of a known tool."""
+        meta = self._tools.get(tool_id)
+        if meta is None:
+            return
+        for name, value in fields.items():
+            setattr(meta, name, value)
+        self._columns = None
+
+    def remove(self, tool_id: int):
+        if self._tools.pop(tool_id, None) is not None:
+            self._columns = None
+
+    def replace(self, tools: Iterable[tuple[int, ToolMeta]]):
+        """Swaps in a freshly loaded catalog."""
+        self._tools = dict(tools)
+        self._columns = None
+
+    def _build_columns(self) -> dict:
+        metas = list(self._tools.values())
+        return {
+            "id": np.fromiter(self._tools.keys(), dtype=np.int64, count=len(metas)),
+            "cost": np.array([m.cost or 0.0 for m in metas], dtype=np.float64),
+            "status": np.array([m.status or "" for m in metas], dtype=object),
+            "owner_id": np.array([m.owner_id if m.owner_id is not None else -1 for m in metas], dtype=np.int64),
+            # NULL created_at sorts before every cutoff
+            "created_at": np.array(
+                [m.created_at.timestamp() if m.created_at else -np.inf for m in metas], dtype=np.float64
+            ),
+        }
+
+    def matching_ids(self, search_filter: SearchFilter) -> np.ndarray:
+        """Sorted int64 array of tool IDs that pass the filter."""
+        if self._columns is None:
+            self._columns = self._build_columns()
+        cols = self._columns
+        mask = np.ones(len(cols["id"]), dtype=bool)
+        if search_filter.max_cost is not None:
+            mask &= cols["cost"] <= search_filter.max_cost
+        if search_filter.status is not None:
+            mask &= cols["status"] == search_filter.status
+        if search_filter.owner_id is not None:
+            mask &= cols["owner_id"] == search_filter.owner_id
+        if search_filter.created_after is not None:
+            mask &= cols["created_at"] > search_filter.created_after.timestamp()
+        return np.sort(cols["id"][mask])
+
+
+def tool_meta(tool) -> ToolMeta:
+    """Builds a ToolMeta from a DBTool (or any row with the same attributes)."""
+    return ToolMeta(cost=tool.cost, status=tool.status, owner_id=tool.owner_id, created_at=tool.created_at)
+
+
+# Shared by the search engine and the routers that change tools
+tool_registry = ToolRegistry()
@@ -1,6 +1,6 @@
 import { showToast } from './AlertToast';
 
-import { useState } from 'react';
+import { useState, useEffect } from 'react';
 import { createWalletClient, custom, parseEther } from 'viem';
 import { baseSepolia } from 'viem/chains';
 import { useAuth } from '../hooks/useAuth';
@@ -10,6 +10,18 @@ export default function ConfigModal({ tool, onClose }) {
   const { token, isLoggedIn } = useAuth();
   const [apiKey, setApiKey] = useState(null);
   const [isUnlocking, setIsUnlocking] = useState(false);
+  const [reviews, setReviews] = useState([]);
+
+  // Reviews aren't part of the tool list/search payload; fetch them when the modal opens
+  useEffect(() => {
+    if (!tool) return;
+    let cancelled = false;
+    fetch(`${API_BASE_URL}/tools/${tool.id}/reviews?limit=20`)
+      .then((res) => (res.ok ? res.json() : []))
+      .then((data) => { if (!cancelled) setReviews(data); })
+      .catch((err) => console.error('Failed to load reviews', err));
+    return () => { cancelled = true; };
+  }, [tool?.id]);
   
   if (!tool) return null;
 
@@ -99,10 +111,8 @@ export default function ConfigModal({ tool, onClose }) {
     }
   };
 
-  const reviews = tool.reviews || [];
-  const averageRating = reviews.length > 0 
-    ? (reviews.reduce((acc, r) => acc + r.rating, 0) / reviews.length).toFixed(1)
-    : '0.0';
+  const reviewCount = tool.rating_count ?? reviews.length;
+  const averageRating = (tool.average_rating ?? 0).toFixed(1);
 
   return (
     <div className="config-modal-overlay" onClick={(e) => e.target === e.currentTarget && onClose()}>
@@ -220,7 +230,7 @@ export default function ConfigModal({ tool, onClose }) {
                   {[...Array(5)].map((_, i) => (
                     <i key={i} className={`fas fa-star ${i < Math.floor(averageRating) ? 'active' : ''}`}></i>
                   ))}
-                  <span className="review-count">({reviews.length} reviews)</span>
+                  <span className="review-count">({reviewCount} reviews)</span>
                 </div>
               </div>
             </div>
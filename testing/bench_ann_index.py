@@ -0,0 +1,93 @@
+# testing/bench_ann_index.py
+"""
+Recall@k vs latency of the HNSW and IVF-PQ index modes against the exact
+flat baseline, on synthetic tool catalogs.
+
+Vectors are drawn from a Gaussian mixture and L2-normalised, which is a
+rough stand-in for clustered MiniLM embeddings.
+
+    python testing/bench_ann_index.py --sizes 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import faiss
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.ai_services.index_factory import create_index, configure_search, tombstone_positions, compact
+
+DIMENSION = 384
+
+
+def synthetic_catalog(n: int, n_clusters: int = 256, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, DIMENSION)).astype('float32')
+    labels = rng.integers(0, n_clusters, size=n)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(n, DIMENSION)).astype('float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def timed_search(index: faiss.Index, queries: np.ndarray, k: int):
+    started = time.perf_counter()
+    _, labels = index.search(queries, k)
+    return labels, 1000 * (time.perf_counter() - started) / len(queries)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def bench(n: int, n_queries: int, k: int):
+    print(f"\n=== {n:,} tools, {n_queries} queries, k={k} ===")
+    vectors = synthetic_catalog(n)
+    queries = synthetic_catalog(n_queries, seed=1)
+    ids = np.arange(1, n + 1, dtype='int64')
+
+    flat = create_index(DIMENSION, kind="flat")
+    flat.add_with_ids(vectors, ids)
+    truth, flat_ms = timed_search(flat, queries, k)
+    print(f"{'flat':<8} {'':<14} recall@{k}=1.000  {flat_ms:.3f} ms/query")
+
+    started = time.perf_counter()
+    hnsw = create_index(DIMENSION, kind="hnsw")
+    hnsw.add_with_ids(vectors, ids)
+    print(f"hnsw build: {time.perf_counter() - started:.1f}s")
+    for ef in (16, 32, 64, 128, 256):
+        configure_search(hnsw, ef_search=ef)
+        found, ms = timed_search(hnsw, queries, k)
+        print(f"{'hnsw':<8} {f'efSearch={ef}':<14} recall@{k}={recall_at_k(truth, found):.3f}  {ms:.3f} ms/query")
+
+    # Deleting from HNSW: tombstoning is what a request waits for; compaction runs in the background
+    dead = set()
+    started = time.perf_counter()
+    tombstone_positions(hnsw, ids[:1], dead)
+    print(f"hnsw delete (tombstone): {1000 * (time.perf_counter() - started):.2f} ms")
+    started = time.perf_counter()
+    compact(hnsw, np.array(sorted(dead), dtype='int64'), DIMENSION)
+    print(f"hnsw compaction (background thread): {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    train = vectors[np.random.default_rng(2).choice(n, size=min(n, 100_000), replace=False)]
+    ivfpq = create_index(DIMENSION, kind="ivfpq", training_vectors=train)
+    ivfpq.add_with_ids(vectors, ids)
+    print(f"ivfpq build: {time.perf_counter() - started:.1f}s")
+    for nprobe in (1, 4, 16, 64):
+        configure_search(ivfpq, nprobe=nprobe)
+        found, ms = timed_search(ivfpq, queries, k)
+        print(f"{'ivfpq':<8} {f'nprobe={nprobe}':<14} recall@{k}={recall_at_k(truth, found):.3f}  {ms:.3f} ms/query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    faiss.omp_set_num_threads(1)  # per-query latency as seen by one request
+    for size in args.sizes:
+        bench(size, args.queries, args.k)
@@ -0,0 +1,99 @@
+# testing/bench_proxy_client.py
+"""
+Per-call overhead of forwarding JSON-RPC messages to an MCP tool backend:
+a new httpx.AsyncClient per call (the old proxy behaviour) vs the shared
+pooled client from backend.services.http_client.
+
+Starts a local stub MCP server (uvicorn) that answers POST /messages with a
+fixed JSON-RPC result, so the numbers isolate client/connection overhead.
+Over plain HTTP on localhost the difference is the TCP handshake and client
+setup; against Render over TLS the saving per call is considerably larger.
+
+    python testing/bench_proxy_client.py --calls 2000 --concurrency 1 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import uvicorn
+from backend.services.http_client import get_request_client, close_http_clients
+
+RESULT = json.dumps({"jsonrpc": "2.0", "id": 1, "result": {"content": [{"type": "text", "text": "ok"}]}}).encode()
+MESSAGE = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "echo", "arguments": {}}}
+
+
+async def stub_mcp_server(scope, receive, send):
+    if scope["type"] != "http":
+        return
+    while (await receive()).get("more_body"):
+        pass
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": RESULT})
+
+
+def start_stub() -> str:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    config = uvicorn.Config(stub_mcp_server, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/messages"
+
+
+async def call_fresh_client(url: str):
+    async with httpx.AsyncClient() as client:
+        (await client.post(url, json=MESSAGE, timeout=60.0)).raise_for_status()
+
+
+async def call_pooled_client(url: str):
+    (await get_request_client().post(url, json=MESSAGE)).raise_for_status()
+
+
+async def run(call, url: str, calls: int, concurrency: int) -> list:
+    latencies = []
+    queue = iter(range(calls))
+
+    async def worker():
+        for _ in queue:
+            started = time.perf_counter()
+            await call(url)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return sorted(latencies)
+
+
+def report(label: str, latencies: list, wall: float):
+    p = lambda q: 1000 * latencies[int(q * (len(latencies) - 1))]
+    print(f"{label:<22} p50={p(0.5):7.3f} ms  p99={p(0.99):7.3f} ms  throughput={len(latencies) / wall:8.0f} calls/s")
+
+
+async def main(args):
+    url = start_stub()
+    for concurrency in args.concurrency:
+        print(f"\n=== {args.calls} calls, concurrency {concurrency} ===")
+        for label, call in (("new client per call", call_fresh_client), ("shared pooled client", call_pooled_client)):
+            await run(call, url, min(50, args.calls), concurrency)  # warm-up
+            started = time.perf_counter()
+            latencies = await run(call, url, args.calls, concurrency)
+            report(label, latencies, time.perf_counter() - started)
+    await close_http_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,177 @@
+# testing/bench_rate_limit.py
+"""
+Noisy-neighbour load test for the MCP proxy's admission control.
+
+One "noisy" API key loops on tools/call from many concurrent workers while
+a few "polite" keys each call at a steady, modest rate. The tool backend is
+a local stub that, like a free-tier instance, can only work on a few
+requests at a time. The run is repeated with the rate limiter off and on,
+and reports per-caller throughput, 429s and latency.
+
+Without admission control the noisy key fills the backend's queue and the
+polite callers' latency grows with it. With per-key buckets the noisy key
+is held to its own budget (429 + Retry-After) and the polite callers keep
+their latency. Client and server share one event loop here, so a very
+fast 429 loop (small --noisy-retry-ms) also costs the polite callers CPU
+time that separate machines would not.
+
+    python testing/bench_rate_limit.py --seconds 10 --noisy-workers 32
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+import uvicorn
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from backend.config import settings
+from backend.main import app
+from backend.db import get_async_session
+from backend.models.db import Base, DBUser, DBTool
+from backend.services.http_client import close_http_clients
+from backend.services.rate_limit import rate_limiter
+
+logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request skews the numbers
+
+TOOL_ID = 1
+MESSAGE = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "echo", "arguments": {}}}
+RESULT = b'{"jsonrpc": "2.0", "id": 1, "result": {"content": [{"type": "text", "text": "ok"}]}}'
+
+
+def start_stub(capacity: int, work_ms: float) -> str:
+    """A backend that handles `capacity` requests at a time, `work_ms` each."""
+    state = {}
+
+    async def stub_mcp_server(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        if "slots" not in state:
+            state["slots"] = asyncio.Semaphore(capacity)
+        while (await receive()).get("more_body"):
+            pass
+        async with state["slots"]:
+            await asyncio.sleep(work_ms / 1000)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": RESULT})
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = uvicorn.Server(uvicorn.Config(stub_mcp_server, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def seed(session_factory, upstream: str, polite: int):
+    async with session_factory() as session:
+        keys = ["emcp_noisy"] + [f"emcp_polite_{i}" for i in range(polite)]
+        await session.execute(insert(DBUser), [
+            {"id": i + 1, "username": key, "email": f"{key}@example.com", "hashed_password": "x", "api_key": key}
+            for i, key in enumerate(keys)
+        ])
+        await session.execute(insert(DBTool), [
+            {"id": TOOL_ID, "name": "shared tool", "description": "", "cost": 0.0, "repo_url": "", "url": upstream, "owner_id": 1}
+        ])
+        await session.commit()
+    return keys
+
+
+async def run(client: AsyncClient, keys: list, args, noisy_workers: int) -> dict:
+    stats = {key: {"ok": 0, "limited": 0, "other": 0, "latencies": []} for key in keys}
+    deadline = time.monotonic() + args.seconds
+
+    async def call(key: str) -> int:
+        started = time.perf_counter()
+        r = await client.post(f"/api/proxy/{TOOL_ID}/messages", json=MESSAGE, headers={"x-api-key": key})
+        entry = stats[key]
+        if r.status_code == 200:
+            entry["ok"] += 1
+            entry["latencies"].append(time.perf_counter() - started)
+        elif r.status_code == 429:
+            entry["limited"] += 1
+        else:
+            entry["other"] += 1
+        return r.status_code
+
+    async def noisy_worker():
+        # Ignores Retry-After; only pauses briefly after a 429 like a naive retry loop
+        while time.monotonic() < deadline:
+            if await call("emcp_noisy") == 429:
+                await asyncio.sleep(args.noisy_retry_ms / 1000)
+
+    async def polite_caller(key: str):
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            await call(key)
+            await asyncio.sleep(max(0.0, 1 / args.polite_rate - (time.monotonic() - started)))
+
+    await asyncio.gather(
+        *(noisy_worker() for _ in range(noisy_workers)),
+        *(polite_caller(key) for key in keys[1:]),
+    )
+    return stats
+
+
+def report(label: str, stats: dict, seconds: float):
+    print(f"\n=== {label} ===")
+    print(f"{'caller':<16} {'ok/s':>8} {'429s':>7} {'other':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for key, entry in stats.items():
+        latencies = sorted(entry["latencies"])
+        p = lambda q: 1000 * latencies[int(q * (len(latencies) - 1))] if latencies else float("nan")
+        print(f"{key:<16} {entry['ok'] / seconds:8.1f} {entry['limited']:7d} {entry['other']:6d} {p(0.5):8.1f} {p(0.99):8.1f}")
+
+
+async def main(args):
+    upstream = start_stub(args.backend_capacity, args.work_ms)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_async_session] = override_get_db
+        keys = await seed(session_factory, upstream, args.polite)
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+            scenarios = (
+                ("polite callers alone (baseline)", True, 0),
+                ("noisy neighbour, rate limiter off", False, args.noisy_workers),
+                ("noisy neighbour, rate limiter on", True, args.noisy_workers),
+            )
+            for label, enabled, noisy_workers in scenarios:
+                settings.RATE_LIMIT_ENABLED = enabled
+                rate_limiter.buckets.clear()
+                stats = await run(client, keys, args, noisy_workers)
+                report(label, stats, args.seconds)
+
+        await close_http_clients()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--noisy-workers", type=int, default=32)
+    parser.add_argument("--noisy-retry-ms", type=float, default=10.0, help="pause after a 429 (Retry-After is ignored)")
+    parser.add_argument("--polite", type=int, default=4, help="number of well-behaved API keys")
+    parser.add_argument("--polite-rate", type=float, default=2.0, help="calls/second per polite key")
+    parser.add_argument("--backend-capacity", type=int, default=4, help="concurrent requests the tool backend handles")
+    parser.add_argument("--work-ms", type=float, default=20.0)
+    asyncio.run(main(parser.parse_args()))
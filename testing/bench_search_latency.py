@@ -0,0 +1,60 @@
+# testing/bench_search_latency.py
+"""
+Fires concurrent /api/search requests at a running backend and reports
+p50/p99 latency plus the server-side micro-batching stats.
+
+Compare batching on vs off by restarting the server with
+EMBEDDING_MICROBATCH_SIZE=1 (off) and the default (on):
+
+    python testing/bench_search_latency.py --base-url http://localhost:8000
+"""
+import argparse
+import asyncio
+import time
+import httpx
+
+QUERIES = [
+    "pdf", "github", "image background", "weather forecast", "send email",
+    "database query", "translate text", "web scraping", "calendar", "slack bot",
+]
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+async def run(base_url: str, concurrency: int, total: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        async def one(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                # A distinct query per request: repeats would be served by the search caches
+                query = f"{QUERIES[i % len(QUERIES)]} {i}"
+                r = await client.get("/api/search/", params={"query": query, "k": 5})
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        wall = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        wall = time.perf_counter() - wall
+
+        print(f"Requests: {total}  Concurrency: {concurrency}  Throughput: {total / wall:.1f} req/s")
+        print(f"Client p50: {1000 * percentile(latencies, 0.50):.1f} ms")
+        print(f"Client p99: {1000 * percentile(latencies, 0.99):.1f} ms")
+
+        stats = (await client.get("/api/monitoring/embeddings")).json()
+        print(f"Server embedding stats: {stats}")
+        print(f"Server search stats: {(await client.get('/api/monitoring/search')).json()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.concurrency, args.requests))
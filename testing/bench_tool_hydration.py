@@ -0,0 +1,96 @@
+# testing/bench_tool_hydration.py
+"""
+Compares the old eager-loading hydration of tool pages (owner -> tools,
+ratings -> user) with the grouped summary query in crud.attach_tool_summaries.
+
+Builds a throwaway SQLite catalog where every tool has the same number of
+ratings (10k by default), then times hydrating one page of tools each way.
+
+    python testing/bench_tool_hydration.py --tools 20 --ratings-per-tool 10000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from backend.models.db import Base, DBUser, DBTool, DBRating
+from backend import crud
+
+
+async def seed(session_factory, n_tools: int, ratings_per_tool: int, n_authors: int):
+    async with session_factory() as session:
+        await session.execute(insert(DBUser), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x"}
+            for i in range(1, ratings_per_tool + n_authors + 1)
+        ])
+        await session.execute(insert(DBTool), [
+            {"id": t, "name": f"tool{t}", "description": "bench", "cost": 0.0, "repo_url": "", "url": "",
+             "owner_id": ratings_per_tool + 1 + t % n_authors}
+            for t in range(1, n_tools + 1)
+        ])
+        for t in range(1, n_tools + 1):
+            await session.execute(insert(DBRating), [
+                {"tool_id": t, "user_id": u, "rating": u % 6, "comment": "fine"}
+                for u in range(1, ratings_per_tool + 1)
+            ])
+        await session.commit()
+
+
+async def eager_page(session: AsyncSession, limit: int):
+    result = await session.execute(
+        select(DBTool)
+        .options(
+            selectinload(DBTool.owner).selectinload(DBUser.tools),
+            selectinload(DBTool.ratings).selectinload(DBRating.user),
+        )
+        .limit(limit)
+    )
+    tools = result.scalars().all()
+    return [(t.author, t.author_tools_count, len(t.reviews)) for t in tools]
+
+
+async def lean_page(session: AsyncSession, limit: int, include_reviews: bool):
+    tools = await crud.get_tools(session, limit=limit, include_reviews=include_reviews)
+    return [(t.author, t.author_tools_count, t.rating_count) for t in tools]
+
+
+async def timed(session_factory, fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        async with session_factory() as session:
+            started = time.perf_counter()
+            await fn(session, *args)
+            best = min(best, time.perf_counter() - started)
+    return 1000 * best
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+        print(f"Seeding {args.tools} tools x {args.ratings_per_tool:,} ratings...")
+        await seed(session_factory, args.tools, args.ratings_per_tool, args.authors)
+
+        print(f"eager selectinload page:      {await timed(session_factory, eager_page, args.page):9.1f} ms")
+        print(f"grouped summaries page:       {await timed(session_factory, lean_page, args.page, False):9.1f} ms")
+        print(f"grouped + 5 reviews per tool: {await timed(session_factory, lean_page, args.page, True):9.1f} ms")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tools", type=int, default=20)
+    parser.add_argument("--ratings-per-tool", type=int, default=10_000)
+    parser.add_argument("--authors", type=int, default=5)
+    parser.add_argument("--page", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
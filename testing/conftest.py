@@ -1,9 +1,14 @@
 import sys
 import os
+import socket
+import threading
+import time
 import pytest
 import pytest_asyncio
+import uvicorn
 from httpx import AsyncClient, ASGITransport
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 # Add the project's root directory to the Python path
@@ -12,7 +17,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from backend.main import app
 from backend.db import get_async_session
-from backend.models.db import Base
+from backend.models.db import Base, DBUser, DBTool
+from backend.services.rate_limit import rate_limiter
 
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
@@ -26,6 +32,13 @@ async def override_get_db():
 
 app.dependency_overrides[get_async_session] = override_get_db
 
+@pytest.fixture(autouse=True)
+def fresh_rate_limits():
+    # Every test starts with full token buckets
+    rate_limiter.buckets.clear()
+    rate_limiter.in_flight.clear()
+
+
 @pytest_asyncio.fixture(scope="module")
 async def async_client():
     async with engine.begin() as conn:
@@ -37,3 +50,64 @@ async def async_client():
     
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    """A session on a fresh SQLite database of its own, for tests that call crud/services directly."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/session.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    async with factory() as s:
+        yield s
+    await engine.dispose()
+
+
+def free_port() -> int:
+    """A local port nothing is listening on (yet)."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture(scope="module")
+def stub_server():
+    """
+    Starts an ASGI app (a stand-in MCP backend, RPC node, ...) with uvicorn on
+    a background thread and returns its base URL. Servers stop with the module.
+    """
+    servers = []
+
+    def start(app) -> str:
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+        servers.append(server)
+        return f"http://127.0.0.1:{port}"
+
+    yield start
+    for server in servers:
+        server.should_exit = True
+
+
+async def ok_mcp_server(scope, receive, send):
+    """A stand-in MCP backend that answers every POST with an empty JSON-RPC result."""
+    if scope["type"] != "http":
+        return
+    while (await receive()).get("more_body"):
+        pass
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"jsonrpc": "2.0", "id": 1, "result": {"content": []}}'})
+
+
+async def seed_tools(users: list[dict], tools: list[dict]):
+    """Inserts tool owners and their tools, defaulting the columns tests don't care about."""
+    async with TestingSessionLocal() as session:
+        await session.execute(insert(DBUser), [{"hashed_password": "x", **user} for user in users])
+        await session.execute(insert(DBTool), [{"description": "", "cost": 0.0, "repo_url": "", **tool} for tool in tools])
+        await session.commit()
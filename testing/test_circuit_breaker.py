@@ -0,0 +1,98 @@
+# testing/test_circuit_breaker.py
+import asyncio
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import select
+from conftest import TestingSessionLocal, free_port, seed_tools
+from backend.config import settings
+from backend.models.db import DBTool
+from backend.services import circuit_breaker
+from backend.services.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from backend.services.http_client import close_http_clients
+
+pytestmark = pytest.mark.asyncio
+
+DEAD_TOOL = 701
+
+
+@pytest.fixture(autouse=True)
+def fast_breaker(monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "CIRCUIT_OPEN_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "CIRCUIT_MAX_OPEN_SECONDS", 1.0)
+    monkeypatch.setattr(circuit_breaker, "async_session_factory", TestingSessionLocal)
+    circuit_breaker.circuit_breakers.clear()
+
+
+@pytest_asyncio.fixture
+async def dead_tool(async_client):
+    # A port nothing listens on: every call is a connect error
+    await seed_tools(
+        [{"id": 701, "username": "breaker_owner", "email": "breaker@example.com"}],
+        [{"id": DEAD_TOOL, "name": "dead tool", "url": f"http://127.0.0.1:{free_port()}", "owner_id": 701, "status": "live"}],
+    )
+    yield DEAD_TOOL
+    await close_http_clients()
+
+
+async def test_opens_after_consecutive_failures_and_probes():
+    breaker = CircuitBreaker(tool_id=1)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure("ConnectError")
+    assert breaker.state == CLOSED
+
+    breaker.record_failure("ConnectError")
+    assert breaker.state == OPEN
+    with pytest.raises(HTTPException) as exc:
+        breaker.before_call()
+    assert exc.value.status_code == 503 and int(exc.value.headers["Retry-After"]) >= 1
+
+    # After the open period exactly one probe is let through
+    await asyncio.sleep(0.06)
+    assert breaker.before_call() is True
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(HTTPException):
+        breaker.before_call()
+
+    # A failed probe re-opens for twice as long, a good one closes the circuit
+    breaker.record_failure("ReadTimeout")
+    assert breaker.state == OPEN and breaker.open_seconds == pytest.approx(0.1)
+    await asyncio.sleep(0.11)
+    assert breaker.before_call() is True
+    breaker.record_success(0.01)
+    assert breaker.state == CLOSED and breaker.consecutive_failures == 0
+    assert breaker.before_call() is False
+
+
+async def test_slow_calls_count_as_failures(monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_SLOW_CALL_SECONDS", 1.0)
+    breaker = CircuitBreaker(tool_id=2)
+    for _ in range(3):
+        breaker.record_success(2.5)
+    assert breaker.state == OPEN
+    assert breaker.last_error.startswith("slow response")
+
+
+async def test_proxy_fails_fast_and_marks_tool_unreachable(async_client: AsyncClient, dead_tool):
+    message = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+    for _ in range(3):
+        response = await async_client.post(f"/api/proxy/{dead_tool}/messages", json=message)
+        assert response.status_code == 502
+
+    response = await async_client.post(f"/api/proxy/{dead_tool}/messages", json=message)
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+    assert response.json()["detail"]["circuit"] == "open"
+
+    await asyncio.gather(*circuit_breaker._status_tasks)
+    async with TestingSessionLocal() as session:
+        status = (await session.execute(select(DBTool.status).where(DBTool.id == dead_tool))).scalar_one()
+    assert status == circuit_breaker.UNREACHABLE_STATUS
+
+    circuits = (await async_client.get("/api/monitoring/circuits")).json()
+    assert circuits["open"] == 1
+    assert circuits["circuits"][0]["tool_id"] == dead_tool
+    assert circuits["circuits"][0]["rejected"] == 1
@@ -0,0 +1,114 @@
+# testing/test_faiss_index.py
+import hashlib
+import numpy as np
+import faiss
+import pytest
+from sqlalchemy import insert, select, update
+from backend.config import settings
+from backend.models.db import DBTool, DBToolEmbedding
+from backend.services.tool_registry import ToolRegistry
+from backend.ai_services import search_engine
+from backend.ai_services.index_factory import create_index
+from backend.ai_services.lexical_index import BM25Index
+
+pytestmark = pytest.mark.asyncio
+
+
+def fake_embedding(text: str) -> np.ndarray:
+    """Deterministic unit vector per text, standing in for MiniLM."""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    vector = np.random.default_rng(seed).normal(size=search_engine.DIMENSION).astype('float32')
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def fresh_index(monkeypatch, request):
+    async def aget_embedding(text):
+        return fake_embedding(text).tolist()
+
+    monkeypatch.setattr(search_engine, "index", create_index(search_engine.DIMENSION, kind=request.param))
+    monkeypatch.setattr(search_engine, "lexical_index", BM25Index())
+    monkeypatch.setattr(search_engine, "aget_embedding", aget_embedding)
+    monkeypatch.setattr(search_engine, "save_faiss_index", lambda: None)
+    monkeypatch.setattr(settings, "FAISS_COMPACT_DELAY_SECONDS", 0.0)
+    search_engine.tombstones.clear()
+    search_engine.embedding_cache.clear()
+    yield request.param
+    search_engine.tombstones.clear()
+
+
+def live_ids() -> list[int]:
+    id_map = faiss.vector_to_array(search_engine.index.id_map)
+    return sorted(int(tool_id) for pos, tool_id in enumerate(id_map) if pos not in search_engine.tombstones)
+
+
+async def dense_hits(text: str) -> list[int]:
+    return [tool_id for tool_id, _ in await search_engine._dense_candidates(text, 5)]
+
+
+@pytest.mark.parametrize("fresh_index", ["flat", "hnsw"], indirect=True)
+async def test_upsert_and_delete_by_tool_id(fresh_index):
+    for tool_id in (1, 2, 3):
+        await search_engine.add_tool_to_faiss(tool_id, f"tool {tool_id}", "original")
+    assert search_engine.index.ntotal == 3
+    assert live_ids() == [1, 2, 3]
+
+    # Re-adding replaces the tool's vector instead of adding a second one
+    await search_engine.add_tool_to_faiss(2, "tool 2", "redeployed")
+    assert live_ids() == [1, 2, 3]
+    new_text = search_engine.build_rich_text("tool 2", "redeployed")
+    old_text = search_engine.build_rich_text("tool 2", "original")
+    assert (await dense_hits(new_text))[0] == 2
+    assert 2 not in (await dense_hits(old_text))[:1]
+
+    await search_engine.remove_tool_from_faiss(1)
+    await search_engine.remove_tool_from_faiss(1)
+    assert live_ids() == [2, 3]
+    assert 1 not in await dense_hits(search_engine.build_rich_text("tool 1", "original"))
+
+    if fresh_index == "hnsw":
+        # Tombstoned vectors stay in the graph until the background compaction drops them
+        await search_engine._compaction
+        assert not search_engine.tombstones
+    assert search_engine.index.ntotal == 2
+    assert sorted(faiss.vector_to_array(search_engine.index.id_map)) == [2, 3]
+
+
+@pytest.mark.parametrize("fresh_index", ["flat"], indirect=True)
+async def test_reindex_reuses_unchanged_embeddings(fresh_index, session, monkeypatch):
+    embedded = []
+
+    async def aembed_batch(texts, batch_size=64):
+        embedded.extend(texts)
+        return np.stack([fake_embedding(text) for text in texts])
+
+    monkeypatch.setattr(search_engine, "aembed_batch", aembed_batch)
+    monkeypatch.setattr(search_engine, "embedding_model", object())  # stored vectors are real ones
+    monkeypatch.setattr(search_engine, "tool_registry", ToolRegistry())
+
+    await session.execute(insert(DBTool), [
+        {"id": i, "name": f"tool {i}", "description": "original", "cost": 0.0, "repo_url": "", "url": "", "owner_id": 1}
+        for i in (1, 2, 3)
+    ])
+    await session.commit()
+
+    await search_engine.reindex_all_tools(session, page_size=2)
+    assert len(embedded) == 3
+    stored = (await session.execute(select(DBToolEmbedding))).scalars().all()
+    assert sorted(row.tool_id for row in stored) == [1, 2, 3]
+
+    # Nothing changed: every vector comes from tool_embeddings
+    embedded.clear()
+    await search_engine.reindex_all_tools(session, page_size=2)
+    assert embedded == []
+    assert live_ids() == [1, 2, 3]
+
+    # Only the edited tool is re-embedded, and its stored hash follows
+    await session.execute(update(DBTool).where(DBTool.id == 2).values(description="edited"))
+    await session.commit()
+    await search_engine.reindex_all_tools(session, page_size=2)
+    new_text = search_engine.build_rich_text("tool 2", "edited")
+    assert embedded == [new_text]
+    stored = await session.get(DBToolEmbedding, 2, populate_existing=True)
+    assert stored.content_hash == search_engine.content_hash(new_text)
+    assert (await dense_hits(new_text))[0] == 2
@@ -0,0 +1,81 @@
+from datetime import datetime
+import numpy as np
+import faiss
+import pytest
+from backend.ai_services.index_factory import create_index, filtered_search, tombstone_positions, compact
+from backend.services.tool_registry import ToolRegistry, ToolMeta, SearchFilter
+
+DIMENSION = 32
+
+
+def make_vectors(n: int) -> np.ndarray:
+    vectors = np.random.default_rng(0).normal(size=(n, DIMENSION)).astype('float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+@pytest.mark.parametrize("kind", ["flat", "hnsw", "ivfpq"])
+@pytest.mark.parametrize("n_allowed", [3, 1500])
+def test_filtered_search_returns_only_allowed_ids(kind, n_allowed):
+    vectors = make_vectors(4000)
+    ids = np.arange(1, 4001, dtype='int64')
+    index = create_index(DIMENSION, kind=kind, training_vectors=vectors, ivf_nlist=16, pq_m=8)
+    index.add_with_ids(vectors, ids)
+
+    allowed = np.sort(np.random.default_rng(1).choice(ids, size=n_allowed, replace=False))
+    _, labels = filtered_search(index, vectors[:4], 3, allowed)
+
+    found = labels[labels != -1]
+    assert len(found) > 0
+    assert np.isin(found, allowed).all()
+
+
+def test_filtered_search_exact_for_small_hnsw_filters():
+    vectors = make_vectors(4000)
+    index = create_index(DIMENSION, kind="hnsw")
+    index.add_with_ids(vectors, np.arange(1, 4001, dtype='int64'))
+
+    allowed = np.array([10, 20, 30], dtype='int64')
+    _, labels = filtered_search(index, vectors[:1], 5, allowed)
+    # Every allowed tool is found even though the graph search alone would miss them
+    assert sorted(labels[0][:3]) == [10, 20, 30]
+    assert (labels[0][3:] == -1).all()
+
+
+@pytest.mark.parametrize("allowed", [None, np.array([1, 2, 3, 4], dtype='int64')])
+def test_tombstoned_hnsw_vectors_are_never_returned(allowed):
+    vectors = make_vectors(200)
+    index = create_index(DIMENSION, kind="hnsw")
+    index.add_with_ids(vectors, np.arange(1, 201, dtype='int64'))
+
+    # Delete tool 1 and upsert tool 2 with tool 3's vector: the old vector of 2 stays in the graph
+    dead = set()
+    assert tombstone_positions(index, np.array([1, 2], dtype='int64'), dead) == 2
+    index.add_with_ids(vectors[2:3], np.array([2], dtype='int64'))
+    assert tombstone_positions(index, np.array([1], dtype='int64'), dead) == 0
+
+    dead_positions = np.array(sorted(dead), dtype='int64')
+    _, labels = filtered_search(index, vectors[[0, 2]], 3, allowed, dead_positions)
+    assert 1 not in labels
+    assert sorted(labels[1][:2]) == [2, 3]  # 2 now has 3's vector
+
+    compacted = compact(index, dead_positions, DIMENSION)
+    assert compacted.ntotal == 199
+    assert sorted(faiss.vector_to_array(compacted.id_map)) == list(range(2, 201))
+    _, labels = filtered_search(compacted, vectors[[0, 2]], 3, allowed)
+    assert 1 not in labels and sorted(labels[1][:2]) == [2, 3]
+
+
+def test_registry_matching_ids():
+    registry = ToolRegistry()
+    registry.upsert(1, ToolMeta(cost=0.0, status="live", owner_id=7, created_at=datetime(2025, 1, 1)))
+    registry.upsert(2, ToolMeta(cost=5.0, status="live", owner_id=8, created_at=datetime(2025, 6, 1)))
+    registry.upsert(3, ToolMeta(cost=0.0, status="deploying", owner_id=7, created_at=None))
+
+    assert registry.matching_ids(SearchFilter(max_cost=0)).tolist() == [1, 3]
+    assert registry.matching_ids(SearchFilter(status="live", owner_id=7)).tolist() == [1]
+    assert registry.matching_ids(SearchFilter(created_after=datetime(2025, 3, 1))).tolist() == [2]
+
+    registry.update(3, status="live")
+    registry.remove(1)
+    assert registry.matching_ids(SearchFilter(status="live")).tolist() == [2, 3]
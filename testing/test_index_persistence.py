@@ -0,0 +1,88 @@
+# testing/test_index_persistence.py
+import os
+import numpy as np
+import faiss
+import pytest
+from backend.ai_services import index_persistence, search_engine
+from backend.ai_services.index_factory import create_index
+from backend.ai_services.index_persistence import HEADER, SnapshotWriter, read_snapshot, write_snapshot
+
+
+def snapshot_payload(n: int) -> bytes:
+    index = create_index(search_engine.DIMENSION, kind="flat")
+    vectors = np.random.default_rng(0).normal(size=(n, search_engine.DIMENSION)).astype('float32')
+    index.add_with_ids(vectors, np.arange(1, n + 1, dtype='int64'))
+    return faiss.serialize_index(index).tobytes()
+
+
+def test_round_trip_and_corruption_is_rejected(tmp_path):
+    path = str(tmp_path / "faiss_index.bin")
+    payload = snapshot_payload(3)
+    write_snapshot(path, payload, index_version=7)
+    assert read_snapshot(path) == (7, payload)
+
+    with open(path, "r+b") as f:
+        f.seek(HEADER.size + len(payload) // 2)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    with pytest.raises(ValueError, match="checksum"):
+        read_snapshot(path)
+
+    with open(path, "r+b") as f:
+        f.truncate(HEADER.size + 10)
+    with pytest.raises(ValueError, match="checksum"):
+        read_snapshot(path)
+
+    with open(path, "wb") as f:
+        f.write(b"\x00" * HEADER.size)
+    with pytest.raises(ValueError, match="Not an eMCP"):
+        read_snapshot(path)
+
+
+def test_failed_write_keeps_the_previous_snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / "faiss_index.bin")
+    old = snapshot_payload(2)
+    write_snapshot(path, old, index_version=1)
+
+    def disk_full(fd):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(index_persistence.os, "fsync", disk_full)
+    with pytest.raises(OSError):
+        write_snapshot(path, snapshot_payload(5), index_version=2)
+
+    assert read_snapshot(path) == (1, old)
+    assert os.listdir(tmp_path) == ["faiss_index.bin"]  # no temp file left behind
+
+
+def test_writer_coalesces_changes(tmp_path):
+    path = str(tmp_path / "faiss_index.bin")
+    versions = iter(range(1, 100))
+    writer = SnapshotWriter(path, lambda: (next(versions), b"payload"), interval=60)
+    for _ in range(5):
+        writer.mark_dirty()
+    writer.stop(flush=True)
+    assert writer.writes == 1
+    assert read_snapshot(path) == (1, b"payload")
+
+    writer.flush()  # nothing changed since
+    assert writer.writes == 1
+
+
+def test_corrupt_snapshot_is_not_loaded(tmp_path, monkeypatch):
+    path = str(tmp_path / "faiss_index.bin")
+    payload = snapshot_payload(4)
+    write_snapshot(path, payload, index_version=3)
+    monkeypatch.setattr(search_engine, "FAISS_INDEX_PATH", path)
+    monkeypatch.setattr(search_engine, "index", create_index(search_engine.DIMENSION, kind="flat"))
+    monkeypatch.setattr(search_engine, "index_version", 0)
+
+    search_engine.load_faiss_index()
+    assert search_engine.index.ntotal == 4 and search_engine.index_version == 3
+
+    with open(path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([payload[-1] ^ 0xFF]))
+    search_engine.load_faiss_index()
+    assert search_engine.index.ntotal == 0
@@ -0,0 +1,154 @@
+# testing/test_jsonrpc_batch.py
+import json
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from conftest import seed_tools
+from backend.config import settings
+from backend.services.circuit_breaker import forget_breaker, get_breaker
+from backend.services.http_client import close_http_clients
+from backend.services.jsonrpc_batch import INTERNAL_ERROR, INVALID_REQUEST, PAYMENT_ERROR
+from backend.services.rate_limit import rate_limiter
+
+pytestmark = pytest.mark.asyncio
+
+BATCH_TOOL, PAID_BATCH_TOOL, SINGLE_ONLY_TOOL = 1101, 1102, 1103
+upstream_posts = []
+
+
+def answer(request: dict) -> dict:
+    return {"jsonrpc": "2.0", "id": request["id"], "result": {"echo": request["method"]}}
+
+
+async def read_json(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    return json.loads(body)
+
+
+async def reply(send, payload):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+
+
+async def batch_server(scope, receive, send):
+    """
+    Answers batches out of order and never answers the method "drop". Under
+    /single, batches are refused and "unavailable" and "hangup" fail.
+    """
+    if scope["type"] != "http":
+        return
+    message = await read_json(receive)
+    upstream_posts.append(message)
+    if scope["path"].startswith("/single"):
+        if isinstance(message, list):
+            await reply(send, {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Batches not supported"}})
+        elif message["method"] == "unavailable":
+            await send({"type": "http.response.start", "status": 503, "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"Service Unavailable"})
+        elif message["method"] == "hangup":
+            # Promises a body it never sends: the connection drops mid-response
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", b"100")]})
+            await send({"type": "http.response.body", "body": b"{", "more_body": True})
+        else:
+            await reply(send, answer(message))
+        return
+    answers = [answer(m) for m in reversed(message) if "id" in m and m["method"] != "drop"]
+    await reply(send, answers)
+
+
+@pytest_asyncio.fixture(scope="module")
+async def tools(async_client, stub_server):
+    base = stub_server(batch_server)
+    await seed_tools(
+        [{"id": 1101, "username": "batch_owner", "email": "batch@example.com"}],
+        [
+            {"id": BATCH_TOOL, "name": "batch tool", "cost": 0.0, "url": base, "owner_id": 1101},
+            {"id": PAID_BATCH_TOOL, "name": "paid batch tool", "cost": 0.01, "url": base, "owner_id": 1101},
+            {"id": SINGLE_ONLY_TOOL, "name": "no batch tool", "cost": 0.0, "url": f"{base}/single", "owner_id": 1101},
+        ],
+    )
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def fresh_upstream():
+    upstream_posts.clear()
+    yield
+    await close_http_clients()
+
+
+def rpc(request_id, method) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": {}}
+
+
+async def test_batch_is_forwarded_once_and_answered_in_order(async_client: AsyncClient, tools):
+    batch = [
+        rpc(1, "tools/call"),
+        {"jsonrpc": "2.0", "method": "notifications/progress"},
+        {"id": 2, "method": "tools/call"},  # missing "jsonrpc"
+        rpc("3", "tools/call"),
+        rpc(4, "drop"),
+    ]
+    r = await async_client.post(f"/api/proxy/{BATCH_TOOL}/messages", json=batch)
+    assert r.status_code == 200
+    assert len(upstream_posts) == 1
+    assert [m.get("id") for m in upstream_posts[0]] == [1, None, "3", 4]
+
+    answers = r.json()
+    assert [a["id"] for a in answers] == [1, 2, "3", 4]
+    assert answers[0]["result"] == {"echo": "tools/call"}
+    assert answers[1]["error"]["code"] == INVALID_REQUEST
+    assert answers[3]["error"]["code"] == INTERNAL_ERROR
+
+
+async def test_paid_calls_are_billed_per_item(async_client: AsyncClient, tools):
+    batch = [rpc(1, "tools/list"), rpc(2, "tools/call"), rpc(3, "tools/call")]
+    r = await async_client.post(f"/api/proxy/{PAID_BATCH_TOOL}/messages", json=batch)
+    answers = r.json()
+    assert answers[0]["result"] == {"echo": "tools/list"}
+    assert [a["error"]["code"] for a in answers[1:]] == [PAYMENT_ERROR, PAYMENT_ERROR]
+    assert answers[1]["error"]["data"]["error"] == "Payment Required"
+    # Only the free call went upstream
+    assert upstream_posts == [[rpc(1, "tools/list")]]
+
+
+async def test_backend_without_batch_support(async_client: AsyncClient, tools):
+    batch = [rpc(1, "tools/call"), rpc(2, "tools/list")]
+    r = await async_client.post(f"/api/proxy/{SINGLE_ONLY_TOOL}/messages", json=batch)
+    assert [a["result"]["echo"] for a in r.json()] == ["tools/call", "tools/list"]
+    assert len(upstream_posts) == 3  # the refused batch, then one request per call
+
+
+async def test_failed_individual_calls_are_reported(async_client: AsyncClient, tools):
+    forget_breaker(SINGLE_ONLY_TOOL)
+    batch = [rpc(1, "tools/call"), rpc(2, "unavailable"), rpc(3, "hangup"), {"jsonrpc": "2.0", "method": "hangup"}]
+    r = await async_client.post(f"/api/proxy/{SINGLE_ONLY_TOOL}/messages", json=batch)
+    answers = r.json()
+    assert [a["id"] for a in answers] == [1, 2, 3]
+    assert answers[0]["result"] == {"echo": "tools/call"}
+    assert answers[1]["error"] == {"code": INTERNAL_ERROR, "message": "Tool backend returned HTTP 503"}
+    assert answers[2]["error"]["message"].startswith("Tool backend unreachable: ")
+
+    # The refused batch and the first call succeeded; the rest count against the tool
+    breaker = get_breaker(SINGLE_ONLY_TOOL)
+    assert breaker.total_calls == 5 and breaker.total_failures == 3
+
+
+async def test_batch_limits(async_client: AsyncClient, tools, monkeypatch):
+    url = f"/api/proxy/{BATCH_TOOL}/messages"
+    assert (await async_client.post(url, json=[])).json()["error"]["code"] == INVALID_REQUEST
+
+    too_many = [rpc(i, "tools/call") for i in range(settings.PROXY_BATCH_MAX_ITEMS + 1)]
+    assert (await async_client.post(url, json=too_many)).status_code == 413
+
+    # A batch costs one token per call
+    monkeypatch.setattr(settings, "RATE_LIMIT_CALLER_BURST", 5.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_CALLER_RATE", 0.1)
+    rate_limiter.buckets.clear()
+    assert (await async_client.post(url, json=[rpc(i, "tools/call") for i in range(4)])).status_code == 200
+    r = await async_client.post(url, json=[rpc(i, "tools/call") for i in range(2)])
+    assert r.status_code == 429 and r.json()["detail"]["scope"] == "api_key"
@@ -0,0 +1,51 @@
+import time
+from backend.ai_services.lexical_index import BM25Index
+
+
+def make_index() -> BM25Index:
+    idx = BM25Index()
+    idx.add(1, {"name": "PDF Reader", "description": "Extract text from PDF files"})
+    idx.add(2, {"name": "GitHub Issues", "description": "Create and search GitHub issues"})
+    idx.add(3, {"name": "Background Remover", "description": "Remove image background",
+                "tool_definitions": "remove_background Removes the background of an image"})
+    return idx
+
+
+def test_ranks_name_matches_first():
+    idx = make_index()
+    idx.add(4, {"name": "Docs Helper", "description": "Converts docs to pdf"})
+    results = idx.search("pdf", k=5)
+    assert [doc_id for doc_id, _ in results] == [1, 4]
+
+
+def test_prefix_match_for_partial_terms():
+    idx = make_index()
+    assert idx.search("git", k=5)[0][0] == 2
+
+
+def test_remove_and_upsert():
+    idx = make_index()
+    idx.remove(1)
+    assert idx.search("pdf", k=5) == []
+
+    idx.add(3, {"name": "Image Tools", "description": "Resize images"})
+    assert idx.search("background", k=5) == []
+    assert idx.search("resize", k=5)[0][0] == 3
+
+
+def test_allow_filter():
+    idx = make_index()
+    assert idx.search("image background", k=5, allow=lambda doc_id: doc_id != 3) == []
+
+
+def test_search_latency_at_100k_tools():
+    idx = BM25Index()
+    for i in range(100_000):
+        idx.add(i, {"name": f"tool{i} connector", "description": f"service number {i} for category{i % 500}"})
+
+    started = time.perf_counter()
+    results = idx.search("category42", k=5)
+    elapsed = time.perf_counter() - started
+
+    assert len(results) == 5
+    assert elapsed < 0.01
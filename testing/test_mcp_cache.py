@@ -0,0 +1,123 @@
+# testing/test_mcp_cache.py
+import asyncio
+import json
+from collections import Counter
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from httpx import AsyncClient
+from conftest import seed_tools
+from backend.routers.proxy import _serve_cacheable
+from backend.services import mcp_cache
+from backend.services.circuit_breaker import get_breaker
+from backend.services.routing_table import ToolRoute
+from backend.services.http_client import close_http_clients
+
+pytestmark = pytest.mark.asyncio
+
+CACHED_TOOL = 901
+upstream_calls = Counter()
+
+
+async def slow_mcp_server(scope, receive, send):
+    """JSON-answering MCP backend that takes 200 ms per request, like a busy free-tier instance."""
+    if scope["type"] != "http":
+        return
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    request = json.loads(body)
+    upstream_calls[request["method"]] += 1
+    await asyncio.sleep(0.2)
+
+    headers = [(b"content-type", b"application/json")]
+    if request["method"] == "initialize" and request["params"].get("protocolVersion") == "stateful":
+        headers.append((b"mcp-session-id", b"abc"))
+    result = {"tools": [{"name": "echo", "inputSchema": {"type": "object"}}]}
+    if request["method"] == "initialize":
+        result = {"protocolVersion": request["params"]["protocolVersion"], "serverInfo": {"name": "stub"}}
+    payload = json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": result}).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    await send({"type": "http.response.body", "body": payload})
+
+
+@pytest_asyncio.fixture(scope="module")
+async def cached_tool(async_client, stub_server):
+    await seed_tools(
+        [{"id": 901, "username": "cache_owner", "email": "cache@example.com"}],
+        [{"id": CACHED_TOOL, "name": "cached tool", "cost": 0.5, "url": stub_server(slow_mcp_server), "owner_id": 901}],
+    )
+    return CACHED_TOOL
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def fresh_cache():
+    mcp_cache.responses.clear()
+    upstream_calls.clear()
+    yield
+    await close_http_clients()
+
+
+def rpc(request_id, method, params=None) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}}
+
+
+async def test_concurrent_tools_list_is_one_upstream_fetch(async_client: AsyncClient, cached_tool):
+    url = f"/api/proxy/{cached_tool}/messages"
+    responses = await asyncio.gather(*(async_client.post(url, json=rpc(i, "tools/list")) for i in range(8)))
+
+    assert upstream_calls["tools/list"] == 1
+    assert [r.json()["id"] for r in responses] == list(range(8))
+    assert all(r.json()["result"]["tools"][0]["name"] == "echo" for r in responses)
+    assert sorted(r.headers["x-mcp-cache"] for r in responses) == ["hit"] * 7 + ["miss"]
+
+    # Later clients are answered without touching the backend
+    again = await async_client.post(url, json=rpc("later", "tools/list"))
+    assert again.json() == {"jsonrpc": "2.0", "id": "later", "result": responses[0].json()["result"]}
+    assert upstream_calls["tools/list"] == 1
+
+
+async def test_initialize_is_keyed_by_protocol_version(async_client: AsyncClient, cached_tool):
+    url = f"/api/proxy/{cached_tool}/messages"
+    for client_name in ("a", "b"):
+        r = await async_client.post(url, json=rpc(1, "initialize", {"protocolVersion": "2025-03-26", "clientInfo": {"name": client_name}}))
+        assert r.json()["result"]["protocolVersion"] == "2025-03-26"
+    r = await async_client.post(url, json=rpc(1, "initialize", {"protocolVersion": "2024-11-05"}))
+    assert r.json()["result"]["protocolVersion"] == "2024-11-05"
+    assert upstream_calls["initialize"] == 2
+
+
+async def test_session_answers_are_not_shared(async_client: AsyncClient, cached_tool):
+    url = f"/api/proxy/{cached_tool}/messages"
+    for _ in range(2):
+        r = await async_client.post(url, json=rpc(1, "initialize", {"protocolVersion": "stateful"}))
+        assert r.headers["mcp-session-id"] == "abc"
+    assert upstream_calls["initialize"] == 2
+
+
+async def test_redeploy_invalidates(async_client: AsyncClient, cached_tool):
+    url = f"/api/proxy/{cached_tool}/messages"
+    await async_client.post(url, json=rpc(1, "tools/list"))
+    mcp_cache.invalidate_tool(cached_tool)
+    await async_client.post(url, json=rpc(2, "tools/list"))
+    assert upstream_calls["tools/list"] == 2
+
+    # Paid calls are never served from the cache
+    r = await async_client.post(url, json=rpc(3, "tools/call"))
+    assert r.status_code == 402
+
+
+async def test_body_must_match_the_peeked_method(cached_tool):
+    async def no_more_body():
+        return
+        yield
+
+    route = ToolRoute(id=cached_tool, url="http://unused", cost=0.5, status="live", owner_id=901)
+    body = json.dumps(rpc(1, "tools/call")).encode()
+    with pytest.raises(HTTPException) as rejected:
+        await _serve_cacheable(None, route, get_breaker(cached_tool), "tools/list", [body], no_more_body())
+    assert rejected.value.status_code == 400
+    assert upstream_calls == Counter() and len(mcp_cache.responses) == 0
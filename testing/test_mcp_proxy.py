@@ -0,0 +1,166 @@
+# testing/test_mcp_proxy.py
+import json
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from conftest import seed_tools
+from backend.config import settings
+from backend.services import http_client
+from backend.services.http_client import acquire_host_slot, close_http_clients
+from backend.services.jsonrpc_stream import MethodPeeker
+
+pytestmark = pytest.mark.asyncio
+
+FREE_TOOL, PAID_TOOL = 601, 602
+upstream_bodies = []
+
+
+async def echo_mcp_server(scope, receive, send):
+    """Answers POST /messages with the request body it received, in several chunks."""
+    if scope["type"] != "http":
+        return
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    upstream_bodies.append(body)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    for i in range(0, len(body), 4096):
+        await send({"type": "http.response.body", "body": body[i:i + 4096], "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+@pytest_asyncio.fixture(scope="module")
+async def tools(async_client, stub_server):
+    upstream_url = stub_server(echo_mcp_server)
+    await seed_tools(
+        [{"id": 601, "username": "proxy_owner", "email": "proxy@example.com"}],
+        [
+            {"id": FREE_TOOL, "name": "free proxy tool", "cost": 0.0, "url": upstream_url, "owner_id": 601},
+            {"id": PAID_TOOL, "name": "paid proxy tool", "cost": 0.01, "url": upstream_url, "owner_id": 601},
+        ],
+    )
+    return upstream_url
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def fresh_http_clients():
+    # Pooled connections belong to the event loop that opened them
+    yield
+    await close_http_clients()
+
+
+async def chunked(body: bytes, size: int = 8192):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def peek(body: bytes, chunk_size: int = 1) -> MethodPeeker:
+    peeker = MethodPeeker()
+    for i in range(0, len(body), chunk_size):
+        peeker.feed(body[i:i + chunk_size])
+    return peeker
+
+
+async def test_peeker_reads_only_the_top_level_method():
+    body = b'{"params": {"method": "nested", "text": "a \\" quote"}, "id": 1, "method": "tools\\/call", "jsonrpc": "2.0"}'
+    peeker = peek(body)
+    assert peeker.done and peeker.method == "tools/call"
+
+    assert peek(b'  [{"method": "tools/call"}]').is_batch
+    assert peek(b'"tools/call"').invalid
+    notification_response = peek(b'{"jsonrpc": "2.0", "id": 3, "result": {}}')
+    assert notification_response.done and notification_response.method is None
+    assert peek(b'{"method": 5}').invalid
+
+
+async def test_peeker_rejects_ambiguous_methods():
+    # Upstream JSON parsers keep the last duplicate key, so the first one must not be trusted
+    duplicate = peek(b'{"jsonrpc":"2.0","id":1,"method":"ping","method":"tools/call"}')
+    assert duplicate.invalid and duplicate.error == 'duplicate "method" key'
+    assert peek(b'{"method":null,"method":"tools/call"}').invalid
+    assert peek(b'{"method":{"name":"tools/call"}}').invalid
+
+
+async def test_body_streams_through_unchanged(async_client: AsyncClient, tools):
+    upstream_bodies.clear()
+    blob = "x" * (3 * settings.PROXY_PEEK_MAX_BYTES)
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"arguments": {"data": blob}}}).encode()
+
+    response = await async_client.post(f"/api/proxy/{FREE_TOOL}/messages", content=chunked(body))
+    assert response.status_code == 200
+    assert response.content == body
+    assert upstream_bodies == [body]
+
+
+async def test_paid_call_is_billed_before_forwarding(async_client: AsyncClient, tools):
+    upstream_bodies.clear()
+    call = json.dumps({"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {}}).encode()
+    response = await async_client.post(f"/api/proxy/{PAID_TOOL}/messages", content=call)
+    assert response.status_code == 402
+    assert upstream_bodies == []
+
+    # Listing a paid tool's capabilities stays free
+    listing = json.dumps({"jsonrpc": "2.0", "id": 3, "method": "tools/list"}).encode()
+    response = await async_client.post(f"/api/proxy/{PAID_TOOL}/messages", content=listing)
+    assert response.status_code == 200 and upstream_bodies == [listing]
+
+
+async def test_duplicate_method_is_not_forwarded(async_client: AsyncClient, tools):
+    upstream_bodies.clear()
+    for body in (
+        b'{"jsonrpc":"2.0","id":1,"method":"ping","method":"tools/call"}',
+        b'{"jsonrpc":"2.0","id":1,"method":null,"method":"tools/call"}',
+    ):
+        response = await async_client.post(f"/api/proxy/{PAID_TOOL}/messages", content=body)
+        assert response.status_code == 400
+
+    # Past the peek window the duplicate is caught while streaming, before it is sent
+    blob = "x" * (2 * settings.PROXY_PEEK_MAX_BYTES)
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "ping", "params": {"data": blob}}).encode()
+    body = body[:-1] + b', "method": "tools/call"}'
+    response = await async_client.post(f"/api/proxy/{PAID_TOOL}/messages", content=chunked(body))
+    assert response.status_code == 400
+    # At most the backend saw a truncated body, which no JSON parser accepts
+    assert all(b"tools/call" not in seen and len(seen) < len(body) for seen in upstream_bodies)
+
+
+async def test_duplicate_method_after_a_cacheable_peek_is_not_forwarded(async_client: AsyncClient, tools):
+    # Peeked as the free tools/list; the duplicate arrives in the first chunk read past the peek window
+    upstream_bodies.clear()
+    head = '{"jsonrpc": "2.0", "id": 1, "method": "tools/list", "params": {"data": "'
+    tail = '"}, "method": "tools/call"}'
+    body = (head + "x" * (settings.PROXY_PEEK_MAX_BYTES - len(head) + 100) + tail).encode()
+    response = await async_client.post(f"/api/proxy/{PAID_TOOL}/messages", content=chunked(body))
+    assert response.status_code == 400
+    assert all(b"tools/call" not in seen for seen in upstream_bodies)
+
+
+async def test_method_outside_peek_window_is_rejected(async_client: AsyncClient, tools):
+    blob = "x" * (2 * settings.PROXY_PEEK_MAX_BYTES)
+    body = json.dumps({"params": {"data": blob}, "method": "tools/call"}).encode()
+    response = await async_client.post(f"/api/proxy/{PAID_TOOL}/messages", content=chunked(body))
+    assert response.status_code == 400
+
+    response = await async_client.post(f"/api/proxy/{PAID_TOOL}/messages", content=b'{"method": ')
+    assert response.status_code == 400
+
+
+async def test_saturated_host_is_rejected_with_503(async_client: AsyncClient, tools, monkeypatch):
+    monkeypatch.setattr(http_client, "_host_slots", {})
+    monkeypatch.setattr(settings, "PROXY_MAX_CONNECTIONS_PER_HOST", 1)
+    monkeypatch.setattr(settings, "PROXY_POOL_TIMEOUT_SECONDS", 0.05)
+    upstream_bodies.clear()
+    slots = await acquire_host_slot(f"{tools}/messages")
+
+    call = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {}}).encode()
+    response = await async_client.post(f"/api/proxy/{FREE_TOOL}/messages", content=call)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert upstream_bodies == []
+
+    slots.release()
+    response = await async_client.post(f"/api/proxy/{FREE_TOOL}/messages", content=call)
+    assert response.status_code == 200 and upstream_bodies == [call]
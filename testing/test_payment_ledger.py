@@ -0,0 +1,81 @@
+# testing/test_payment_ledger.py
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import select
+from backend.config import settings
+from backend.models.db import DBPaymentLedger
+from backend.services import payment_ledger
+from backend.services.crypto import VerifiedTransaction
+
+pytestmark = pytest.mark.asyncio
+
+TX = "0x" + "ab" * 32
+COST = 0.01
+
+
+@pytest_asyncio.fixture
+async def session(session, monkeypatch):
+    chain_lookups = []
+
+    async def fake_chain(tx_hash):
+        chain_lookups.append(tx_hash)
+        # Pays for exactly three calls at COST
+        return VerifiedTransaction(
+            value_wei=3 * payment_ledger.cost_in_wei(COST),
+            receiver=settings.RECEIVER_WALLET_ADDRESS.lower(),
+            block_number=1,
+        )
+
+    monkeypatch.setattr(payment_ledger, "fetch_verified_transaction", fake_chain)
+    payment_ledger.exhausted_payments.clear()
+    session.chain_lookups = chain_lookups
+    return session
+
+
+async def test_proof_is_verified_once_and_debited_per_call(session):
+    for _ in range(3):
+        await payment_ledger.debit_payment(session, TX, tool_id=1, cost=COST)
+    assert session.chain_lookups == [TX]
+
+    with pytest.raises(HTTPException) as exc:
+        await payment_ledger.debit_payment(session, TX.upper().replace("0X", "0x"), tool_id=1, cost=COST)
+    assert exc.value.status_code == 402
+
+    entry = (await session.execute(select(DBPaymentLedger))).scalar_one()
+    assert (entry.calls_allowed, entry.calls_used) == (3, 3)
+    assert session.chain_lookups == [TX]
+
+
+async def test_proof_is_bound_to_its_tool(session):
+    await payment_ledger.debit_payment(session, TX, tool_id=1, cost=COST)
+    with pytest.raises(HTTPException) as exc:
+        await payment_ledger.debit_payment(session, TX, tool_id=2, cost=COST)
+    assert exc.value.status_code == 402
+
+    # Tx hashes are public: someone else's rejected attempt must not use up the payer's calls
+    with pytest.raises(HTTPException):
+        await payment_ledger.debit_payment(session, TX, tool_id=1, cost=COST, consume_all=True)
+    await payment_ledger.debit_payment(session, TX, tool_id=1, cost=COST)
+    await payment_ledger.debit_payment(session, TX, tool_id=1, cost=COST)
+    entry = (await session.execute(select(DBPaymentLedger))).scalar_one()
+    assert (entry.calls_allowed, entry.calls_used) == (3, 3)
+
+
+async def test_unlock_consumes_the_whole_payment(session):
+    await payment_ledger.debit_payment(session, TX, tool_id=1, cost=COST, consume_all=True)
+    with pytest.raises(HTTPException):
+        await payment_ledger.debit_payment(session, TX, tool_id=1, cost=COST)
+
+
+async def test_partly_used_proof_cannot_unlock(session):
+    await payment_ledger.debit_payment(session, TX, tool_id=1, cost=COST)
+    with pytest.raises(HTTPException):
+        await payment_ledger.debit_payment(session, TX, tool_id=1, cost=COST, consume_all=True)
+
+
+async def test_insufficient_payment(session):
+    with pytest.raises(HTTPException) as exc:
+        await payment_ledger.debit_payment(session, TX, tool_id=1, cost=1.0)
+    assert exc.value.status_code == 400
+    assert (await session.execute(select(DBPaymentLedger))).first() is None
@@ -0,0 +1,90 @@
+# testing/test_rate_limit.py
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from httpx import AsyncClient
+from conftest import ok_mcp_server, seed_tools
+from backend.config import settings
+from backend.services.http_client import close_http_clients
+from backend.services.rate_limit import RateLimiter, TokenBucket, rate_limiter
+
+pytestmark = pytest.mark.asyncio
+
+LIMITED_TOOL = 801
+NOISY_KEY, POLITE_KEY = "emcp_noisy", "emcp_polite"
+
+
+@pytest.fixture(autouse=True)
+def small_budgets(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_CALLER_RATE", 1.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_CALLER_BURST", 3.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TOOL_RATE", 1.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TOOL_BURST", 5.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TOOL_MAX_IN_FLIGHT", 2)
+
+
+@pytest_asyncio.fixture
+async def limited_tool(async_client, stub_server):
+    await seed_tools(
+        [
+            {"id": 801, "username": "noisy", "email": "noisy@example.com", "api_key": NOISY_KEY},
+            {"id": 802, "username": "polite", "email": "polite@example.com", "api_key": POLITE_KEY},
+        ],
+        [{"id": LIMITED_TOOL, "name": "limited tool", "url": stub_server(ok_mcp_server), "owner_id": 801}],
+    )
+    yield LIMITED_TOOL
+    await close_http_clients()
+
+
+async def test_token_bucket_refills():
+    bucket = TokenBucket(rate=2.0, burst=2.0, tokens=2.0, updated_at=0.0)
+    assert bucket.take(0.0) == 0 and bucket.take(0.0) == 0
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0
+
+
+async def test_throttled_caller_does_not_drain_the_tool():
+    limiter = RateLimiter()
+    for _ in range(3):
+        (await limiter.admit("user:1", 1))()
+    for _ in range(10):
+        with pytest.raises(HTTPException) as exc:
+            await limiter.admit("user:1", 1)
+        assert exc.value.detail["scope"] == "api_key"
+
+    # The noisy caller's rejected calls left the tool's budget for others
+    (await limiter.admit("user:2", 1))()
+    (await limiter.admit("user:2", 1))()
+    with pytest.raises(HTTPException) as exc:
+        await limiter.admit("user:3", 1)
+    assert exc.value.detail["scope"] == "tool"
+    assert int(exc.value.headers["Retry-After"]) >= 1
+
+
+async def test_in_flight_cap():
+    limiter = RateLimiter()
+    first = await limiter.admit("user:1", 1)
+    await limiter.admit("user:2", 1)
+    with pytest.raises(HTTPException) as exc:
+        await limiter.admit("user:3", 1)
+    assert exc.value.detail["scope"] == "tool_concurrency"
+    first()
+    first()  # releasing twice is harmless
+    assert limiter.in_flight[1] == 1
+    (await limiter.admit("user:3", 1))()
+
+
+async def test_proxy_limits_per_api_key(async_client: AsyncClient, limited_tool):
+    url = f"/api/proxy/{limited_tool}/messages"
+    message = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+
+    noisy = [await async_client.post(url, json=message, headers={"x-api-key": NOISY_KEY}) for _ in range(5)]
+    assert [r.status_code for r in noisy] == [200, 200, 200, 429, 429]
+    assert noisy[-1].headers["retry-after"] == "1"
+    assert noisy[-1].json()["detail"]["scope"] == "api_key"
+
+    # Another key still gets through; the key can also come as a query parameter
+    polite = await async_client.post(f"{url}?api_key={POLITE_KEY}", json=message)
+    assert polite.status_code == 200
+    assert rate_limiter.stats()["rejected"]["api_key"] >= 2
+    assert rate_limiter.in_flight == {}
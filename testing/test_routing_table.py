@@ -0,0 +1,77 @@
+# testing/test_routing_table.py
+import time
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import event, update
+from conftest import TestingSessionLocal, engine, ok_mcp_server, seed_tools
+from backend.models.db import DBTool
+from backend.services import routing_table
+from backend.services.http_client import close_http_clients
+
+pytestmark = pytest.mark.asyncio
+
+ROUTED_TOOL = 1001
+
+
+@pytest_asyncio.fixture(scope="module")
+async def routed_tool(async_client, stub_server):
+    await seed_tools(
+        [{"id": 1001, "username": "routing_owner", "email": "routing@example.com"}],
+        [{"id": ROUTED_TOOL, "name": "routed tool", "url": stub_server(ok_mcp_server), "owner_id": 1001, "status": "live"}],
+    )
+    return ROUTED_TOOL
+
+
+@pytest_asyncio.fixture
+async def queries():
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    routing_table.routes.clear()
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+    await close_http_clients()
+
+
+async def test_free_tool_calls_need_no_queries(async_client: AsyncClient, routed_tool, queries):
+    url = f"/api/proxy/{routed_tool}/messages"
+    call = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "echo"}}
+
+    assert (await async_client.post(url, json=call)).status_code == 200
+    assert len(queries) == 1  # the first call loads the route
+
+    queries.clear()
+    for _ in range(5):
+        assert (await async_client.post(url, json=call)).status_code == 200
+    assert queries == []
+
+
+async def test_unknown_tools_are_cached_too(async_client: AsyncClient, queries):
+    for _ in range(3):
+        r = await async_client.post("/api/proxy/999999/messages", json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+        assert r.status_code == 404
+    assert len(queries) == 1
+
+
+async def test_ttl_picks_up_changes_from_other_workers(monkeypatch, routed_tool, queries):
+    async with TestingSessionLocal() as session:
+        await routing_table.load_routes(session)
+        assert (await routing_table.resolve_route(session, routed_tool)).cost == 0.0
+
+        # Another worker changes the price; this one only notices after the TTL
+        await session.execute(update(DBTool).where(DBTool.id == routed_tool).values(cost=0.25))
+        await session.commit()
+        assert (await routing_table.resolve_route(session, routed_tool)).cost == 0.0
+
+        monkeypatch.setattr(routing_table.routes, "ttl", 0.01)
+        routing_table.routes.set(routed_tool, routing_table.routes.get(routed_tool))
+        time.sleep(0.02)
+        assert (await routing_table.resolve_route(session, routed_tool)).cost == 0.25
+
+        await session.execute(update(DBTool).where(DBTool.id == routed_tool).values(cost=0.0))
+        await session.commit()
+    routing_table.forget_route(routed_tool)
@@ -0,0 +1,49 @@
+import asyncio
+import threading
+import pytest
+from backend.config import settings
+from backend.ai_services import search_engine
+from backend.ai_services.search_engine import fuse_rankings
+
+
+def test_rrf_rewards_agreement_between_retrievers():
+    dense = [(1, 0.9), (2, 0.8), (3, 0.7)]
+    lexical = [(3, 12.0), (4, 9.0)]
+    ranked = fuse_rankings(dense, lexical, k=3)
+    # Tool 3 is found by both retrievers, so it outranks the dense-only top hit
+    assert ranked[0][0] == 3
+    assert [tool_id for tool_id, _ in ranked] == [3, 1, 2]
+
+
+def test_weighted_fusion_normalises_lexical_scores(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_FUSION", "weighted")
+    ranked = fuse_rankings([(1, 0.5)], [(2, 30.0), (1, 15.0)], k=5)
+    scores = dict(ranked)
+    assert scores[2] == 1.0
+    assert scores[1] == 0.5 + 0.5
+
+
+def test_empty_inputs():
+    assert fuse_rankings([], [], k=5) == []
+
+
+@pytest.mark.asyncio
+async def test_dense_and_lexical_retrieval_overlap(monkeypatch):
+    dense_started = threading.Event()
+    overlapped = []
+
+    async def dense_candidates(query, n, allowed_ids=None):
+        dense_started.set()
+        await asyncio.sleep(0.05)  # the query embedding being computed
+        return []
+
+    class SlowLexicalIndex:
+        def search(self, query, k, allow=None):
+            # Blocks until dense retrieval has started: only possible if BM25 is off the loop
+            overlapped.append(dense_started.wait(timeout=2))
+            return []
+
+    monkeypatch.setattr(search_engine, "_dense_candidates", dense_candidates)
+    monkeypatch.setattr(search_engine, "lexical_index", SlowLexicalIndex())
+    assert await search_engine._search_tools(None, "github issues", k=5) == []
+    assert overlapped == [True]
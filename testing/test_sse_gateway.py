@@ -0,0 +1,114 @@
+# testing/test_sse_gateway.py
+import asyncio
+import time
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from conftest import seed_tools
+from backend.config import settings
+from backend.main import app
+from backend.services.http_client import close_http_clients
+from backend.services.sse_gateway import HEARTBEAT, sse_gateway
+
+pytestmark = pytest.mark.asyncio
+
+SSE_TOOL = 1201
+ENDPOINT_EVENT = b"event: endpoint\ndata: /messages?session_id=abc\n\n"
+upstream_disconnects = []
+
+
+async def quiet_sse_server(scope, receive, send):
+    """Sends the endpoint event, then nothing until the proxy hangs up."""
+    if scope["type"] != "http":
+        return
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+    await send({"type": "http.response.body", "body": ENDPOINT_EVENT, "more_body": True})
+    while (await receive())["type"] != "http.disconnect":
+        pass
+    upstream_disconnects.append(time.monotonic())
+
+
+@pytest_asyncio.fixture(scope="module")
+async def sse_tool(async_client, stub_server):
+    await seed_tools(
+        [{"id": 1201, "username": "sse_owner", "email": "sse@example.com"}],
+        [{"id": SSE_TOOL, "name": "sse tool", "url": stub_server(quiet_sse_server), "owner_id": 1201}],
+    )
+    return SSE_TOOL
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def short_timeouts(monkeypatch):
+    monkeypatch.setattr(settings, "SSE_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "SSE_IDLE_TIMEOUT_SECONDS", 0.3)
+    upstream_disconnects.clear()
+    yield
+    await close_http_clients()
+
+
+async def wait_for_upstream_disconnect():
+    for _ in range(50):
+        if upstream_disconnects:
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError("upstream SSE stream was never closed")
+
+
+async def test_quiet_stream_gets_heartbeats_then_idles_out(async_client: AsyncClient, sse_tool):
+    closed = dict(sse_gateway.closed)
+    r = await async_client.get(f"/api/proxy/{sse_tool}/sse")
+
+    assert r.status_code == 200
+    assert r.content.startswith(ENDPOINT_EVENT)
+    assert r.content.count(HEARTBEAT) >= 3
+    assert sse_gateway.closed["idle"] == closed["idle"] + 1
+    assert sse_gateway.total == 0
+    await wait_for_upstream_disconnect()
+
+
+async def test_streams_are_capped_per_tool(async_client: AsyncClient, sse_tool, monkeypatch):
+    monkeypatch.setattr(settings, "SSE_MAX_CONNECTIONS_PER_TOOL", 1)
+    first = asyncio.create_task(async_client.get(f"/api/proxy/{sse_tool}/sse"))
+    while sse_gateway.total == 0:
+        await asyncio.sleep(0.01)
+
+    stats = (await async_client.get("/api/monitoring/sse")).json()
+    assert stats["per_tool"][str(sse_tool)]["open"] == 1
+
+    r = await async_client.get(f"/api/proxy/{sse_tool}/sse")
+    assert r.status_code == 429
+    assert r.json()["detail"]["scope"] == "tool"
+    assert "retry-after" in r.headers
+
+    assert (await first).status_code == 200
+    assert sse_gateway.total == 0
+
+
+async def test_client_disconnect_closes_upstream(sse_tool, monkeypatch):
+    monkeypatch.setattr(settings, "SSE_IDLE_TIMEOUT_SECONDS", 60.0)
+    closed = dict(sse_gateway.closed)
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        # The client goes away after the first event: the next write fails, as it would with uvicorn
+        if message["type"] == "http.response.body" and sent:
+            raise OSError("client disconnected")
+        if message["type"] == "http.response.body":
+            sent.append(message["body"])
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": f"/api/proxy/{sse_tool}/sse",
+        "raw_path": f"/api/proxy/{sse_tool}/sse".encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"test")], "client": ("127.0.0.1", 50000), "server": ("test", 80),
+    }
+    with pytest.raises(Exception):
+        await app(scope, receive, send)
+
+    assert sent == [ENDPOINT_EVENT]
+    assert sse_gateway.total == 0
+    assert sse_gateway.closed["client"] == closed["client"] + 1
+    await wait_for_upstream_disconnect()
@@ -0,0 +1,56 @@
+# testing/test_tool_catalog.py
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert
+from conftest import TestingSessionLocal, seed_tools
+from backend.models.db import DBTool
+from backend.services import catalog
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_conditional_get_and_invalidation(async_client: AsyncClient):
+    await seed_tools(
+        [{"id": 501, "username": "catalog_owner", "email": "catalog@example.com"}],
+        [{"name": f"catalog tool {i}", "url": "", "owner_id": 501} for i in range(3)],
+    )
+    catalog.invalidate_catalog()
+
+    first = await async_client.get("/api/tools/")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert len(first.json()) >= 3
+
+    # Served from the snapshot, then revalidated without a body
+    again = await async_client.get("/api/tools/")
+    assert again.content == first.content and again.headers["etag"] == etag
+    not_modified = await async_client.get("/api/tools/", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    # Any catalog change produces a new snapshot
+    async with TestingSessionLocal() as session:
+        await session.execute(insert(DBTool), [
+            {"name": "late tool", "description": "", "cost": 1.0, "repo_url": "", "url": "", "owner_id": 501}
+        ])
+        await session.commit()
+    catalog.invalidate_catalog()
+    changed = await async_client.get("/api/tools/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+async def test_cursor_header_on_full_pages(async_client: AsyncClient):
+    page = await async_client.get("/api/tools/?limit=2")
+    cursor = page.headers["x-next-cursor"]
+    rest = await async_client.get(f"/api/tools/?limit=100&cursor={cursor}")
+    first_ids = [t["id"] for t in page.json()]
+    rest_ids = [t["id"] for t in rest.json()]
+    assert not set(first_ids) & set(rest_ids)
+    assert "x-next-cursor" not in rest.headers
+
+
+async def test_review_paging_is_bounded(async_client: AsyncClient):
+    for params in ("skip=-1", "limit=0", "limit=-5", "limit=101"):
+        response = await async_client.get(f"/api/tools/1/reviews?{params}")
+        assert response.status_code == 422, params
@@ -0,0 +1,60 @@
+# testing/test_tool_pagination.py
+from datetime import datetime, timedelta
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+from backend.models.db import DBUser, DBTool
+from backend.services.pagination import encode_cursor, decode_cursor
+from backend import crud
+
+pytestmark = pytest.mark.asyncio
+
+
+def tool_row(tool_id: int, created_at: datetime) -> dict:
+    return {"id": tool_id, "name": f"t{tool_id}", "description": "", "cost": 0.0,
+            "repo_url": "", "url": "", "owner_id": 1, "created_at": created_at}
+
+
+@pytest_asyncio.fixture
+async def session(session):
+    await session.execute(insert(DBUser), [{"id": 1, "username": "u", "email": "u@example.com", "hashed_password": "x"}])
+    start = datetime(2025, 1, 1)
+    # Tools 4-6 share a timestamp, so the id tiebreaker matters
+    await session.execute(insert(DBTool), [
+        tool_row(i, start + timedelta(hours=min(i, 4))) for i in range(1, 11)
+    ])
+    await session.commit()
+    return session
+
+
+async def walk(session, limit: int, new_tool_after_first_page: bool = False) -> list:
+    seen, after = [], None
+    while True:
+        page = await crud.get_tools(session, limit=limit, after=after)
+        seen += [t.id for t in page]
+        if new_tool_after_first_page:
+            await session.execute(insert(DBTool), [tool_row(99, datetime(2024, 1, 1))])
+            await session.commit()
+            new_tool_after_first_page = False
+        if len(page) < limit:
+            return seen
+        after = decode_cursor(encode_cursor(page[-1].created_at, page[-1].id))
+
+
+async def test_cursor_walk_visits_every_tool_once(session):
+    assert await walk(session, limit=3) == list(range(1, 11))
+
+
+async def test_inserts_do_not_shift_later_pages(session):
+    # A tool created "before" the cursor position doesn't duplicate or skip rows
+    assert await walk(session, limit=4, new_tool_after_first_page=True) == list(range(1, 11))
+
+
+async def test_skip_limit_still_supported(session):
+    page = await crud.get_tools(session, skip=3, limit=3)
+    assert [t.id for t in page] == [4, 5, 6]
+
+
+async def test_malformed_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
@@ -0,0 +1,68 @@
+# testing/test_tool_summaries.py
+from datetime import datetime, timedelta
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+from backend.models.db import DBUser, DBTool, DBRating
+from backend.models.pydantic import RatingBase
+from backend.routers.payments import rate_tool
+from backend.ai_services import search_engine
+from backend import crud
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def session(session):
+    await session.execute(insert(DBUser), [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x"}
+        for i in range(1, 9)
+    ])
+    await session.execute(insert(DBTool), [
+        {"id": 1, "name": "a", "description": "", "cost": 0.0, "repo_url": "", "url": "", "owner_id": 1},
+        {"id": 2, "name": "b", "description": "", "cost": 0.0, "repo_url": "", "url": "", "owner_id": 1},
+        {"id": 3, "name": "c", "description": "", "cost": 0.0, "repo_url": "", "url": "", "owner_id": 2},
+    ])
+    start = datetime(2025, 1, 1)
+    await session.execute(insert(DBRating), [
+        {"tool_id": 1, "user_id": u, "rating": u % 6, "comment": f"c{u}", "timestamp": start + timedelta(days=u)}
+        for u in range(1, 9)
+    ])
+    await session.commit()
+    return session
+
+
+async def test_summaries_without_loading_relationships(session):
+    tools = await crud.get_tools(session)
+    by_id = {t.id: t for t in tools}
+
+    assert by_id[1].author == "user1"
+    assert by_id[1].author_tools_count == 2
+    assert by_id[3].author_tools_count == 1
+    assert by_id[1].rating_count == 8
+    assert by_id[1].average_rating == pytest.approx(sum(u % 6 for u in range(1, 9)) / 8, abs=0.01)
+    assert by_id[2].rating_count == 0 and by_id[2].average_rating is None
+    assert by_id[1].reviews == []
+
+
+async def test_include_reviews_returns_newest_first(session):
+    tools = await crud.get_tools(session, include_reviews=True)
+    reviews = {t.id: t.reviews for t in tools}[1]
+    assert [r["user"] for r in reviews] == ["user8", "user7", "user6", "user5", "user4"]
+
+
+async def test_review_pages(session):
+    first = await crud.get_tool_reviews(session, 1, skip=0, limit=3)
+    second = await crud.get_tool_reviews(session, 1, skip=3, limit=3)
+    assert [r["comment"] for r in first + second] == ["c8", "c7", "c6", "c5", "c4", "c3"]
+
+
+async def test_rating_invalidates_cached_search_results(session):
+    search_engine.result_cache.set(("tool c", 5, None, False, search_engine.index_version), [{"id": 3, "rating_count": 0}])
+    version = search_engine.index_version
+
+    user = await session.get(DBUser, 4)
+    await rate_tool(3, RatingBase(rating=5, tool_id=3), session, user)
+    assert len(search_engine.result_cache) == 0
+    # A search that started before the rating won't cache its stale results either
+    assert search_engine.index_version > version
@@ -0,0 +1,115 @@
+# testing/test_web3_verification.py
+"""Payment verification against a local stand-in for an Ethereum JSON-RPC node."""
+import json
+import pytest
+from fastapi import HTTPException
+from web3 import AsyncWeb3
+from backend.config import settings
+from backend.services import crypto, payment_ledger
+
+pytestmark = pytest.mark.asyncio
+
+RECEIVER = "0x" + "ab" * 20
+SENDER = "0x" + "cd" * 20
+PAID_TX = "0x" + "11" * 32
+REVERTED_TX = "0x" + "22" * 32
+ONE_ETH = 10 ** 18
+
+rpc_calls = []
+
+
+def transaction(tx_hash: str) -> dict:
+    return {
+        "blockHash": "0x" + "33" * 32, "blockNumber": "0x10", "from": SENDER, "gas": "0x5208",
+        "gasPrice": "0x1", "hash": tx_hash, "input": "0x", "nonce": "0x0", "to": RECEIVER,
+        "transactionIndex": "0x0", "value": hex(ONE_ETH), "type": "0x0", "chainId": "0x14a34",
+        "v": "0x1b", "r": "0x" + "44" * 32, "s": "0x" + "55" * 32,
+    }
+
+
+def receipt(tx_hash: str, status: int) -> dict:
+    return {
+        "blockHash": "0x" + "33" * 32, "blockNumber": "0x10", "contractAddress": None,
+        "cumulativeGasUsed": "0x5208", "effectiveGasPrice": "0x1", "from": SENDER, "gasUsed": "0x5208",
+        "logs": [], "logsBloom": "0x" + "00" * 256, "status": hex(status), "to": RECEIVER,
+        "transactionHash": tx_hash, "transactionIndex": "0x0", "type": "0x0",
+    }
+
+
+def answer(method: str, params: list):
+    if method == "eth_chainId":
+        return "0x14a34"
+    tx_hash = params[0]
+    if tx_hash not in (PAID_TX, REVERTED_TX):
+        return None
+    if method == "eth_getTransactionByHash":
+        return transaction(tx_hash)
+    if method == "eth_getTransactionReceipt":
+        return receipt(tx_hash, 1 if tx_hash == PAID_TX else 0)
+    raise ValueError(method)
+
+
+async def json_rpc_node(scope, receive, send):
+    if scope["type"] != "http":
+        return
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    request = json.loads(body)
+    rpc_calls.append(request["method"])
+    payload = json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": answer(request["method"], request["params"])})
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": payload.encode()})
+
+
+@pytest.fixture(scope="module")
+def rpc_url(stub_server):
+    return stub_server(json_rpc_node)
+
+
+@pytest.fixture
+def node(rpc_url, monkeypatch):
+    monkeypatch.setattr(crypto, "async_w3", AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(rpc_url)))
+    crypto.verified_transactions.clear()
+    rpc_calls.clear()
+
+
+async def test_verified_transaction_is_cached(node):
+    tx = await crypto.fetch_verified_transaction(PAID_TX)
+    assert (tx.value_wei, tx.receiver, tx.block_number) == (ONE_ETH, RECEIVER, 16)
+    assert sorted(rpc_calls) == ["eth_getTransactionByHash", "eth_getTransactionReceipt"]
+
+    # Same proof again, in any case: no RPC at all
+    rpc_calls.clear()
+    assert await crypto.fetch_verified_transaction(PAID_TX.upper().replace("0X", "0x")) == tx
+    assert rpc_calls == []
+
+
+async def test_reverted_and_unknown_transactions(node):
+    for tx_hash in (REVERTED_TX, "0x" + "99" * 32):
+        with pytest.raises(Exception):
+            await crypto.fetch_verified_transaction(tx_hash)
+    assert len(crypto.verified_transactions) == 0
+
+
+async def test_debit_checks_receiver_and_amount(node, session, monkeypatch):
+    payment_ledger.exhausted_payments.clear()
+    monkeypatch.setattr(settings, "RECEIVER_WALLET_ADDRESS", "0x" + "ee" * 20)
+    with pytest.raises(HTTPException, match="wrong address"):
+        await payment_ledger.debit_payment(session, PAID_TX, tool_id=1, cost=0.5)
+
+    monkeypatch.setattr(settings, "RECEIVER_WALLET_ADDRESS", RECEIVER.upper().replace("0X", "0x"))
+    with pytest.raises(HTTPException, match="Insufficient amount"):
+        await payment_ledger.debit_payment(session, PAID_TX, tool_id=1, cost=2.0)
+
+    # One ETH covers two calls at 0.5, all from a single chain lookup
+    rpc_calls.clear()
+    for _ in range(2):
+        await payment_ledger.debit_payment(session, PAID_TX, tool_id=1, cost=0.5)
+    with pytest.raises(HTTPException) as exc:
+        await payment_ledger.debit_payment(session, PAID_TX, tool_id=1, cost=0.5)
+    assert exc.value.status_code == 402
+    assert rpc_calls == []  # verified by the rejected attempts above, then cached